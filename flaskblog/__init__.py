@@ -3,7 +3,7 @@
 
 
 # External extensions:
-from flask import Flask
+from flask import Flask, session, request, has_request_context
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
@@ -23,6 +23,9 @@ From:
 
 Import:
 # Flask: A class providing creating web applications.
+# session: A dictionary stored in the user's cookie (here for the selected language).
+# request: A function to process data sent from the client to the server.
+# has_request_context: A function to check whether the code runs within a request.
 # LoginManager: A class providing user session management.
 # SQLAlchemy: A class providing database management.
 # Bcrypt: A class providing bcrypt hashing.
@@ -65,45 +68,77 @@ mail = Mail()
 # Locale settings:
 us = Locale('en', 'US')
 cz = Locale('cs', 'CZ')
-Locale.current = cz
-Locale.post_to_translate = [None,]
+locales = [us, cz]
 '''
 (Legend)
 # us: An instance of Locale class (settings for Englich).
 # cz: An instance of Locale class (settings for Czech).
-# Locale.current: A class attribute for selected language.
-# Locale.post_to_translate: A class attribute for translations from Google translator.
+# locales: A list of all configured languages.
 '''
 
 
 def get_locale():
     '''
-    Function for setting the language of the page.
+    Function for setting the language of the page (separately for each request).
 
     :return: Page in selected language.
 
     Legend:
-    # Locale.current: Class attribute for selected language.
+    # has_request_context(): Outside of a request (e.g. background threads) the default language is used.
+    # session.get('language'): The language selected by the user (main.change_language).
+    # request.accept_languages.best_match(): The language preferred by the user's browser (Accept-Language header).
+    # locales: A list of all configured languages.
+    # cz: The default language.
     '''
 
-    return Locale.current
+    # Default language:
+    if not has_request_context():
+        return cz
 
+    # Language selected by the user, or preferred by the browser:
+    language = session.get('language') or request.accept_languages.best_match(
+        [locale.language for locale in locales]
+    )
 
-def create_app(config_class=Config):
+    for locale in locales:
+        if locale.language == language:
+            return locale
+
+    return cz
+
+
+def create_app(config_class=Config, settings=None):
     '''
     Functions for creating and configuration of the application.
 
     :param config_class: Reference to the configuration class.
+    :param settings: A dictionary of settings replacing the configuration (optional, e.g. another database).
     :return: Created application.
 
     Legend:
     # app: A flask instance for the application.
     # Flask(__name__): Flask class with root settings.
     # config.from_object(Config): Definition of the path to the configuration file.
+    # config.update(settings): The settings are applied before the modules are assigned (they use them in init_app).
     # init_app(app): Assign modules to the application.
+    # sqlite_profile: Settings of each new SQLite connection (WAL journal, synchronization, cache, busy timeout),
+      set_pool() adds the pool settings of a database file before the engine is created by db.init_app().
     # from flaskblog._._: Application file path.
     # import _: A name of the blueprints.
     # register_blueprint(_): Method for registering blueprints.
+    # translator: The translator service (shared connections, time limits and the circuit breaker).
+    # translation_workers: A pool of background threads translating new and updated posts.
+    # response_cache: The cache of whole pages shared by all readers.
+    # fragment_cache: The cache of page fragments (articles of posts) shared by all readers.
+    # static_assets: Fingerprinted static files with precompressed variants (flask assets build command).
+    # template_streaming: Sending long pages in parts while they are rendered.
+    # app.app_context(): Context for working with the database outside of a request.
+    # db.create_all(): Creating database tables that do not exist yet (existing tables are not changed).
+    # CREATE_TABLES_ON_START: Setting for creating the missing tables at the start of the application.
+    # CompressionMiddleware: Compressing the responses (gzip, brotli) - wraps the WSGI application.
+    # exporter: The static export of the blog (flask export command).
+    # migrator: Applying versioned changes of existing tables (migrations folder, flask migrate commands).
+    # MIGRATE_ON_START: Setting for applying pending migrations at the start of the application (off by default).
     # Babel: Class provides an interface for page localization.
     # locale_selector=get_locale: Binding the page language to the get_locale function.
     '''
@@ -112,26 +147,68 @@ def create_app(config_class=Config):
     app = Flask(__name__)
 
     # Load the configurations:
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+    app.config.update(settings or {})
 
     # Assignment of instances:
+    from flaskblog.db_engine import sqlite_profile
+    sqlite_profile.set_pool(app)
     db.init_app(app)
+    sqlite_profile.init_app(app)
     bcrypt.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
 
+    # Translator and background translations:
+    from flaskblog.main.translator import translator
+    from flaskblog.main.workers import translation_workers
+    translator.init_app(app)
+    translation_workers.init_app(app)
+
+    # Cache of pages:
+    from flaskblog.cache import response_cache, fragment_cache
+    response_cache.init_app(app)
+    fragment_cache.init_app(app)
+
+    # Static assets:
+    from flaskblog.assets import static_assets
+    static_assets.init_app(app)
+
+    # Streaming of pages:
+    from flaskblog.streaming import template_streaming
+    template_streaming.init_app(app)
+
     # Import blueprints:
     from flaskblog.users.routes import users
     from flaskblog.posts.routes import posts
     from flaskblog.main.routes import main
+    from flaskblog.search.routes import search
     from flaskblog.errors.handlers import errors
 
     # Registration of blueprints:
     app.register_blueprint(users)
     app.register_blueprint(posts)
     app.register_blueprint(main)
+    app.register_blueprint(search)
     app.register_blueprint(errors)
 
+    # Static export of the blog:
+    from flaskblog.exporter import exporter
+    exporter.init_app(app)
+
+    # Compression of responses:
+    from flaskblog.compression import CompressionMiddleware
+    CompressionMiddleware(app)
+
+    # Creation of missing database tables & migrations of existing ones:
+    from flaskblog.migrations.migrator import migrator
+    migrator.init_app(app)
+    with app.app_context():
+        if app.config['CREATE_TABLES_ON_START']:
+            db.create_all()
+        if app.config['MIGRATE_ON_START']:
+            migrator.upgrade()
+
     # Instance of Babel (for web localization):
     babel = Babel(app, locale_selector=get_locale)
 
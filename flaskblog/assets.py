@@ -0,0 +1,323 @@
+# FILE FOR THE STATIC ASSETS #
+# This file is used to build fingerprinted copies of the static files (the hash of the content in the file name)
+# with precompressed variants (.gz, .br), and to serve them with immutable caching (flask assets build).
+
+
+# External extensions:
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+import click
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# flask.cli: A module of Flask for commands of the "flask" command line.
+
+Import:
+# current_app: A function providing access to a running application.
+# request: A function to process data sent from the client to the server (here the Accept-Encoding header).
+# send_from_directory: A function for sending a file from a folder (here the static folder).
+# AppGroup: A class for a group of commands bound to the application (flask assets ...).
+# click: A library for command line interfaces (used by Flask).
+# gzip: A module for the gzip compression (the .gz variants).
+# hashlib: A module providing secure hash algorithms (here the fingerprint of a file).
+# json: Built-in module for transferring data as text (here the manifest of the assets).
+# mimetypes: A module for the types of files by their extension.
+# os: A module for working with files and folders.
+# shutil: A module for removing folders (here the built assets).
+'''
+
+
+# Internal extensions:
+from flaskblog.compression import brotli, choose_encoding
+'''
+(Legend)
+From:
+# flaskblog.compression: The compression.py file in the root directory.
+
+Import:
+# brotli: A library for the brotli compression (None if it is not installed).
+# choose_encoding: A function for choosing the encoding accepted by the browser.
+'''
+
+
+# Assets settings:
+ASSETS_FOLDER = 'assets'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+VARIANTS = {'br': '.br', 'gzip': '.gz'}
+PRECOMPRESSED_TYPES = {'image/vnd.microsoft.icon', 'image/x-icon'}
+'''
+(Legend)
+# ASSETS_FOLDER: Folder of the built assets in the static folder (static/assets).
+# MANIFEST: Name of the file with the names of the built assets (static/assets/manifest.json).
+# HASH_LENGTH: Number of characters of the hash in the file name (e.g. main.3f2a1b9c0d4e.css).
+# VARIANTS: Extensions of the precompressed variants by the encoding (in the order of preference).
+# PRECOMPRESSED_TYPES: Types precompressed besides the text types of COMPRESS_MIMETYPES (the favicon).
+'''
+
+
+def hashed_name(filename, data):
+    '''
+    A function for the name of the built asset.
+
+    :param filename: The name of the file in the static folder (e.g. 'main.css').
+    :param data: The content of the file.
+    :return: The name with the hash of the content (e.g. 'assets/main.3f2a1b9c0d4e.css').
+
+    Legend:
+    # hashlib.sha256(): The hash changes with each change of the content (a new address for the browser).
+    # os.path.splitext(): Splitting the name and the extension.
+    '''
+
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    name, extension = os.path.splitext(filename)
+    return f'{ASSETS_FOLDER}/{name}.{digest}{extension}'
+
+
+class StaticAssets:
+    '''
+    A class for the fingerprinted static assets.
+
+    The build (flask assets build) copies each static file to static/assets under a name with the hash of
+    its content, writes the .gz (and .br with brotli installed) variants of text files, and the manifest
+    of the names. The manifest is loaded at the start of the application, and url_for('static', ...) creates
+    the addresses of the built assets. A built asset never changes (a changed file gets another name), so it is
+    sent with Cache-Control: immutable for a year, and the browser does not ask for it again. Files that are not
+    built (e.g. new profile pictures) are sent as before.
+
+    Attributes:
+    # files: A dictionary of the built asset names by the original name (from the manifest).
+    # variants: A dictionary of the precompressed encodings by the built asset name.
+    # max_age: Seconds for which the browser keeps a built asset (from the configuration).
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the assets.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.files = {}
+        self.variants = {}
+        self.max_age = 0
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the assets to the application.
+
+        :param app: The application.
+
+        Legend:
+        # ASSETS_MAX_AGE: Seconds for which the browser keeps a built asset.
+        # self.load(): Loading the manifest of the built assets (if they are built).
+        # app.url_defaults(): url_for('static', ...) creates the address of the built asset.
+        # app.view_functions['static']: The static files are sent by self.send_static.
+        # app.extensions: A dictionary of the application extensions.
+        # app.cli.add_command(): Registering the "flask assets" commands.
+        '''
+
+        self.max_age = app.config['ASSETS_MAX_AGE']
+        self.load(app)
+        app.url_defaults(self.asset_url)
+        app.view_functions['static'] = self.send_static
+        app.extensions['assets'] = self
+        app.cli.add_command(assets_commands)
+
+
+    def load(self, app):
+        '''
+        Method for loading the manifest of the built assets.
+
+        :param app: The application.
+
+        Legend:
+        # app.static_folder: The static folder of the application.
+        # OSError, ValueError: The assets are not built (the original names are used).
+        # clear(): Stored pages and fragments with the addresses of the previous assets are removed.
+        '''
+
+        try:
+            with open(os.path.join(app.static_folder, ASSETS_FOLDER, MANIFEST)) as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            manifest = {}
+
+        self.files = manifest.get('files', {})
+        self.variants = manifest.get('variants', {})
+        for cache in ('response_cache', 'fragment_cache'):
+            if cache in app.extensions:
+                app.extensions[cache].clear()
+
+
+    def asset_url(self, endpoint, values):
+        '''
+        Method for replacing the name of a static file by the name of its built asset (called by url_for).
+
+        :param endpoint: The endpoint of the address (only 'static' is changed).
+        :param values: Parameters of the address (e.g. filename='main.css').
+        '''
+
+        if endpoint == 'static' and values.get('filename') in self.files:
+            values['filename'] = self.files[values['filename']]
+
+
+    def send_static(self, filename):
+        '''
+        Method for sending a static file (the view of the 'static' endpoint).
+
+        :param filename: The name of the file in the static folder.
+        :return: The file, or its precompressed variant accepted by the browser.
+
+        Legend:
+        # self.variants: The built asset has precompressed variants (.br, .gz).
+        # choose_encoding(): The variant accepted by the browser (None - the original file).
+        # mimetypes.guess_type(): The type of the original file (not of the .gz file).
+        # Content-Encoding: The browser decompresses the variant (the compression middleware skips it).
+        # Vary: Accept-Encoding: Proxies store the variants separately.
+        # cache_control.immutable: The built asset never changes (the browser does not ask again).
+        '''
+
+        folder = current_app.static_folder
+        built = filename.startswith(f'{ASSETS_FOLDER}/') and filename != f'{ASSETS_FOLDER}/{MANIFEST}'
+        max_age = self.max_age if built else None
+
+        encodings = self.variants.get(filename, [])
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), encodings)
+        if encoding is not None:
+            response = send_from_directory(folder, filename + VARIANTS[encoding], max_age=max_age,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(folder, filename, max_age=max_age)
+
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        if built:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+
+    def build(self, app):
+        '''
+        Method for building the assets from the static folder.
+
+        :param app: The application.
+        :return: A dictionary with the statistics (built files, precompressed variants).
+
+        Legend:
+        # os.walk(): All files of the static folder (the assets folder itself is skipped).
+        # hashed_name(): The name with the hash of the content (an existing asset is not written again).
+        # COMPRESS_MIMETYPES, PRECOMPRESSED_TYPES: Types with precompressed variants (images are already compressed).
+        # gzip.compress(mtime=0), brotli.compress(quality=11): The smallest variants (made once, not per request).
+        # len(compressed) < len(data) * 0.9: A variant is kept only if it is noticeably smaller.
+        # self.load(): The new manifest is used by this application (others load it at their start).
+        '''
+
+        static = app.static_folder
+        compressible = set(app.config['COMPRESS_MIMETYPES']) | PRECOMPRESSED_TYPES
+        files, variants = {}, {}
+        stats = {'files': 0, 'variants': 0}
+
+        for root, folders, names in os.walk(static):
+            if os.path.abspath(root) == os.path.abspath(static):
+                folders[:] = [folder for folder in folders if folder != ASSETS_FOLDER]
+            for name in names:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, static).replace(os.sep, '/')
+                with open(path, 'rb') as file:
+                    data = file.read()
+
+                built = hashed_name(filename, data)
+                files[filename] = built
+                self.write(os.path.join(static, built), data)
+                stats['files'] += 1
+
+                if mimetypes.guess_type(filename)[0] not in compressible:
+                    continue
+                compressed = {'gzip': gzip.compress(data, 9, mtime=0)}
+                if brotli is not None:
+                    compressed['br'] = brotli.compress(data, quality=11)
+                for encoding in VARIANTS:
+                    if encoding in compressed and len(compressed[encoding]) < len(data) * 0.9:
+                        self.write(os.path.join(static, built + VARIANTS[encoding]), compressed[encoding])
+                        variants.setdefault(built, []).append(encoding)
+                        stats['variants'] += 1
+
+        manifest = json.dumps({'files': files, 'variants': variants}, indent=1, sort_keys=True)
+        self.write(os.path.join(static, ASSETS_FOLDER, MANIFEST), manifest.encode(), replace=True)
+        self.load(app)
+        return stats
+
+
+    def write(self, path, data, replace=False):
+        '''
+        Method for writing a built file.
+
+        :param path: The file name.
+        :param data: The content (bytes).
+        :param replace: The existing file is replaced (only the manifest - a built asset never changes).
+
+        Legend:
+        # os.replace(): The file is replaced at once (a running application never reads a half written file).
+        '''
+
+        if os.path.exists(path) and not replace:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+
+    def clean(self, app):
+        '''
+        Method for removing the built assets (the original names are used again).
+
+        :param app: The application.
+        '''
+
+        shutil.rmtree(os.path.join(app.static_folder, ASSETS_FOLDER), ignore_errors=True)
+        self.load(app)
+
+
+# Instance of the assets (assigned to the application in create_app):
+static_assets = StaticAssets()
+
+
+# Commands of the "flask assets" command line:
+assets_commands = AppGroup('assets', help="Fingerprinted static assets.")
+
+
+@assets_commands.command('build')
+def build_command():
+    '''
+    Command for building the assets (flask --app run assets build).
+    '''
+
+    stats = static_assets.build(current_app)
+    click.echo(f"Built {stats['files']} files with {stats['variants']} precompressed variants.")
+    click.echo("Restart the application to use the new manifest in all its processes.")
+
+
+@assets_commands.command('clean')
+def clean_command():
+    '''
+    Command for removing the built assets (flask --app run assets clean).
+    '''
+
+    static_assets.clean(current_app)
+    click.echo("The built assets were removed.")
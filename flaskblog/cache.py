@@ -0,0 +1,764 @@
+# FILE FOR THE RESPONSE CACHE #
+# This file is used to store whole rendered pages shared by all readers (LRU memory limit, invalidation by tags)
+# with holes for the parts of the reader (navigation, messages, profile) that are filled in for each request,
+# and rendered page fragments shared by all readers (e.g. the article of a post on the pages with a list of posts).
+# It also answers conditional requests of browsers and proxies (ETag, Last-Modified, 304 Not Modified).
+
+
+# External extensions:
+from flask import current_app, request, session, g, make_response, render_template
+from flask_login import current_user
+from markupsafe import Markup
+from collections import OrderedDict
+from datetime import timezone
+from functools import wraps
+import hashlib
+import secrets
+import threading
+import time
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# flask_login: A Flask extension that provides user session management.
+# markupsafe: A library for safe HTML strings (used by Jinja2).
+# collections: A module with specialized container datatypes.
+# datetime: A library for date and time functions.
+# functools: A module for working with functions (here a decorator).
+
+Import:
+# current_app: A function providing access to a running application.
+# request: A function to process data sent from the client to the server.
+# session: A dictionary stored in the user's cookie (here the pending flash messages).
+# g: An object for storing data during one request (here the tags of the rendered page).
+# make_response: A function for creating a response object from the result of a view.
+# render_template: A function to render the html template (here the holes of the reader).
+# current_user: A proxy for the current user (the holes of the page and the ETag).
+# Markup: A string that is displayed in the template without escaping (here a stored fragment or a hole).
+# OrderedDict: A dictionary remembering the order of use (the least recently used page is removed first).
+# timezone: Module for time zones (dates in the database are in UTC without a time zone).
+# wraps: A decorator keeping the name and docstring of the decorated view.
+# hashlib: A module providing secure hash algorithms (here the ETag of a page).
+# secrets: A module for generating random values (here the mark of the holes, unknown to the authors of posts).
+# threading: A module for running code in threads (here a lock for the stored pages and counters).
+# time: A module for time functions (here the expiration of stored pages).
+'''
+
+
+# Internal extensions:
+from flaskblog import get_locale
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+
+Import:
+# get_locale: A function returning the page language of the current request.
+'''
+
+
+# Tag of all pages with a list of posts (invalidated when a post is added or deleted):
+POSTS_TAG = 'posts'
+
+
+def post_tag(post_id):
+    '''
+    A function for the tag of pages displaying a post.
+
+    :param post_id: The ID of the post.
+    :return: The tag (e.g. 'post:35').
+    '''
+
+    return f'post:{post_id}'
+
+
+def user_tag(user_id):
+    '''
+    A function for the tag of pages displaying a user (username, profile picture).
+
+    :param user_id: The ID of the user.
+    :return: The tag (e.g. 'user:3').
+    '''
+
+    return f'user:{user_id}'
+
+
+def post_tags(posts):
+    '''
+    A function for the tags of a page with a list of posts (each post and its author).
+
+    :param posts: Posts of the page.
+    :return: List of tags.
+    '''
+
+    return [tag for post in posts for tag in (post_tag(post.id), user_tag(post.author_id))]
+
+
+class CacheEntry:
+    '''
+    A class for one stored page.
+
+    Attributes:
+    # parts: The rendered page split by the holes (bytes, one part more than holes).
+    # holes: Templates and their variables filled in between the parts for each request.
+    # status: The status code of the response.
+    # headers: Headers of the response (without cookies).
+    # tags: Tags of the page (e.g. 'posts', 'post:35', 'user:3').
+    # expires: Time when the page is no longer used (time.monotonic()).
+    # size: Size of the page in memory (bytes of the parts and headers).
+    '''
+
+    def __init__(self, parts, holes, status, headers, tags, expires):
+        '''
+        Method for creating the stored page.
+
+        :param parts: The rendered page split by the holes (bytes).
+        :param holes: Templates and their variables of the holes (list of name and dictionary).
+        :param status: The status code of the response.
+        :param headers: Headers of the response (list of name and value).
+        :param tags: Tags of the page.
+        :param expires: Time when the page is no longer used.
+        '''
+
+        self.parts = parts
+        self.holes = holes
+        self.status = status
+        self.headers = headers
+        self.tags = tags
+        self.expires = expires
+        self.size = sum(len(part) for part in parts) + sum(len(name) + len(value) for name, value in headers)
+
+
+class ResponseCache:
+    '''
+    A class for the response cache of whole pages.
+
+    Pages are stored under a key (endpoint, URL parameters, page language) and served without database
+    queries and rendering of the page. The memory is limited (the least recently used pages are removed)
+    and the pages are removed by tags when the displayed data change (posts, users, translations).
+
+    The parts of the reader (navigation, messages, profile in the sidebar, post editing tools) are templates
+    inserted by {{ cache_hole(...) }}. While a page is being stored, they are rendered as marks only, so the
+    stored page is the same for all readers (anonymous and logged in), and the holes are filled in with
+    the small templates of the reader for each request. Other methods than GET bypass the cache.
+
+    The cache belongs to one process: with several worker processes, other processes keep their pages
+    until CACHE_TTL runs out.
+
+    Attributes:
+    # entries: An ordered dictionary of stored pages by key (from the least recently used).
+    # tags: A dictionary of keys by tag.
+    # lock: A lock for the stored pages and the counters.
+    # size: Size of all stored pages (bytes).
+    # generation: Number of invalidations (a page rendered before an invalidation is not stored).
+    # hole_mark: The mark of a hole in the stored page (an HTML comment with a random part).
+    # enabled, max_bytes, ttl: Settings from the configuration.
+    # hits, misses, bypasses, stores, evictions, invalidations: Counters for the statistics.
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the cache.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.lock = threading.Lock()
+        self.size = 0
+        self.generation = 0
+        self.hole_mark = f'<!--cache-hole-{secrets.token_hex(8)}-->'
+        self.enabled = False
+        self.max_bytes = 0
+        self.ttl = 0
+        self.hits = self.misses = self.bypasses = 0
+        self.stores = self.evictions = self.invalidations = 0
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the cache to the application.
+
+        :param app: The application.
+
+        Legend:
+        # CACHE_ENABLED: Setting for using the cache.
+        # CACHE_MAX_BYTES: Maximum size of all stored pages (bytes).
+        # CACHE_TTL: Time for which a stored page is used (seconds).
+        # app.jinja_env.globals: Functions available in all templates (here cache_hole).
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        self.enabled = app.config['CACHE_ENABLED'] and app.config['CACHE_MAX_BYTES'] > 0
+        self.max_bytes = app.config['CACHE_MAX_BYTES']
+        self.ttl = app.config['CACHE_TTL']
+        self.clear()
+        app.jinja_env.globals['cache_hole'] = self.hole
+        app.extensions['response_cache'] = self
+
+
+    def cached(self, view):
+        '''
+        Decorator of a view whose page is stored for all readers.
+
+        :param view: The view function (the page must not depend on anything else than the key and the holes).
+        :return: The decorated view.
+
+        Legend:
+        # self.bypass(): The request is not served from the cache (and its page is not stored).
+        # self.get(): The stored page (None if it is not stored or has expired).
+        # self.fill(): The stored page with the holes filled in for the reader.
+        # g.cache_tags: Tags added by the view and its functions (response_cache.tag()).
+        # g.cache_holes: Holes of the page being rendered (cache_hole() renders only their marks).
+        # split(self.hole_mark): The page split by the holes (stored together with the holes).
+        # generation: An invalidation during the rendering means the page may be outdated (it is not stored).
+        # g.get('cache_degraded'): A degraded page (self.degrade()) is sent, but not stored.
+        # response.is_streamed: The page is rendered while it is sent (stored by self.store_stream() at its end).
+        # X-Cache: Header with the result (HIT, MISS or BYPASS).
+        '''
+
+        @wraps(view)
+        def cached_view(*args, **kwargs):
+
+            # Bypass:
+            if self.bypass():
+                with self.lock:
+                    self.bypasses += 1
+                response = make_response(view(*args, **kwargs))
+                response.headers['X-Cache'] = 'BYPASS'
+                return response
+
+            # Stored page:
+            key = self.key()
+            entry = self.get(key)
+            if entry is not None:
+                response = make_response(self.fill(entry.parts, entry.holes), entry.status, entry.headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            # Rendering and storing the page:
+            generation = self.generation
+            g.cache_tags = set()
+            g.cache_holes = []
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                holes = g.pop('cache_holes')
+            if response.is_streamed:
+                response.response = self.store_stream(key, response, holes, g.cache_tags, generation)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+
+            parts = response.get_data().split(self.hole_mark.encode())
+            if response.status_code == 200 and len(parts) == len(holes) + 1 and not g.get('cache_degraded'):
+                headers = [(name, value) for name, value in response.headers if name.lower() != 'set-cookie']
+                self.set(key, CacheEntry(parts, holes, response.status_code, headers, g.cache_tags,
+                                         time.monotonic() + self.ttl), generation)
+            response.set_data(self.fill(parts, holes))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return cached_view
+
+
+    def bypass(self):
+        '''
+        Method for checking whether the request bypasses the cache.
+
+        :return: True if the page of the request is not served from the cache.
+
+        Legend:
+        # request.method: Only GET (and HEAD) requests are cached.
+        '''
+
+        return not self.enabled or request.method not in ('GET', 'HEAD')
+
+
+    def hole(self, template, **context):
+        '''
+        Method for inserting a part of the reader into the page (called by {{ cache_hole(...) }} in templates).
+
+        :param template: Name of the html file of the part (e.g. 'layout_navigation_user.html').
+        :param context: Variables of the template (must not be objects of the database, e.g. post_id=post.id).
+        :return: The mark of the hole (if the page is being stored), otherwise the rendered part (safe HTML).
+
+        Legend:
+        # 'cache_holes' in g: The page is being rendered for the cache (the part is filled in later).
+        # render_template(): The part rendered for the reader of the request.
+        '''
+
+        if 'cache_holes' in g:
+            g.cache_holes.append((template, context))
+            return Markup(self.hole_mark)
+        return Markup(render_template(template, **context))
+
+
+    def fill(self, parts, holes):
+        '''
+        Method for filling in the holes of a page for the reader of the request.
+
+        :param parts: The page split by the holes (bytes).
+        :param holes: Templates and their variables of the holes.
+        :return: The page for the reader (bytes).
+
+        Legend:
+        # zip(holes, parts[1:]): Each hole is followed by the next part of the page.
+        # render_template(): The part of the reader (navigation, messages, profile, post editing tools).
+        '''
+
+        body = [parts[0]]
+        for (template, context), part in zip(holes, parts[1:]):
+            body.append(render_template(template, **context).encode())
+            body.append(part)
+        return b''.join(body)
+
+
+    def store_stream(self, key, response, holes, tags, generation):
+        '''
+        Method for sending a streamed page with the holes filled in, and storing it when it is sent whole.
+
+        :param key: The key of the page.
+        :param response: The streamed response (its chunks contain the marks of the holes).
+        :param holes: Templates and their variables of the holes (added while the page is being rendered).
+        :param tags: Tags of the page.
+        :param generation: Number of invalidations before the page was rendered.
+        :return: A generator of the chunks for the reader (bytes).
+
+        Legend:
+        # response.response: Chunks of the page (each chunk is rendered when it is asked for, in the request context).
+        # split(mark): A mark is rendered as one string (it is never split between two chunks).
+        # len(holes): The holes of a chunk are already added when the chunk is received.
+        # render_template(): The part of the reader (rendered before the next chunk, while the request is kept).
+        # degraded: A degraded page (self.degrade()) is only sent.
+        # chunks.close(): A page not sent whole (e.g. the reader left) ends its rendering and is not stored.
+        # parts: The page split by the holes (as in self.cached, stored only if it was sent whole).
+        '''
+
+        mark = self.hole_mark.encode()
+        degraded = g.get('cache_degraded', False)
+        chunks = response.response
+        status = response.status_code
+        headers = [(name, value) for name, value in response.headers if name.lower() != 'set-cookie']
+
+        def stream():
+            parts, current, filled = [], [], 0
+            try:
+                for chunk in chunks:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    pieces = chunk.split(mark)
+                    body = [pieces[0]]
+                    current.append(pieces[0])
+                    for piece in pieces[1:]:
+                        template, context = holes[filled]
+                        body.append(render_template(template, **context).encode())
+                        body.append(piece)
+                        parts.append(b''.join(current))
+                        current = [piece]
+                        filled += 1
+                    yield b''.join(body)
+            finally:
+                if hasattr(chunks, 'close'):
+                    chunks.close()
+
+            parts.append(b''.join(current))
+            if status == 200 and len(parts) == len(holes) + 1 and not degraded:
+                self.set(key, CacheEntry(parts, holes, status, headers, tags, time.monotonic() + self.ttl),
+                         generation)
+
+        return stream()
+
+
+    def key(self):
+        '''
+        Method for creating the key of the requested page.
+
+        :return: The key (endpoint, parameters of the address, URL parameters, page language).
+
+        Legend:
+        # request.view_args: Parameters of the address (e.g. post_id).
+        # request.args.items(multi=True): URL parameters (e.g. older, translated).
+        # get_locale().language: The page language of the request (set in the session of the reader).
+        '''
+
+        return (
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            tuple(sorted(request.args.items(multi=True))),
+            get_locale().language
+        )
+
+
+    def get(self, key):
+        '''
+        Method for getting a stored page.
+
+        :param key: The key of the page.
+        :return: The stored page (None if it is not stored or has expired).
+
+        Legend:
+        # move_to_end(): The page becomes the most recently used one.
+        '''
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self.remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+
+    def set(self, key, entry, generation):
+        '''
+        Method for storing a page (the least recently used pages are removed over the memory limit).
+
+        :param key: The key of the page.
+        :param entry: The page (CacheEntry).
+        :param generation: Number of invalidations before the page was rendered.
+
+        Legend:
+        # generation != self.generation: The data changed during the rendering (the page is not stored).
+        # entry.size > self.max_bytes: A page bigger than the whole cache is not stored.
+        # popitem(last=False): The least recently used page.
+        '''
+
+        with self.lock:
+            if generation != self.generation or entry.size > self.max_bytes:
+                return
+            if key in self.entries:
+                self.remove(key)
+
+            self.entries[key] = entry
+            self.size += entry.size
+            for tag in entry.tags:
+                self.tags.setdefault(tag, set()).add(key)
+            self.stores += 1
+
+            while self.size > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+
+    def remove(self, key):
+        '''
+        Method for removing a stored page (called with the lock held).
+
+        :param key: The key of the page.
+        '''
+
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+        for tag in entry.tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+
+    def tag(self, *tags):
+        '''
+        Method for adding tags to the page being rendered (called in the views).
+
+        :param tags: Tags of the displayed data (POSTS_TAG, post_tag(), user_tag()).
+
+        Legend:
+        # 'cache_tags' in g: Only pages of cached views are tagged.
+        '''
+
+        if 'cache_tags' in g:
+            g.cache_tags.update(tags)
+
+
+    def degrade(self):
+        '''
+        Method for marking the page being rendered as degraded (called in the views or their functions).
+
+        A degraded page lacks data that will be available later (e.g. posts displayed untranslated while
+        the translator is not available). Nothing announces that the data became available, so the page
+        is not stored, and it is sent without validators (conditional) - the next request renders it again.
+
+        Legend:
+        # g.cache_degraded: Setting for the page of the request (read by self.cached and conditional).
+        '''
+
+        g.cache_degraded = True
+
+
+    def invalidate(self, *tags):
+        '''
+        Method for removing all pages with the given tags (called after the data are changed).
+
+        :param tags: Tags of the changed data (POSTS_TAG, post_tag(), user_tag()).
+
+        Legend:
+        # self.generation += 1: Pages being rendered at the moment are not stored.
+        '''
+
+        with self.lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self.tags.get(tag, ())):
+                    self.remove(key)
+                    self.invalidations += 1
+
+
+    def clear(self):
+        '''
+        Method for removing all stored pages.
+        '''
+
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.tags.clear()
+            self.size = 0
+
+
+    def stats(self):
+        '''
+        Method for getting the statistics of the cache.
+
+        :return: A dictionary with the counters, the hit ratio and the memory use.
+        '''
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes
+            }
+
+
+# Instance of the cache (assigned to the application in create_app):
+response_cache = ResponseCache()
+
+
+class FragmentCache:
+    '''
+    A class for the cache of rendered page fragments (used in templates by {% call cached_fragment(...) %}).
+
+    A fragment is stored under a key made of everything it displays (e.g. post ID and version, the author's
+    username and profile picture, the page language), so it is shared by all pages and readers displaying it.
+    A change of the post or its author makes a new key, and the old fragment is no longer used (it is removed
+    as the least recently used one) - no invalidation is needed, even with several worker processes.
+
+    Attributes:
+    # entries: An ordered dictionary of stored fragments by key (from the least recently used).
+    # lock: A lock for the stored fragments and the counters.
+    # size: Size of all stored fragments (bytes).
+    # max_bytes: Maximum size of all stored fragments (from the configuration, 0 = fragments are not stored).
+    # hits, misses, evictions: Counters for the statistics.
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the cache.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.size = 0
+        self.max_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the cache to the application.
+
+        :param app: The application.
+
+        Legend:
+        # FRAGMENT_CACHE_MAX_BYTES: Maximum size of all stored fragments (bytes).
+        # app.jinja_env.globals: Functions available in all templates (here cached_fragment).
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        self.max_bytes = app.config['FRAGMENT_CACHE_MAX_BYTES']
+        self.clear()
+        app.jinja_env.globals['cached_fragment'] = self.fragment
+        app.extensions['fragment_cache'] = self
+
+
+    def fragment(self, *key, caller):
+        '''
+        Method for getting a stored fragment, or rendering and storing it (called by {% call %} in templates).
+
+        :param key: Parts of the key (the name of the fragment and everything it displays).
+        :param caller: The body of the {% call %} block (renders the fragment).
+        :return: The rendered fragment (safe HTML).
+
+        Legend:
+        # move_to_end(): The fragment becomes the most recently used one.
+        # caller(): Rendering the fragment (only if it is not stored).
+        # popitem(last=False): The least recently used fragment (removed over the memory limit).
+        '''
+
+        if not self.max_bytes:
+            return caller()
+
+        # Stored fragment:
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return Markup(html)
+            self.misses += 1
+
+        # Rendering and storing the fragment:
+        html = str(caller())
+        size = len(html.encode())
+        with self.lock:
+            if key not in self.entries and size <= self.max_bytes:
+                self.entries[key] = html
+                self.size += size
+                while self.size > self.max_bytes:
+                    _, removed = self.entries.popitem(last=False)
+                    self.size -= len(removed.encode())
+                    self.evictions += 1
+
+        return Markup(html)
+
+
+    def clear(self):
+        '''
+        Method for removing all stored fragments.
+        '''
+
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+    def stats(self):
+        '''
+        Method for getting the statistics of the cache.
+
+        :return: A dictionary with the counters, the hit ratio and the memory use.
+        '''
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes
+            }
+
+
+# Instance of the fragment cache (assigned to the application in create_app):
+fragment_cache = FragmentCache()
+
+
+def make_etag(*parts):
+    '''
+    A function for creating the ETag of the requested page (without rendering it).
+
+    :param parts: Versions of the displayed data (e.g. post ID and version, version of the feed).
+    :return: The ETag (hash of the versions and of everything else the page depends on).
+
+    Legend:
+    # request.endpoint, view_args, args: The page and its parameters (e.g. post ID, cursor, translated).
+    # get_locale().language: The page language of the request.
+    # reader: The logged in user with the displayed username and profile picture (the holes of the page).
+    # hashlib.sha1(): A short hash of all parts.
+    '''
+
+    reader = (current_user.id, current_user.username, current_user.profile_picture) \
+        if current_user.is_authenticated else None
+    key = repr((
+        request.endpoint,
+        sorted((request.view_args or {}).items()),
+        sorted(request.args.items(multi=True)),
+        get_locale().language,
+        reader,
+        parts
+    ))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def conditional(validators):
+    '''
+    Decorator of a view answering conditional requests (304 Not Modified without rendering the page).
+
+    :param validators: A function with the parameters of the view returning (etag, last_modified) -
+                       it reads only the versions of the data (e.g. the post or the feed version), not the page.
+    :return: The decorator.
+
+    Legend:
+    # '_flashes' in session: A pending message is displayed on the page (the page is rendered without validators).
+    # request.if_none_match: ETags sent by the reader (they take precedence over If-Modified-Since).
+    # contains_weak(): The weak ETag of a compressed page (W/) is the same version of the page.
+    # request.if_modified_since: Date sent by the reader (the page has not changed since then).
+    # replace(microsecond=0): The HTTP date has whole seconds.
+    # set_etag(), last_modified: The validators sent with the page (the reader sends them back next time).
+    # g.get('cache_degraded'): A degraded page is sent without validators (the reader cannot get 304 for it).
+    # cache_control.no_cache: The reader must ask before using its copy (the answer is often 304).
+    # vary.add('Cookie'): The page depends on the session of the reader (language, login).
+    # vary.add('Accept-Language'): The page language of a reader without a selected language comes from the browser
+      (a proxy must not send a page in another language, nor 304 for the ETag of another language).
+    '''
+
+    def decorator(view):
+
+        @wraps(view)
+        def conditional_view(*args, **kwargs):
+
+            # Pending messages:
+            if '_flashes' in session:
+                return view(*args, **kwargs)
+
+            # Validators:
+            etag, last_modified = validators(*args, **kwargs)
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+            # Not modified:
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = last_modified is not None and request.if_modified_since is not None \
+                    and last_modified <= request.if_modified_since
+            response = current_app.response_class(status=304) if not_modified else make_response(view(*args, **kwargs))
+
+            # Headers:
+            if not g.get('cache_degraded'):
+                response.set_etag(etag)
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            response.vary.add('Accept-Language')
+            return response
+
+        return conditional_view
+
+    return decorator
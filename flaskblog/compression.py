@@ -0,0 +1,364 @@
+# FILE FOR THE COMPRESSION OF RESPONSES #
+# This file is used to define the WSGI middleware compressing the responses of the application (gzip, brotli)
+# according to the Accept-Encoding header of the browser, including streamed responses.
+
+
+# External extensions:
+from werkzeug.http import parse_accept_header
+from werkzeug.datastructures import Headers
+from collections import OrderedDict
+import hashlib
+import threading
+import zlib
+'''
+(Legend)
+From:
+# werkzeug.http: A module of Werkzeug (used by Flask) for HTTP headers.
+# werkzeug.datastructures: A module of Werkzeug with data structures of requests and responses.
+# collections: A module with specialized container datatypes.
+
+Import:
+# parse_accept_header: A function reading the Accept-Encoding header (encodings and their quality).
+# Headers: A class for the headers of the response (here changed for the compressed body).
+# OrderedDict: A dictionary remembering the order of use (the least recently used body is removed first).
+# hashlib: A module providing secure hash algorithms (here the key of a stored compressed body).
+# threading: A module for running code in threads (here a lock for the stored bodies and counters).
+# zlib: A module for the gzip compression.
+'''
+
+
+# Optional extension (brotli is used only if it is installed):
+try:
+    import brotli
+except ImportError:
+    brotli = None
+'''
+(Legend)
+# brotli: A library for the brotli compression (pip install brotli), None if it is not installed.
+'''
+
+
+# Statuses of responses without a body or with a part of the body only:
+SKIPPED_STATUSES = {204, 206, 304}
+
+
+def choose_encoding(accept_encoding, encodings):
+    '''
+    A function for choosing the encoding accepted by the browser.
+
+    :param accept_encoding: The Accept-Encoding header (e.g. 'gzip, deflate, br').
+    :param encodings: Available encodings in the order of preference (e.g. ['br', 'gzip']).
+    :return: The encoding, or None if the browser does not accept any of them.
+
+    Legend:
+    # parse_accept_header(): Encodings with their quality (e.g. 'gzip;q=0.5', '*').
+    # quality(): The quality of the encoding (0 - not accepted).
+    # max(): The encoding with the highest quality (the order of encodings for the same quality).
+    '''
+
+    if not encodings:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    qualities = [(accepted.quality(encoding), -index, encoding) for index, encoding in enumerate(encodings)]
+    quality, _, encoding = max(qualities)
+    return encoding if quality > 0 else None
+
+
+class CompressionMiddleware:
+    '''
+    A class for the WSGI middleware compressing the responses of the application.
+
+    The encoding is chosen by the Accept-Encoding header of the browser (brotli before gzip if it is installed).
+    Small responses, responses of other types than text, and responses that are already compressed are sent
+    unchanged. A whole response (e.g. render_template) is compressed at once, and the compressed body is stored
+    under the hash of the body - the same page (e.g. from the response cache) is not compressed again.
+    A streamed response is compressed chunk by chunk, and each chunk is sent as soon as it is compressed.
+
+    Attributes:
+    # wsgi_app: The WSGI application of Flask (the wrapped application).
+    # enabled, min_size, level, brotli_quality, mimetypes, max_bytes: Settings from the configuration.
+    # encodings: Supported encodings in the order of preference ('br' only with brotli installed).
+    # entries: An ordered dictionary of stored compressed bodies by encoding and hash (from the least recently used).
+    # lock: A lock for the stored bodies and the counters.
+    # size: Size of all stored bodies (bytes).
+    # compressed, streamed, skipped, stored_hits, bytes_in, bytes_out: Counters for the statistics.
+    '''
+
+    def __init__(self, app):
+        '''
+        Method for creating the middleware and wrapping the WSGI application of Flask.
+
+        :param app: The application.
+
+        Legend:
+        # COMPRESS_ENABLED: Setting for compressing the responses.
+        # COMPRESS_MIN_SIZE: Minimum size of a compressed response (bytes).
+        # COMPRESS_LEVEL: Level of the gzip compression (1 - fastest, 9 - smallest).
+        # COMPRESS_BROTLI_QUALITY: Quality of the brotli compression (0 - fastest, 11 - smallest).
+        # COMPRESS_MIMETYPES: Types of compressed responses.
+        # COMPRESS_CACHE_MAX_BYTES: Maximum size of all stored compressed bodies (0 = not stored).
+        # app.wsgi_app = self: Each request passes through the middleware.
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        config = app.config
+        self.wsgi_app = app.wsgi_app
+        self.enabled = config['COMPRESS_ENABLED']
+        self.min_size = config['COMPRESS_MIN_SIZE']
+        self.level = config['COMPRESS_LEVEL']
+        self.brotli_quality = config['COMPRESS_BROTLI_QUALITY']
+        self.mimetypes = set(config['COMPRESS_MIMETYPES'])
+        self.max_bytes = config['COMPRESS_CACHE_MAX_BYTES']
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.size = 0
+        self.compressed = self.streamed = self.skipped = self.stored_hits = 0
+        self.bytes_in = self.bytes_out = 0
+
+        app.wsgi_app = self
+        app.extensions['compression'] = self
+
+
+    def __call__(self, environ, start_response):
+        '''
+        Method for processing a request (the WSGI interface).
+
+        :param environ: The WSGI environment of the request.
+        :param start_response: The function of the server for sending the status and headers.
+        :return: The body of the response (compressed or unchanged).
+
+        Legend:
+        # keep_response(): The status and headers of the application are kept until the compression is decided.
+        # self.compressible(): The response can be compressed (type, size, status, no Content-Encoding).
+        # Vary: Accept-Encoding: Proxies store the compressed and uncompressed response separately.
+        # choose_encoding(): The encoding accepted by the browser (None - sent unchanged).
+        # 'Content-Length' in headers: The whole response is ready (compressed at once, the new Content-Length).
+        # self.stream(): A streamed response (compressed chunk by chunk).
+        '''
+
+        if not self.enabled or environ['REQUEST_METHOD'] == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+
+        start = {}
+
+        def keep_response(status, headers, exc_info=None):
+            start.update(status=status, headers=headers, exc_info=exc_info)
+            return self.write
+
+        body = self.wsgi_app(environ, keep_response)
+        status, headers = start['status'], Headers(start['headers'])
+
+        # Unchanged response:
+        if not self.compressible(status, headers):
+            with self.lock:
+                self.skipped += 1
+            start_response(status, list(headers), start['exc_info'])
+            return body
+
+        vary = headers.get('Vary')
+        if not vary:
+            headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f'{vary}, Accept-Encoding'
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            start_response(status, list(headers), start['exc_info'])
+            return body
+
+        # Whole response:
+        if 'Content-Length' in headers:
+            try:
+                data = b''.join(body)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            compressed = self.compress(data, encoding)
+            self.prepare(headers, encoding)
+            headers['Content-Length'] = str(len(compressed))
+            start_response(status, list(headers), start['exc_info'])
+            return [compressed]
+
+        # Streamed response:
+        self.prepare(headers, encoding)
+        start_response(status, list(headers), start['exc_info'])
+        return self.stream(body, encoding)
+
+
+    def compressible(self, status, headers):
+        '''
+        Method for checking whether the response can be compressed.
+
+        :param status: The status of the response (e.g. '200 OK').
+        :param headers: Headers of the response.
+        :return: True if the response can be compressed.
+
+        Legend:
+        # SKIPPED_STATUSES: Responses without a body (204, 304) or with a part of it (206).
+        # Content-Encoding: The response is already compressed (e.g. a precompressed static file).
+        # no-transform: The response must not be changed.
+        # Content-Type: Only text responses are compressed (images are already compressed).
+        # Content-Length < min_size: A small response would not be smaller.
+        '''
+
+        length = headers.get('Content-Length', type=int)
+        return (
+            int(status[:3]) not in SKIPPED_STATUSES
+            and 'Content-Encoding' not in headers
+            and 'no-transform' not in headers.get('Cache-Control', '')
+            and headers.get('Content-Type', '').split(';')[0].strip() in self.mimetypes
+            and (length is None or length >= self.min_size)
+        )
+
+
+    def prepare(self, headers, encoding):
+        '''
+        Method for changing the headers for the compressed body.
+
+        :param headers: Headers of the response.
+        :param encoding: The encoding of the body.
+
+        Legend:
+        # Content-Encoding: The encoding of the body (the browser decompresses it).
+        # W/: The ETag of the compressed body is weak (the same page, other bytes than the uncompressed one).
+        '''
+
+        headers['Content-Encoding'] = encoding
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+
+
+    def write(self, data):
+        '''
+        Method returned by start_response (the write function of old WSGI applications is not supported).
+
+        :param data: Part of the body.
+        '''
+
+        raise RuntimeError("The write function of start_response is not supported by the compression.")
+
+
+    def compressor(self, encoding):
+        '''
+        Method for creating a compressor of a streamed body.
+
+        :param encoding: The encoding ('br' or 'gzip').
+        :return: A function compressing a chunk (the chunk is sent at once) and a function ending the body.
+
+        Legend:
+        # brotli.Compressor(): process() and flush() - the compressed chunk is complete.
+        # zlib.compressobj(wbits=31): The gzip format; flush(Z_SYNC_FLUSH) - the compressed chunk is complete.
+        '''
+
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+    def compress(self, data, encoding):
+        '''
+        Method for compressing a whole body (the stored compressed body is used if the same body was compressed).
+
+        :param data: The body (bytes).
+        :param encoding: The encoding ('br' or 'gzip').
+        :return: The compressed body.
+
+        Legend:
+        # hashlib.sha1(): The key of the body (much faster than the compression).
+        # brotli.compress(), zlib.compressobj(wbits=31): The whole body in the brotli or gzip format.
+        # move_to_end(): The body becomes the most recently used one.
+        # popitem(last=False): The least recently used body (removed over the memory limit).
+        '''
+
+        key = (encoding, hashlib.sha1(data).digest())
+        with self.lock:
+            compressed = self.entries.get(key)
+            if compressed is not None:
+                self.entries.move_to_end(key)
+                self.stored_hits += 1
+                self.compressed += 1
+                self.bytes_in += len(data)
+                self.bytes_out += len(compressed)
+                return compressed
+
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=self.brotli_quality)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            compressed = compressor.compress(data) + compressor.flush()
+
+        with self.lock:
+            self.compressed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+            if len(compressed) <= self.max_bytes and key not in self.entries:
+                self.entries[key] = compressed
+                self.size += len(compressed)
+                while self.size > self.max_bytes:
+                    _, removed = self.entries.popitem(last=False)
+                    self.size -= len(removed)
+        return compressed
+
+
+    def stream(self, body, encoding):
+        '''
+        Method for compressing a streamed body chunk by chunk.
+
+        :param body: The streamed body of the application (iterable of bytes).
+        :param encoding: The encoding ('br' or 'gzip').
+        :return: A generator of compressed chunks.
+
+        Legend:
+        # self.compressor(): Each chunk of the application is compressed and sent at once (e.g. the head of the page).
+        # finish(): The end of the compressed body.
+        # body.close(): The body of the application is closed (also if the browser disconnects).
+        '''
+
+        compress, finish = self.compressor(encoding)
+        size = compressed_size = 0
+        try:
+            for chunk in body:
+                if chunk:
+                    data = compress(chunk)
+                    size += len(chunk)
+                    compressed_size += len(data)
+                    yield data
+            data = finish()
+            compressed_size += len(data)
+            yield data
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            with self.lock:
+                self.streamed += 1
+                self.bytes_in += size
+                self.bytes_out += compressed_size
+
+
+    def stats(self):
+        '''
+        Method for getting the statistics of the compression.
+
+        :return: A dictionary with the counters, the compression ratio and the memory use.
+        '''
+
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'encodings': self.encodings,
+                'compressed': self.compressed,
+                'streamed': self.streamed,
+                'skipped': self.skipped,
+                'stored_hits': self.stored_hits,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes
+            }
@@ -27,21 +27,112 @@ class Config:
     Contains the following:
     # SECRET_KEY: Encryption key used for application security.
     # SQLALCHEMY_DATABASE_URI: Path to the SQLAlchemy database.
+    # SQLALCHEMY_ENGINE_OPTIONS: Settings of the database engine (they take precedence over SQLITE_POOL).
+    # SQLITE_POOL: Settings of the pool of connections of a SQLite database file (not used for an in-memory database).
+    # SQLITE_JOURNAL_MODE: Journal mode of SQLite ('WAL' - readers are not blocked by writing, None for the default).
+    # SQLITE_SYNCHRONOUS: Synchronization of SQLite with the disk ('NORMAL' with WAL, None for the default).
+    # SQLITE_CACHE_SIZE: Page cache of each SQLite connection (negative value in KiB, None for the default).
+    # SQLITE_MMAP_SIZE: Size of the SQLite file mapped into memory (in bytes, None for the default).
+    # SQLITE_BUSY_TIMEOUT: Time of waiting for a locked SQLite database (in milliseconds).
     # MAIL_SERVER: E-mail server.
     # MAIL_PORT: E-mail port.
     # MAIL_USE_TLS: E-mail security type.
     # MAIL_USERNAME: E-mail login name.
     # MAIL_PASSWORD: E-mail password.
     # MAIL_DEFAULT_SENDER: E-mail default sender.
+    # CREATE_TABLES_ON_START: Creating missing database tables at the start of the application.
+    # MIGRATE_ON_START: Applying pending database migrations at the start of the application (off - flask migrate upgrade is the deploy step).
+    # POSTS_PER_PAGE: Number of posts on one page of the post lists.
+    # PAGINATION_MODE: Pagination of the post lists - 'keyset' (links newer/older) or 'pages' (page numbers).
+    # POSTS_AUTHOR_LOADING: Loading of post authors on the post lists - 'joined', 'selectin' or 'lazy' (one query per post).
+    # TRANSLATION_WORKERS: Number of background threads translating new and updated posts.
+    # TRANSLATION_QUEUE_SIZE: Maximum number of translations waiting for the background threads.
+    # TRANSLATION_RETRIES: Number of repeated attempts after a failed translation.
+    # TRANSLATION_RETRY_DELAY: Seconds to wait before the first repeated attempt (doubled with each attempt).
+    # TRANSLATION_PENDING_TIMEOUT: Seconds after which a pending translation is made during the request.
+    # TRANSLATION_BATCH_LIMIT: Maximum number of characters sent to Google Translate in one request.
+    # TRANSLATOR_BACKEND: Translation backend - 'google' (Google Translate), 'dictionary' (local, no network) or 'fake'.
+    # TRANSLATOR_DICTIONARY: Path to the JSON dictionary of the 'dictionary' backend (None for the default one).
+    # TRANSLATOR_FAKE_DELAY: Seconds of waiting of the 'fake' backend before each translation (a slow upstream).
+    # TRANSLATOR_FAKE_FAIL: Failing translations of the 'fake' backend (an unavailable upstream).
+    # TRANSLATOR_TIMEOUT: Time limit of one translation request (in seconds).
+    # TRANSLATOR_POOL_SIZE: Maximum number of concurrent translation requests.
+    # TRANSLATOR_FAILURE_THRESHOLD: Number of failed requests in a row after which the translator is paused.
+    # TRANSLATOR_RESET_TIMEOUT: Seconds of the pause before the next trial request.
+    # CACHE_ENABLED: Storing whole pages for all readers (home, post, user posts, about).
+    # CACHE_MAX_BYTES: Maximum size of all stored pages (the least recently used ones are removed).
+    # CACHE_TTL: Seconds for which a stored page is used (changes made by other worker processes appear after it).
+    # CACHE_STATS_ENABLED: Statistics of the caches and compression at /cache_stats (always in the debug mode).
+    # FRAGMENT_CACHE_MAX_BYTES: Maximum size of stored page fragments - articles of posts (0 = not stored).
+    # COMPRESS_ENABLED: Compressing the responses by gzip, or brotli if it is installed (Accept-Encoding of the browser).
+    # COMPRESS_MIN_SIZE: Minimum size of a compressed response in bytes (smaller ones are sent unchanged).
+    # COMPRESS_LEVEL: Level of the gzip compression (1 - fastest, 9 - smallest).
+    # COMPRESS_BROTLI_QUALITY: Quality of the brotli compression (0 - fastest, 11 - smallest).
+    # COMPRESS_MIMETYPES: Types of compressed responses (text types, images are already compressed).
+    # COMPRESS_CACHE_MAX_BYTES: Maximum size of stored compressed bodies - the same page is not compressed again (0 = not stored).
+    # ASSETS_MAX_AGE: Seconds for which the browser keeps a built static asset (flask assets build, immutable).
+    # STREAM_TEMPLATES: Sending long pages (post, lists of posts) in parts while they are rendered (the head of the page at once).
+    # STREAM_CHUNK_SIZE: Number of characters of one sent part of a streamed page.
+    # EXPORT_FOLDER: Folder of the static export of the blog (flask export).
+    # EXPORT_WORKERS: Number of processes rendering the pages of the static export (None = number of processors).
     '''
 
     SECRET_KEY = config.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = config.get('SQLALCHEMY_DATABASE_URI')
+    SQLALCHEMY_ENGINE_OPTIONS = config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    SQLITE_POOL = config.get('SQLITE_POOL', {
+        'pool_size': 10,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 3600
+    })
+    SQLITE_JOURNAL_MODE = config.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = config.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = config.get('SQLITE_CACHE_SIZE', -16000)
+    SQLITE_MMAP_SIZE = config.get('SQLITE_MMAP_SIZE', 134217728)
+    SQLITE_BUSY_TIMEOUT = config.get('SQLITE_BUSY_TIMEOUT', 5000)
     MAIL_SERVER = config.get('MAIL_SERVER')
     MAIL_PORT = 587
     MAIL_USE_TLS = True
     MAIL_USERNAME = config.get('MAIL_USERNAME')
     MAIL_PASSWORD = config.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = config.get('MAIL_DEFAULT_SENDER')
+    CREATE_TABLES_ON_START = config.get('CREATE_TABLES_ON_START', True)
+    MIGRATE_ON_START = config.get('MIGRATE_ON_START', False)
+    POSTS_PER_PAGE = config.get('POSTS_PER_PAGE', 5)
+    PAGINATION_MODE = config.get('PAGINATION_MODE', 'keyset')
+    POSTS_AUTHOR_LOADING = config.get('POSTS_AUTHOR_LOADING', 'joined')
+    TRANSLATION_WORKERS = config.get('TRANSLATION_WORKERS', 2)
+    TRANSLATION_QUEUE_SIZE = config.get('TRANSLATION_QUEUE_SIZE', 100)
+    TRANSLATION_RETRIES = config.get('TRANSLATION_RETRIES', 3)
+    TRANSLATION_RETRY_DELAY = config.get('TRANSLATION_RETRY_DELAY', 2)
+    TRANSLATION_PENDING_TIMEOUT = config.get('TRANSLATION_PENDING_TIMEOUT', 300)
+    TRANSLATION_BATCH_LIMIT = config.get('TRANSLATION_BATCH_LIMIT', 4500)
+    TRANSLATOR_BACKEND = config.get('TRANSLATOR_BACKEND', 'google')
+    TRANSLATOR_DICTIONARY = config.get('TRANSLATOR_DICTIONARY', None)
+    TRANSLATOR_FAKE_DELAY = config.get('TRANSLATOR_FAKE_DELAY', 0)
+    TRANSLATOR_FAKE_FAIL = config.get('TRANSLATOR_FAKE_FAIL', False)
+    TRANSLATOR_TIMEOUT = config.get('TRANSLATOR_TIMEOUT', 5)
+    TRANSLATOR_POOL_SIZE = config.get('TRANSLATOR_POOL_SIZE', 4)
+    TRANSLATOR_FAILURE_THRESHOLD = config.get('TRANSLATOR_FAILURE_THRESHOLD', 5)
+    TRANSLATOR_RESET_TIMEOUT = config.get('TRANSLATOR_RESET_TIMEOUT', 30)
+    CACHE_ENABLED = config.get('CACHE_ENABLED', True)
+    CACHE_MAX_BYTES = config.get('CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    CACHE_TTL = config.get('CACHE_TTL', 300)
+    CACHE_STATS_ENABLED = config.get('CACHE_STATS_ENABLED', False)
+    FRAGMENT_CACHE_MAX_BYTES = config.get('FRAGMENT_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+    COMPRESS_ENABLED = config.get('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = config.get('COMPRESS_MIN_SIZE', 500)
+    COMPRESS_LEVEL = config.get('COMPRESS_LEVEL', 6)
+    COMPRESS_BROTLI_QUALITY = config.get('COMPRESS_BROTLI_QUALITY', 5)
+    COMPRESS_MIMETYPES = config.get('COMPRESS_MIMETYPES', [
+        'text/html', 'text/css', 'text/plain', 'text/xml', 'application/json', 'application/javascript', 'image/svg+xml'
+    ])
+    COMPRESS_CACHE_MAX_BYTES = config.get('COMPRESS_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+    ASSETS_MAX_AGE = config.get('ASSETS_MAX_AGE', 365 * 24 * 60 * 60)
+    STREAM_TEMPLATES = config.get('STREAM_TEMPLATES', True)
+    STREAM_CHUNK_SIZE = config.get('STREAM_CHUNK_SIZE', 16 * 1024)
+    EXPORT_FOLDER = config.get('EXPORT_FOLDER', 'export')
+    EXPORT_WORKERS = config.get('EXPORT_WORKERS', None)
 
 
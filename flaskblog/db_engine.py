@@ -0,0 +1,140 @@
+# FILE FOR THE DATABASE ENGINE SETTINGS #
+# This file is used to set up each new SQLite connection (journal mode, synchronization, cache, memory mapping)
+# and the pool of connections of a SQLite database file.
+
+
+# External extensions:
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# event: A module for listening to events of the database engine (here a new connection).
+# make_url: A function for reading the parts of a database address (here the name of the database file).
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+'''
+
+
+class SQLiteProfile:
+    '''
+    A class for the SQLite engine profile (PRAGMA settings applied to each new connection of the pool).
+
+    With the WAL journal, readers do not wait for writers (new posts, account changes) and the writer
+    does not wait for readers, and busy_timeout lets a second writer wait instead of failing immediately.
+
+    Attributes:
+    # pragmas: A list of PRAGMA settings (name, value) from the configuration.
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the profile.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.pragmas = []
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def set_pool(self, app):
+        '''
+        Method for adding the pool settings to the engine options (called before db.init_app creates the engine).
+
+        :param app: The application.
+
+        Legend:
+        # url.database: Name of the database file (None, '' or ':memory:' for an in-memory database).
+        # An in-memory database uses one shared connection (StaticPool set by Flask-SQLAlchemy),
+          which does not accept the settings of a pool (pool_size, max_overflow, pool_timeout).
+        # SQLITE_POOL: Settings of the pool of a database file (QueuePool, the SQLAlchemy default for a file).
+        # SQLALCHEMY_ENGINE_OPTIONS: Settings of the configuration take precedence (e.g. another poolclass).
+        '''
+
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+
+        if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+            return
+        if url.query.get('mode') == 'memory' or 'poolclass' in options:
+            return
+
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**app.config['SQLITE_POOL'], **options}
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the profile to the database engine of the application.
+
+        :param app: The application (db.init_app(app) must be called before).
+
+        Legend:
+        Settings (from the configuration, None = the SQLite default is kept):
+        # SQLITE_JOURNAL_MODE: Journal mode (WAL - readers and the writer do not block each other).
+        # SQLITE_SYNCHRONOUS: Synchronization with the disk (NORMAL is safe with WAL and much faster than FULL).
+        # SQLITE_CACHE_SIZE: Page cache of each connection (negative value in KiB).
+        # SQLITE_MMAP_SIZE: Size of the database file mapped into memory (in bytes).
+        # SQLITE_BUSY_TIMEOUT: Time of waiting for a locked database (in milliseconds).
+
+        Engine:
+        # app.app_context(): Context for access to the database engine of the application.
+        # db.engine.dialect.name: Only SQLite databases are set up.
+        # event.listen(..., 'connect', ...): Calling the method for each new connection.
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        # Settings:
+        self.pragmas = [
+            (name, app.config[key])
+            for name, key in (
+                ('busy_timeout', 'SQLITE_BUSY_TIMEOUT'),
+                ('journal_mode', 'SQLITE_JOURNAL_MODE'),
+                ('synchronous', 'SQLITE_SYNCHRONOUS'),
+                ('cache_size', 'SQLITE_CACHE_SIZE'),
+                ('mmap_size', 'SQLITE_MMAP_SIZE')
+            )
+            if app.config[key] is not None
+        ]
+
+        # Engine:
+        with app.app_context():
+            if db.engine.dialect.name == 'sqlite':
+                event.listen(db.engine, 'connect', self.connect)
+        app.extensions['sqlite_profile'] = self
+
+
+    def connect(self, connection, connection_record):
+        '''
+        Method called for each new connection of the pool (applying the PRAGMA settings).
+
+        :param connection: The new DBAPI connection (sqlite3).
+        :param connection_record: Record of the connection in the pool (not used).
+
+        Legend:
+        # cursor.execute(f'PRAGMA {name} = {value}'): Applying the setting (values come from the configuration only).
+        '''
+
+        cursor = connection.cursor()
+        for name, value in self.pragmas:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+# Instance of the profile (assigned to the application in create_app):
+sqlite_profile = SQLiteProfile()
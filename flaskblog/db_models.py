@@ -5,6 +5,7 @@
 from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime, timedelta
+from sqlalchemy import event, DDL
 import jwt
 '''
 (Legend)
@@ -12,12 +13,15 @@ From:
 # flask: A micro web framework provides libraries to build web applications.
 # flask_login: A Flask extension that provides user session management.
 # datetime: A library for date and time functions.
+# sqlalchemy: A library for working with databases.
 
 Import:
 # current_app: A function providing access to a running application.
 # UserMixin: Class providing default implementations for methods that Flask-Login expects user objects to have.
 # datetime: Module for date and time objects.
 # timedelta: Module for duration (difference between two dates, or times).
+# event: A module for listening to events of the database tables (here the creation of the post table).
+# DDL: A class for a plain SQL statement changing the schema (here the search index).
 # jwt: Library for encode and decode JSON Web Tokens.
 '''
 
@@ -193,9 +197,14 @@ class Post(db.Model):
     # id: Post ID (table primary key, set by SQLAlchemy).
     # title: Title of the post (set by user).
     # date_posted: Date posted (current day, set by SQLAlchemy).
-    # content: Content of the post (set by user).
+    # updated_at: Date and time of the last change (set by SQLAlchemy, changed in routes, used for Last-Modified).
+    # content: Content of the post (set by user, loaded only when it is used - e.g. on the post page).
+    # excerpt: The beginning of the content displayed on the pages with a list of posts (set in routes).
+    # word_count: Number of words of the content (set in routes).
     # author_id: Author ID = User ID in User database table (foreign key, set in routes).
-    # language: Language of the post (estimated on local environment, set in routes)
+    # language: Language of the post (detected from the text, or the page language, set in routes)
+    # version: Version of the post (increased with each edit, part of the key of cached fragments, set in routes).
+    # translations: Column to link to the translations table (stored translations of the post).
 
     Legend:
     # db.Column: Class represents a column in a database table.
@@ -206,10 +215,22 @@ class Post(db.Model):
     # primary_key=True: Setting the primary key (row ID).
     # nullable=False: Setting that the field value cannot be empty.
     # default=datetime.utcnow: Settings of default value (here for local post creation time).
+    # db.deferred(): The column is not loaded with the post, but on the first access (or with undefer()).
+    # default='', default=0: Settings of default value (here for the excerpt and number of words).
+    # default=1: Settings of default value (here for the first version of the post).
     # db.ForeignKey('user.id'): Foreign key setting (here according to the user Id column of the User database table)
-
+    # db.relationship: Setting up a relationship with another table.
+    # cascade='all, delete-orphan': Settings for deleting the stored translations together with the post.
+    # db.Index(): Index of the table (the same names are created in existing databases by the migrations).
+    # ix_post_date_posted: Index for sorting posts by date (home page).
+    # ix_post_author_id_date_posted: Index for posts of one author sorted by date (user page).
     '''
 
+    __table_args__ = (
+        db.Index('ix_post_date_posted', 'date_posted'),
+        db.Index('ix_post_author_id_date_posted', 'author_id', 'date_posted'),
+    )
+
     id = db.Column(
         db.Integer,
         primary_key=True
@@ -226,9 +247,27 @@ class Post(db.Model):
         default=datetime.utcnow
     )
 
-    content = db.Column(
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+
+    content = db.deferred(db.Column(
         db.Text,
         nullable=False
+    ))
+
+    excerpt = db.Column(
+        db.Text,
+        nullable=False,
+        default=''
+    )
+
+    word_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
     )
 
     author_id = db.Column(
@@ -242,6 +281,19 @@ class Post(db.Model):
         nullable=False
     )
 
+    version = db.Column(
+        db.Integer,
+        nullable=False,
+        default=1
+    )
+
+    translations = db.relationship(
+        'Translation',
+        backref='post',
+        lazy=True,
+        cascade='all, delete-orphan'
+    )
+
 
     def __repr__(self):
         '''
@@ -253,3 +305,247 @@ class Post(db.Model):
         return f"Post('{self.title}', '{self.date_posted}')"
 
 
+# Full-text search index of posts (created together with a new post table by db.create_all(),
+# in an existing database by the migration 0005 - the statements are the same):
+SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5("
+    "title, content, content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+
+    "CREATE TRIGGER IF NOT EXISTS post_search_insert AFTER INSERT ON post BEGIN "
+    "INSERT INTO post_search (rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+
+    "CREATE TRIGGER IF NOT EXISTS post_search_delete AFTER DELETE ON post BEGIN "
+    "INSERT INTO post_search (post_search, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "END",
+
+    "CREATE TRIGGER IF NOT EXISTS post_search_update AFTER UPDATE OF title, content ON post BEGIN "
+    "INSERT INTO post_search (post_search, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO post_search (rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END"
+]
+'''
+(Legend)
+# post_search: A virtual FTS5 table with the index of the post title and content (the text is read from post).
+# post_search_insert, post_search_delete, post_search_update: Triggers keeping the index up to date.
+# event.listen(Post.__table__, 'after_create', ...): The statements run right after the post table is created.
+# execute_if(dialect='sqlite'): FTS5 is a part of SQLite (another database has no search index).
+'''
+
+for statement in SEARCH_INDEX:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+
+class Translation(db.Model):
+    '''
+    A class for defining columns in the translation database table (stored translations of posts).
+
+    :param db.Model: Base class for all database models.
+
+    Columns defined by this class:
+    # id: Translation ID (table primary key, set by SQLAlchemy).
+    # post_id: Post ID = Post ID in Post database table (foreign key, set in utils).
+    # language: Language of the translation (set in utils).
+    # source_hash: Hash of the translated title and content (set in utils).
+    # title: Translated title of the post (set in utils).
+    # content: Translated content of the post (set in utils).
+    # status: State of the translation - 'pending', 'done' or 'failed' (set in utils).
+    # date_requested: Date and time when the translation was requested (set by SQLAlchemy).
+
+    Legend:
+    # db.Column: Class represents a column in a database table.
+    # db.Integer: Specifying contents for integers.
+    # db.String(#): Specifying contents for string (# represents max length).
+    # db.Text: Specifying contents for a longer string.
+    # db.DateTime: Specifying contents for date and time.
+    # primary_key=True: Setting the primary key (row ID).
+    # nullable=False: Setting that the field value cannot be empty.
+    # default='': Settings of default value (here an empty text until the translation is done).
+    # default='done': Settings of default value (here for translations made during the request).
+    # default=datetime.utcnow: Settings of default value (here for local request time).
+    # db.ForeignKey('post.id'): Foreign key setting (here according to the post Id column of the Post database table)
+    # db.UniqueConstraint(): Setting that the combination of values must be unique within the table.
+    '''
+
+    __table_args__ = (
+        db.UniqueConstraint('post_id', 'language', 'source_hash'),
+    )
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True
+    )
+
+    post_id = db.Column(
+        db.Integer,
+        db.ForeignKey('post.id'),
+        nullable=False
+    )
+
+    language = db.Column(
+        db.String(10),
+        nullable=False
+    )
+
+    source_hash = db.Column(
+        db.String(64),
+        nullable=False
+    )
+
+    title = db.Column(
+        db.Text,
+        nullable=False,
+        default=''
+    )
+
+    content = db.Column(
+        db.Text,
+        nullable=False,
+        default=''
+    )
+
+    status = db.Column(
+        db.String(10),
+        nullable=False,
+        default='done'
+    )
+
+    date_requested = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+
+
+    def __repr__(self):
+        '''
+        Overriding of the Python dunder methods.
+
+        :return: A machine-readable representation of the instance.
+        '''
+
+        return f"Translation('{self.post_id}', '{self.language}', '{self.source_hash[:8]}', '{self.status}')"
+
+
+class TranslationSegment(db.Model):
+    '''
+    A class for defining columns in the translation segment database table (stored translations of paragraphs).
+
+    Posts are translated paragraph by paragraph, so after an edit of a post only changed paragraphs are translated
+    and the rest of the translation is assembled from this table (shared by all posts).
+
+    :param db.Model: Base class for all database models.
+
+    Columns defined by this class:
+    # id: Segment ID (table primary key, set by SQLAlchemy).
+    # language: Language of the translation (set in utils).
+    # source_hash: Hash of the original paragraph (set in utils).
+    # text: Translated paragraph (set in utils).
+
+    Legend:
+    # db.Column: Class represents a column in a database table.
+    # db.Integer: Specifying contents for integers.
+    # db.String(#): Specifying contents for string (# represents max length).
+    # db.Text: Specifying contents for a longer string.
+    # primary_key=True: Setting the primary key (row ID).
+    # nullable=False: Setting that the field value cannot be empty.
+    # db.UniqueConstraint(): Setting that the combination of values must be unique within the table.
+    '''
+
+    __table_args__ = (
+        db.UniqueConstraint('language', 'source_hash'),
+    )
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True
+    )
+
+    language = db.Column(
+        db.String(10),
+        nullable=False
+    )
+
+    source_hash = db.Column(
+        db.String(64),
+        nullable=False
+    )
+
+    text = db.Column(
+        db.Text,
+        nullable=False
+    )
+
+
+    def __repr__(self):
+        '''
+        Overriding of the Python dunder methods.
+
+        :return: A machine-readable representation of the instance.
+        '''
+
+        return f"TranslationSegment('{self.language}', '{self.source_hash[:8]}')"
+
+
+class Counter(db.Model):
+    '''
+    A class for defining columns in the counter database table (maintained counts, e.g. number of posts).
+
+    The counts are changed together with the counted rows (in the same commit), so the pages with a list of posts
+    do not count all posts (SELECT COUNT) on every request.
+
+    :param db.Model: Base class for all database models.
+
+    Columns defined by this class:
+    # id: Counter ID (table primary key, set by SQLAlchemy).
+    # name: Name of the counter, e.g. 'posts' or 'posts_author_1', or of the feed version, e.g. 'feed' (set in utils).
+    # value: Current count, or the version of the feed (set in utils).
+    # date_updated: Date and time of the last change (set by SQLAlchemy).
+
+    Legend:
+    # db.Column: Class represents a column in a database table.
+    # db.Integer: Specifying contents for integers.
+    # db.String(#): Specifying contents for string (# represents max length).
+    # db.DateTime: Specifying contents for date and time.
+    # primary_key=True: Setting the primary key (row ID).
+    # unique=True: Setting that the field value must be unique within the column.
+    # nullable=False: Setting that the field value cannot be empty.
+    # default=0: Settings of default value (here an empty count).
+    # default=datetime.utcnow, onupdate=datetime.utcnow: Settings of the time of creation and of each change.
+    '''
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True
+    )
+
+    name = db.Column(
+        db.String(50),
+        unique=True,
+        nullable=False
+    )
+
+    value = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0
+    )
+
+    date_updated = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+
+    def __repr__(self):
+        '''
+        Overriding of the Python dunder methods.
+
+        :return: A machine-readable representation of the instance.
+        '''
+
+        return f"Counter('{self.name}', '{self.value}')"
@@ -0,0 +1,473 @@
+# FILE FOR THE STATIC EXPORT OF THE BLOG #
+# This file is used to render the public pages of the blog into static HTML files (once for each language),
+# which a web server (nginx) or a CDN serves without the application (flask --app run export).
+
+
+# External extensions:
+from flask import current_app, make_response, url_for
+from flask.cli import with_appcontext
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit, unquote, parse_qsl
+import click
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# flask.cli: A module of Flask for commands of the "flask" command line.
+# concurrent.futures: A module for running functions in a pool of processes.
+# urllib.parse: A module for working with URL addresses.
+
+Import:
+# current_app: A function providing access to a running application.
+# make_response: A function for creating a response object from the result of a view (here an error page).
+# url_for: A function for creating the address of a page (here the addresses the export starts with).
+# with_appcontext: A decorator running the command with the application context.
+# ProcessPoolExecutor: A pool of processes rendering the pages (each process has its own application).
+# wait, FIRST_COMPLETED: Waiting for the first rendered page (its links are added to the export).
+# urlsplit: A function splitting the address into the path and the URL parameters.
+# unquote: A function decoding the path (the file name is the decoded path, as the web server sees it).
+# parse_qsl: A function reading the URL parameters.
+# click: A library for command line interfaces (used by Flask).
+# hashlib: A module providing secure hash algorithms (here a changed page is recognized).
+# html: A module for HTML characters (here the links of a page).
+# json: Built-in module for transferring data as text (here the manifest of the export).
+# os: A module for working with files and folders.
+# re: A module for regular expressions (here the links of a page).
+# shutil: A module for copying files (here the static folder).
+'''
+
+
+# Internal extensions:
+from flaskblog import db, locales, create_app
+from flaskblog.db_models import Post, User
+from flaskblog.errors.handlers import error_403, error_404, error_500
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.errors.handlers: The handlers.py file in the errors folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# locales: A list of all configured languages (each one is exported).
+# create_app: A function for creating the application (in each process of the pool).
+# Post: A class with defined columns for the posts database table.
+# User: A class with defined columns for the users database table.
+# error_403, error_404, error_500: Functions creating the error pages.
+'''
+
+
+# Export settings:
+EXPORT_ENDPOINTS = {'main.home', 'main.about', 'posts.post', 'posts.user_posts'}
+EXPORT_ARGS = {'page', 'older', 'newer'}
+ERROR_PAGES = {403: error_403, 404: error_404, 500: error_500}
+MANIFEST = 'manifest.json'
+LINK_PATTERN = re.compile(r'''href=["']?([^"'\s>]+)''')
+'''
+(Legend)
+# EXPORT_ENDPOINTS: Pages that are exported (other links, e.g. login or search, are left to the application).
+# EXPORT_ARGS: URL parameters of the exported pages (paging) - translated pages are left to the application.
+# ERROR_PAGES: Error pages exported for each language (by the error code).
+# MANIFEST: Name of the file with the exported pages (used for the next, incremental export).
+# LINK_PATTERN: A regular expression for the links of a page (the export follows them).
+'''
+
+
+def page_file(language, url):
+    '''
+    A function for the file name of an exported page.
+
+    :param language: The page language (e.g. 'en').
+    :param url: The address of the page (e.g. '/post/35' or '/?older=20230909101500123456-35').
+    :return: The file name relative to the export folder (e.g. 'en/post/35/index.html').
+
+    Legend:
+    # unquote(path): The decoded path (e.g. '/user/Jan Novák'), as the web server looks for the file.
+    # index.html: The page without URL parameters.
+    # index.<parameters>.html: The page with URL parameters (e.g. 'index.older=20230909101500123456-35.html').
+    # ValueError: An address that cannot be a file name (e.g. '..' in the path).
+    '''
+
+    parts = urlsplit(url)
+    segments = [segment for segment in unquote(parts.path).split('/') if segment]
+    if any(segment in ('.', '..') or os.sep in segment for segment in segments) or '/' in parts.query:
+        raise ValueError(f"The address cannot be exported: {url}")
+
+    name = f'index.{parts.query}.html' if parts.query else 'index.html'
+    return '/'.join([language] + segments + [name])
+
+
+def find_links(body, adapter):
+    '''
+    A function for finding the links of a page to other exported pages.
+
+    :param body: The rendered page (text).
+    :param adapter: The URL map of the application bound to the export (finds the page of an address).
+    :return: A set of addresses (path and URL parameters, e.g. '/post/35').
+
+    Legend:
+    # html.unescape(): The address without HTML characters (e.g. &amp; between URL parameters).
+    # scheme, netloc: Links to other websites are skipped.
+    # adapter.match(): The endpoint of the address (only EXPORT_ENDPOINTS are followed).
+    # parse_qsl(): Only addresses with the URL parameters of paging are followed (EXPORT_ARGS).
+    '''
+
+    links = set()
+    for href in LINK_PATTERN.findall(body):
+        parts = urlsplit(html.unescape(href))
+        if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+            continue
+        try:
+            endpoint, _ = adapter.match(parts.path, method='GET')
+        except Exception:
+            continue
+        if endpoint in EXPORT_ENDPOINTS and all(name in EXPORT_ARGS for name, _ in parse_qsl(parts.query)):
+            links.add(f'{parts.path}?{parts.query}' if parts.query else parts.path)
+    return links
+
+
+def write_file(path, body):
+    '''
+    A function for writing an exported file (the web server never reads a half written file).
+
+    :param path: The file name.
+    :param body: The content (bytes).
+
+    Legend:
+    # os.makedirs(): Creating the folders of the file.
+    # os.replace(): Replacing the old file by the finished temporary file at once.
+    '''
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(body)
+    os.replace(temporary, path)
+
+
+# The application of a process of the pool (created by init_worker):
+worker = {}
+
+
+def init_worker(settings):
+    '''
+    A function for creating the application in a process of the pool.
+
+    :param settings: Configuration of the exporting application (database, cache off).
+
+    Legend:
+    # create_app(settings=settings): Each process has its own application and database connections
+    # (the settings are applied before the application is initialised - no tables or migrations are checked).
+    # test_client(use_cookies=False): Pages are rendered for an anonymous reader without a session.
+    # url_map.bind(): The URL map for finding the links of a page.
+    '''
+
+    app = create_app(settings=settings)
+    worker['app'] = app
+    worker['client'] = app.test_client(use_cookies=False)
+    worker['adapter'] = app.url_map.bind('localhost')
+
+
+def export_page(folder, language, url, etag, sha1):
+    '''
+    A function for rendering and writing one page (runs in a process of the pool).
+
+    :param folder: The export folder.
+    :param language: The page language.
+    :param url: The address of the page.
+    :param etag: The ETag of the exported page (None if it is not exported yet).
+    :param sha1: The hash of the exported page (None if it is not exported yet).
+    :return: A dictionary with the result (status, file, etag, sha1, links, written).
+
+    Legend:
+    # page_file(): An address that cannot be a file name is not exported (left to the application).
+    # Accept-Language: The page language of the request (an anonymous reader without a selected language).
+    # If-None-Match: The page is not rendered if its data did not change (304 - the exported file is kept).
+    # status != 200: The page no longer exists (e.g. a deleted post) or redirects (its file is removed).
+    # sha1 != result['sha1']: Only a changed page is written (unchanged files keep their date for the CDN).
+    '''
+
+    try:
+        file = page_file(language, url)
+    except ValueError:
+        return {'status': None}
+
+    headers = {'Accept-Language': language}
+    if etag:
+        headers['If-None-Match'] = f'"{etag}"'
+    response = worker['client'].get(url, headers=headers)
+
+    result = {'status': response.status_code}
+    if response.status_code != 200:
+        return result
+
+    body = response.get_data()
+    result.update(
+        file=file,
+        etag=response.get_etag()[0],
+        sha1=hashlib.sha1(body).hexdigest(),
+        links=sorted(find_links(body.decode(), worker['adapter'])),
+        written=False
+    )
+    if sha1 != result['sha1'] or not os.path.exists(os.path.join(folder, result['file'])):
+        write_file(os.path.join(folder, result['file']), body)
+        result['written'] = True
+    return result
+
+
+def export_error(folder, language, code):
+    '''
+    A function for rendering and writing an error page (runs in a process of the pool).
+
+    :param folder: The export folder.
+    :param language: The page language.
+    :param code: The error code (403, 404, 500).
+    :return: True if the file was written (the page changed).
+
+    Legend:
+    # test_request_context(): A request of an anonymous reader with the page language.
+    # ERROR_PAGES[code](None): The error page created by the function of errors/handlers.py.
+    # language/errors/<code>.html: The file of the error page (e.g. 'en/errors/404.html').
+    '''
+
+    app = worker['app']
+    with app.test_request_context('/', headers={'Accept-Language': language}):
+        body = make_response(ERROR_PAGES[code](None)).get_data()
+
+    path = os.path.join(folder, language, 'errors', f'{code}.html')
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            if file.read() == body:
+                return False
+    write_file(path, body)
+    return True
+
+
+def copy_changed(source, target):
+    '''
+    A function for copying a static file only if it changed (size or date of the change).
+
+    :param source: The file in the static folder.
+    :param target: The file in the export folder.
+    :return: The target file.
+    '''
+
+    if os.path.exists(target):
+        old, new = os.stat(target), os.stat(source)
+        if old.st_size == new.st_size and int(old.st_mtime) == int(new.st_mtime):
+            return target
+    return shutil.copy2(source, target)
+
+
+class StaticExporter:
+    '''
+    A class for the static export of the blog (home pages, posts, user posts, about, error pages).
+
+    The pages are rendered by the application itself (an anonymous reader, once for each language) in a pool
+    of processes. The export starts with the home page, the about page, each post and each user, and follows
+    the links of the rendered pages (paging). Each page is written as <language>/<path>/index.html, so the URL
+    addresses stay the same as in the application, and the web server chooses the language folder.
+
+    The next export is incremental: the manifest keeps the ETag of each page, and a page whose data did not
+    change is answered by 304 without rendering (the links are taken from the manifest). Pages that no longer
+    exist are removed.
+
+    Attributes:
+    # folder: The export folder (from the configuration).
+    # workers: Number of processes of the pool (from the configuration, None = number of processors).
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the exporter.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.folder = None
+        self.workers = None
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the exporter to the application.
+
+        :param app: The application.
+
+        Legend:
+        # EXPORT_FOLDER: The folder of the exported pages.
+        # EXPORT_WORKERS: Number of processes rendering the pages.
+        # app.extensions: A dictionary of the application extensions.
+        # app.cli.add_command(): Registering the "flask export" command.
+        '''
+
+        self.folder = app.config['EXPORT_FOLDER']
+        self.workers = app.config['EXPORT_WORKERS']
+        app.extensions['exporter'] = self
+        app.cli.add_command(export_command)
+
+
+    def seeds(self):
+        '''
+        Method for getting the addresses the export starts with.
+
+        :return: List of addresses (home page, about page, each post, each user).
+
+        Legend:
+        # test_request_context(): url_for() needs a request.
+        # Post.id, User.username: Only the columns needed for the addresses are read.
+        '''
+
+        with current_app.test_request_context():
+            urls = [url_for('main.home'), url_for('main.about')]
+            urls += [url_for('posts.post', post_id=post_id) for post_id, in db.session.query(Post.id)]
+            urls += [url_for('posts.user_posts', username=username) for username, in db.session.query(User.username)]
+        return urls
+
+
+    def load_manifest(self, folder):
+        '''
+        Method for loading the manifest of the previous export.
+
+        :param folder: The export folder.
+        :return: A dictionary of exported pages by language and address (empty if there is no manifest).
+        '''
+
+        try:
+            with open(os.path.join(folder, MANIFEST)) as file:
+                return json.load(file)['pages']
+        except (OSError, ValueError, KeyError):
+            return {}
+
+
+    def export(self, folder=None, workers=None, full=False):
+        '''
+        Method for exporting the blog (pages, error pages and the static folder).
+
+        :param folder: The export folder (EXPORT_FOLDER if not given).
+        :param workers: Number of processes rendering the pages (EXPORT_WORKERS if not given).
+        :param full: All pages are rendered (the ETags of the manifest are not used).
+        :return: A dictionary with the statistics (rendered, unchanged, written, removed pages).
+
+        Legend:
+        Pool of processes:
+        # settings: The database of this application, the response cache off (pages are always rendered).
+        # init_worker(): Creating the application in each process.
+
+        Pages:
+        # schedule(): Adding a page to the export (each address once for each language).
+        # etag: Sent only if the exported file exists (otherwise the page must be rendered).
+        # wait(FIRST_COMPLETED): The links of each rendered page are added as soon as it is done.
+        # status 304: The page did not change (the record of the manifest is kept).
+
+        Removed pages:
+        # old - pages: Pages of the previous export that were not found now (their files are removed).
+
+        Error pages, static folder, manifest:
+        # export_error(): Each error page for each language.
+        # shutil.copytree(): Copying the static folder (only changed files).
+        # write_file(MANIFEST): The manifest for the next export.
+        '''
+
+        folder = os.path.abspath(folder or self.folder)
+        languages = [locale.language for locale in locales]
+        old = self.load_manifest(folder)
+        pages = {language: {} for language in languages}
+        stats = {'rendered': 0, 'unchanged': 0, 'written': 0, 'removed': 0}
+
+        # Pool of processes:
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': current_app.config['SQLALCHEMY_DATABASE_URI'],
+            'CACHE_ENABLED': False,
+            'CREATE_TABLES_ON_START': False,
+            'MIGRATE_ON_START': False
+        }
+        with ProcessPoolExecutor(workers or self.workers, initializer=init_worker, initargs=(settings,)) as pool:
+
+            # Pages:
+            running, seen = {}, {language: set() for language in languages}
+
+            def schedule(language, url):
+                if url in seen[language]:
+                    return
+                seen[language].add(url)
+                record = old.get(language, {}).get(url, {})
+                exported = record and os.path.exists(os.path.join(folder, record['file']))
+                etag = record.get('etag') if exported and not full else None
+                future = pool.submit(export_page, folder, language, url, etag, record.get('sha1'))
+                running[future] = (language, url)
+
+            for language in languages:
+                for url in self.seeds():
+                    schedule(language, url)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    language, url = running.pop(future)
+                    result = future.result()
+                    if result['status'] == 304:
+                        record = old[language][url]
+                        stats['unchanged'] += 1
+                    elif result['status'] == 200:
+                        record = {key: result[key] for key in ('file', 'etag', 'sha1', 'links')}
+                        stats['rendered'] += 1
+                        stats['written'] += result['written']
+                    else:
+                        continue
+                    pages[language][url] = record
+                    for link in record['links']:
+                        schedule(language, link)
+
+            # Removed pages:
+            for language, records in old.items():
+                for url, record in records.items():
+                    if url not in pages.get(language, {}):
+                        try:
+                            os.remove(os.path.join(folder, record['file']))
+                        except OSError:
+                            pass
+                        stats['removed'] += 1
+
+            # Error pages:
+            errors = [pool.submit(export_error, folder, language, code) for language in languages for code in ERROR_PAGES]
+            stats['written'] += sum(future.result() for future in errors)
+
+        # Static folder:
+        shutil.copytree(current_app.static_folder, os.path.join(folder, 'static'),
+                        dirs_exist_ok=True, copy_function=copy_changed)
+
+        # Manifest:
+        write_file(os.path.join(folder, MANIFEST), json.dumps({'pages': pages}, indent=1).encode())
+        return stats
+
+
+# Instance of the exporter (assigned to the application in create_app):
+exporter = StaticExporter()
+
+
+@click.command('export')
+@click.option('--folder', default=None, help="The export folder (EXPORT_FOLDER by default).")
+@click.option('--workers', default=None, type=int, help="Number of processes rendering the pages.")
+@click.option('--full', is_flag=True, help="Render all pages (not only the changed ones).")
+@with_appcontext
+def export_command(folder, workers, full):
+    '''
+    Command for the static export of the blog (flask --app run export).
+    '''
+
+    stats = exporter.export(folder, workers, full)
+    click.echo(
+        f"Rendered {stats['rendered']}, unchanged {stats['unchanged']}, "
+        f"written {stats['written']}, removed {stats['removed']}."
+    )
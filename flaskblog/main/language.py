@@ -0,0 +1,196 @@
+# FILE FOR LANGUAGE DETECTION OF POSTS #
+# This file is used to define a local language detector (character n-grams, no network access).
+
+
+# External extensions:
+from collections import Counter
+import json
+import os
+import re
+'''
+(Legend)
+From:
+# collections: A module with specialized container datatypes.
+
+Import:
+# Counter: A dictionary for counting occurrences (here of n-grams in a text).
+# json: Built-in module for loading the language profiles.
+# os: A module for working with file paths.
+# re: A module for regular expressions (here splitting a text into words).
+'''
+
+
+# Internal extensions:
+from flaskblog import locales
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+
+Import:
+# locales: A list of all configured languages.
+'''
+
+
+# Detection settings:
+PROFILES_PATH = os.path.join(os.path.dirname(__file__), 'language_profiles.json')
+PROFILE_SIZE = 300
+SAMPLE_LIMIT = 3000
+MIN_LETTERS = 20
+MIN_MARGIN = 0.03
+WORD_PATTERN = re.compile(r'[^\W\d_]+', re.UNICODE)
+'''
+(Legend)
+# PROFILES_PATH: A file with the profiles of the languages (the most frequent n-grams of each language).
+# PROFILE_SIZE: Number of n-grams in one profile.
+# SAMPLE_LIMIT: Maximum number of characters used for detection (long posts are not read whole).
+# MIN_LETTERS: Shorter texts are not detected (the result would be a guess).
+# MIN_MARGIN: Minimal relative difference between the best and the second language (otherwise undecided).
+# WORD_PATTERN: A regular expression for words (digits and punctuation are skipped).
+'''
+
+
+def ngrams(text):
+    '''
+    A function for counting character n-grams of a text (1 to 3 characters, words padded with spaces).
+
+    :param text: The text.
+    :return: Counter of n-grams.
+
+    Legend:
+    # WORD_PATTERN.findall(): Words of the text (lower case).
+    # f' {word} ': Spaces mark the beginning and the end of the word (e.g. " th" or "ng ").
+    '''
+
+    counts = Counter()
+    for word in WORD_PATTERN.findall(text.lower()):
+        padded = f' {word} '
+        for size in (1, 2, 3):
+            for start in range(len(padded) - size + 1):
+                gram = padded[start:start + size]
+                if gram != ' ':
+                    counts[gram] += 1
+
+    return counts
+
+
+def build_profile(text, size=PROFILE_SIZE):
+    '''
+    A function for creating a profile of a text (used for the language profiles and for detected texts).
+
+    :param text: The text (for a language profile a longer sample text of the language).
+    :param size: Number of n-grams in the profile.
+    :return: A dictionary of n-gram ranks (0 = the most frequent).
+
+    Legend:
+    # most_common(): The most frequent n-grams (ordered by frequency).
+    '''
+
+    return {gram: rank for rank, (gram, count) in enumerate(ngrams(text).most_common(size))}
+
+
+class LanguageDetector:
+    '''
+    A class for the language detector (profiles are loaded once and shared by all requests).
+
+    The profile of the text is compared with the profile of each language ("out-of-place" distance):
+    the distance grows with the difference of n-gram ranks, and the language with the smallest distance wins.
+
+    Attributes:
+    # profiles: A dictionary of language profiles by language ({"en": {" th": 0, ...}, ...}).
+    '''
+
+    def __init__(self, path=PROFILES_PATH):
+        '''
+        Method for creating the detector (the profiles are loaded from the file).
+
+        :param path: Path to the JSON file with the profiles (lists of n-grams ordered by frequency).
+        '''
+
+        with open(path, encoding='utf-8') as profiles_file:
+            self.profiles = {
+                language: {gram: rank for rank, gram in enumerate(grams)}
+                for language, grams in json.load(profiles_file).items()
+            }
+
+
+    def distances(self, text, languages=None):
+        '''
+        Method for computing the distance of the text from each language.
+
+        :param text: The text.
+        :param languages: Languages taken into account (all profiles if not set).
+        :return: A dictionary of distances by language (0 = identical profile, 1 = nothing in common).
+
+        Legend:
+        # text[:SAMPLE_LIMIT]: Only the beginning of long texts is used.
+        # build_profile(): A function for creating a profile of a text.
+        # PROFILE_SIZE: The penalty for an n-gram missing in the language profile.
+        '''
+
+        profile = build_profile(text[:SAMPLE_LIMIT])
+        if not profile:
+            return {}
+
+        distances = {}
+        for language, language_profile in self.profiles.items():
+            if languages is not None and language not in languages:
+                continue
+            distance = sum(
+                min(abs(rank - language_profile[gram]), PROFILE_SIZE) if gram in language_profile else PROFILE_SIZE
+                for gram, rank in profile.items()
+            )
+            distances[language] = distance / (len(profile) * PROFILE_SIZE)
+
+        return distances
+
+
+    def detect(self, text, languages=None):
+        '''
+        Method for detecting the language of a text.
+
+        :param text: The text.
+        :param languages: Languages taken into account (all profiles if not set).
+        :return: The detected language, or None if the text is too short or the result is not clear.
+
+        Legend:
+        # MIN_LETTERS: Shorter texts are not detected.
+        # self.distances(): Distances of the text from each language.
+        # MIN_MARGIN: The best language must be clearly closer than the second one.
+        '''
+
+        sample = text[:SAMPLE_LIMIT]
+        if sum(len(word) for word in WORD_PATTERN.findall(sample)) < MIN_LETTERS:
+            return None
+
+        ranking = sorted(self.distances(sample, languages).items(), key=lambda item: item[1])
+        if not ranking:
+            return None
+        if len(ranking) > 1 and ranking[1][1] - ranking[0][1] < MIN_MARGIN * ranking[1][1]:
+            return None
+
+        return ranking[0][0]
+
+
+# Instance of the detector (shared by all requests):
+language_detector = LanguageDetector()
+
+
+def detect_language(title, content, default=None):
+    '''
+    A function for detecting the language of a post (among the configured languages).
+
+    :param title: Title of the post.
+    :param content: Content of the post.
+    :param default: The language returned if the language cannot be detected (e.g. the page language).
+    :return: The detected language (or the default one).
+
+    Legend:
+    # locales: A list of all configured languages (only these are detected).
+    # language_detector.detect(): Method for detecting the language of a text.
+    '''
+
+    return language_detector.detect(
+        title + '\n' + content,
+        [locale.language for locale in locales]
+    ) or default
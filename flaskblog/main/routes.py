@@ -3,13 +3,17 @@
 
 
 # External extensions:
-from flask import Blueprint, render_template, request, redirect, url_for
-from googletrans import Translator
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, abort
+from flask_login import login_required
+from flask_babel import lazy_gettext
+from sqlalchemy.orm import undefer
 '''
 (Legend)
 From:
 # flask: A micro web framework provides libraries to build web applications.
-# googletrans: A library that implemented Google Translate API.
+# flask_login: A Flask extension that provides user session management.
+# flask_babel: A Flask extension that provides internationalization and localization.
+# sqlalchemy.orm: A module of SQLAlchemy for working with database objects.
 
 Import:
 # Blueprint: A class providing structuring of the application.
@@ -17,29 +21,65 @@ Import:
 # request: A function to process data sent from the client to the server.
 # redirect: A function to redirect users to a specific URL.
 # url_for: A function to generate a URL to a given endpoint.
-# Translator: A class providing translations from Google Translate
+# flash: A function to display an informational messages.
+# session: A dictionary stored in the user's cookie (here for the selected language).
+# jsonify: A function for creating a JSON response.
+# current_app: A function providing access to a running application (here its extensions).
+# abort: A function to prematurely abort a request with an error code.
+# login_required: A function to verify if the user is login.
+# lazy_gettext: A function to mark text for lazy translation (translation is delayed until needed).
+# undefer: Loading a deferred column together with the post (here the post content).
 '''
 
 
 # Internal extensions:
-from flaskblog import Locale, us, cz
+from flaskblog import get_locale, us, cz
 from flaskblog.db_models import User, Post
 from flaskblog.main.about_texts import texts, links
+from flaskblog.main.utils import get_translation, pending_translations, translate_posts
+from flaskblog.main.translator import TranslationUnavailable, TranslationPending
+from flaskblog.main.single_flight import single_flight
+from flaskblog.posts.utils import with_authors, paginate_posts, post_count, home_validators
+from flaskblog.cache import response_cache, fragment_cache, conditional, POSTS_TAG, post_tags, user_tag
+from flaskblog.streaming import template_streaming
 '''
 (Legend)
 From:
 # flaskblog: The __init__.py file in the root directory.
 # flaskblog.db_models: The db_models.py file in the root directory.
 # flaskblog.main.about_texts: The about_texts.py file in the main folder in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+# flaskblog.main.translator: The translator.py file in the main folder in the root directory.
+# flaskblog.main.single_flight: The single_flight.py file in the main folder in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+# flaskblog.cache: The cache.py file in the root directory.
+# flaskblog.streaming: The streaming.py file in the root directory.
 
 Import:
-# Locale: A class providing language settings.
+# get_locale: A function returning the page language of the current request.
 # us: An instance of the Locale class for the English language
 # cz: An instance of the Locale class for the Czech language
 # User: A class with defined columns for the users database table.
 # Post: A class with defined columns for the posts database table.
 # text: A list of texts for the about page.
 # links: A list of links for the about page.
+# get_translation: A function for getting the translation of a post (stored or from Google Translate).
+# pending_translations: A function for finding posts whose translation is being prepared.
+# translate_posts: A function for getting translations of all posts on a page (translated in batches).
+# TranslationUnavailable: An exception raised when the translation cannot be made.
+# TranslationPending: An exception raised when the translation is being made by another worker.
+# single_flight: The single-flight layer (one translator call shared by all concurrent requests of the process).
+# with_authors: A function for loading the authors of listed posts together with the posts.
+# paginate_posts: A function for reading one page of posts (keyset or page-number pagination).
+# post_count: A function for getting the number of posts from the maintained counter.
+# home_validators: A function for the ETag and Last-Modified of the home page.
+# response_cache: The cache of whole pages shared by all readers.
+# fragment_cache: The cache of page fragments (articles of posts) shared by all readers.
+# conditional: A decorator of a view answering conditional requests (304 Not Modified without rendering).
+# POSTS_TAG: Tag of all pages with a list of posts.
+# post_tags: A function for the tags of a page with a list of posts (posts and their authors).
+# user_tag: A function for the tag of pages displaying a user.
+# template_streaming: The streaming of long pages (sent in parts while they are rendered).
 '''
 
 
@@ -49,6 +89,8 @@ main = Blueprint('main', __name__)
 
 @main.route("/")
 @main.route("/home")
+@conditional(home_validators)
+@response_cache.cached
 def home():
     '''
     Route function for creating a home page.
@@ -59,49 +101,63 @@ def home():
     Decorator:
     # @main.route("/"): Defining the page address (by root directory).
     # @main.route("/home"): Defining the page address (by root directory).
+    # @conditional(home_validators): The page is not rendered if the reader has its current version (304).
+    # @response_cache.cached: The page is stored for all readers (the parts of the reader are filled in).
 
-    Create a variable with the page number:
+    Create a variable with the translation settings:
     # request.args.get(): A method to access the URL parameter value.
-    # 'page', 1, type=int: Page counter settings.
+    # 'translated', 0, type=int: Settings for displaying all posts on the page translated (1) or original (0).
 
     Posts retrieving:
     # Post.query: Query for the Post database table.
-    # .order_by(Post.date_posted.desc()): Sorting the result by date, descending.
-    # .paginate(page=page, per_page=5): Setting the number of posts per page.
+    # with_authors(): Loading the authors together with the posts (the page does not query each author separately).
+    # undefer(Post.content): The content is loaded only for the translated page (otherwise the excerpt is displayed).
+    # paginate_posts(): Reading one page sorted by date, descending (cursors newer/older, or page numbers).
+    # post_count: Number of all posts (from the maintained counter), read only for the page numbers ('pages' mode).
+
+    Cache tags:
+    # response_cache.tag(): The stored page is removed when posts are added or deleted, or a listed post is changed.
 
     Translation:
-    # Locale.post_to_translate[:]: The contents of the post_to_translate list of the Locale class attribute.
+    # translate_posts(): Translations of all posts on the page (missing ones are translated in batches).
 
     Page rendering:
-    # render_template(): A function for rendering of an html template (based on the Jinja2 engine).
+    # template_streaming.render(): The page is sent in parts while it is rendered (the head of the page at once).
     # 'main_home.html': Name of the html file (in the template directory).
     # posts=posts: Posts data.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
-    # translate=translate: The contents of the post_to_translate list of the Locale class attribute / None.
+    # language=get_locale().language: The current page language (selected for the user of the request).
+    # pending=pending_translations(): IDs of posts whose translation is being prepared.
+    # translated=translated: Settings for displaying the posts translated.
+    # translations=translations: A dictionary of translations by post ID.
     '''
 
-    # Create a variable with the page number:
-    page = request.args.get('page', 1, type=int)
+    # Create a variable with the translation settings:
+    translated = request.args.get('translated', 0, type=int)
 
     # Posts retrieving:
-    posts = Post.query\
-        .order_by(Post.date_posted.desc())\
-        .paginate(page=page, per_page=5)
+    query = with_authors(Post.query)
+    if translated:
+        query = query.options(undefer(Post.content))
+    posts = paginate_posts(query, post_count)
+
+    # Cache tags:
+    response_cache.tag(POSTS_TAG, *post_tags(posts.items))
 
     # Translation:
-    translate = Locale.post_to_translate[:]
-    if translate != [None]:
-        Locale.post_to_translate = [None]
+    translations = translate_posts(posts.items, get_locale().language) if translated else {}
 
     # Page rendering:
-    return render_template('main_home.html',
+    return template_streaming.render('main_home.html',
         posts=posts,
-        language=Locale.current.language,
-        translate=translate
+        language=get_locale().language,
+        pending=pending_translations(posts.items, get_locale().language),
+        translated=translated,
+        translations=translations
     )
 
 
 @main.route("/about")
+@response_cache.cached
 def about(admin_username="Sudip2708"):
     '''
     Route function for creating an about page.
@@ -113,17 +169,21 @@ def about(admin_username="Sudip2708"):
     Legend:
     Decorator:
     # @main.route("/about"): Defining the page address (by root directory).
+    # @response_cache.cached: The page is stored for all readers (the parts of the reader are filled in).
 
     User verification:
     # User.query: Query for the User database table.
     # filter_by(): Search parameters.
     # first_or_404(): Return the first value found or raise a 404 error.
 
+    Cache tags:
+    # response_cache.tag(): The stored page is removed when the user is changed.
+
     Page rendering:
     # render_template(): A function for rendering of an html template (based on the Jinja2 engine).
     # 'main_about.html': Name of the html file (in the template directory).
     # user=user: User data.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     # links=links: A list of links for the about page.
     # text=texts): A list of texts for the about page.
     '''
@@ -131,10 +191,13 @@ def about(admin_username="Sudip2708"):
     # User verification:
     user = User.query.filter_by(username=admin_username).first_or_404()
 
+    # Cache tags:
+    response_cache.tag(user_tag(user.id))
+
     # Page rendering::
     return render_template('main_about.html',
         user=user,
-        language=Locale.current.language,
+        language=get_locale().language,
         links=links,
         text=texts)
 
@@ -151,22 +214,26 @@ def change_language():
     # @main.route("/change_language"): Defining the page address (by root directory).
 
     Change page language:
-    # Locale.current: The Locale class attribute for the current language.
+    # get_locale(): A function returning the page language of the current request.
     # us: An instance of the Locale class for the English language
     # cz: An instance of the Locale class for the Czech language
+    # session['language']: The selected language (stored only for this user).
+    # session.permanent = True: The selection is kept after closing the browser.
 
     Redirecting to the previous page:
     # redirect(request.headers.get("Referer")): Redirecting (redirect) to previous page (request.headers.get("Referer")).
+    # url_for('main.home'): Home page (if the previous page is not known).
     '''
 
     # Changing page language:
-    if Locale.current == cz:
-        Locale.current = us
+    if get_locale() == cz:
+        session['language'] = us.language
     else:
-        Locale.current = cz
+        session['language'] = cz.language
+    session.permanent = True
 
     # Redirecting:
-    return redirect(request.headers.get("Referer"))
+    return redirect(request.headers.get("Referer") or url_for('main.home'))
 
 
 @main.route("/translate/<int:post_id>")
@@ -185,41 +252,72 @@ def translate(post_id):
     # Post.query: Query for the Post database table.
     # get_or_404(post_id): Return the value (based on post ID) or raise a 404 error.
 
-    Translator:
-    # Translator(): A class providing translations from Google Translate
-
     Translation:
-    # translator.translate(): Method of the Translator class for translation.
-    # dest=Locale.current.language: Translation language (according to the current page language).
-    # .text: Extracting the part with translated text.
-
-    Transfer of translation:
-    # Locale.post_to_translate: Pass the translation to the post_to_translate attribute of the Locale class.
+    # get_translation(): A function returning the stored translation (or translating the post and storing it).
+    # get_locale().language: Translation language (according to the current page language).
+    # TranslationPending: The translation is being prepared by another worker or the background threads.
+    # TranslationUnavailable: The translator is not available, the original post is displayed immediately.
+    # flash(): A function for display an informational messages.
+    # lazy_gettext(): A function to mark text for lazy translation (translation is delayed until needed).
+    # 'info', 'warning': Message categories.
 
     Redirecting:
     # redirect(url_for()): Redirecting (redirect) to the url (url_for).
     # 'posts.post', post_id=post.id: For post page ('posts.post') and post by ID (post_id=post.id).
+    # translated=1: The post page displays the stored translation (each request reads its own translation).
     '''
 
     # Post retrieving:
     post = Post.query.get_or_404(post_id)
 
-    # Translator:
-    translator = Translator()
+    # Translation:
+    try:
+        get_translation(post, get_locale().language)
+    except TranslationPending:
+        flash(lazy_gettext("The translation is being prepared, please try again in a moment."), 'info')
+        return redirect(url_for('posts.post', post_id=post.id))
+    except TranslationUnavailable:
+        flash(lazy_gettext("The translation is not available right now, please try again later."), 'warning')
+        return redirect(url_for('posts.post', post_id=post.id))
+
+    # Redirecting:
+    return redirect(url_for('posts.post', post_id=post.id, translated=1))
 
-    # Translations:
-    title_translation  = translator.translate(
-        post.title,
-        dest=Locale.current.language
-    ).text
 
-    content_translation  = translator.translate(
-        post.content,
-        dest=Locale.current.language
-    ).text
+@main.route("/cache_stats")
+@login_required
+def cache_stats():
+    '''
+    Route function for the statistics of the caches and of the shared translations (of this worker process).
 
-    # Transfer of translation:
-    Locale.post_to_translate = [post_id, title_translation, content_translation]
+    :return: JSON with the statistics.
 
-    # Redirecting:
-    return redirect(url_for('posts.post', post_id=post.id))
+    Legend:
+    Decorator:
+    # @main.route("/cache_stats"): Defining the page address (by root directory).
+    # @login_required: Permission for logged users only.
+
+    Access:
+    # CACHE_STATS_ENABLED: The statistics are internal (any reader can register), so they are off by default.
+    # current_app.debug: The statistics are always available in the debug mode.
+    # abort(404): The page does not exist for the readers.
+
+    Statistics:
+    # response_cache.stats(): Hits, misses, hit ratio, stored pages and their size in memory.
+    # fragment_cache.stats(): Hits, misses, hit ratio, stored fragments and their size in memory.
+    # extensions['compression'].stats(): Compressed and skipped responses, compression ratio, stored bodies.
+    # single_flight.stats(): Translator calls made, duplicate calls absorbed, and calls in progress.
+    # jsonify(): A function for creating a JSON response.
+    '''
+
+    # Access:
+    if not (current_app.config['CACHE_STATS_ENABLED'] or current_app.debug):
+        abort(404)
+
+    # Statistics:
+    return jsonify(
+        pages=response_cache.stats(),
+        fragments=fragment_cache.stats(),
+        compression=current_app.extensions['compression'].stats(),
+        translations=single_flight.stats()
+    )
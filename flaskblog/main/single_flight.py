@@ -0,0 +1,146 @@
+# FILE FOR DE-DUPLICATION OF CONCURRENT TRANSLATIONS #
+# This file is used to define a single-flight layer: one translation call is shared by all concurrent requests.
+
+
+# External extensions:
+import logging
+import threading
+'''
+(Legend)
+Import:
+# logging: A module for reporting events (here the number of shared calls).
+# threading: A module for running code in threads (here a lock and events for waiting requests).
+'''
+
+
+# Logger settings:
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    '''
+    A class for one call in progress (shared by the leading request and the waiting ones).
+
+    Attributes:
+    # done: An event set when the call is finished.
+    # result: The result of the call.
+    # error: The exception raised by the call (raised again in all waiting requests).
+    # waiters: Number of requests waiting for the result.
+    '''
+
+    def __init__(self):
+        '''
+        Method for creating the call in progress.
+        '''
+
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    '''
+    A class for the single-flight layer.
+
+    While a call with a given key is in progress (e.g. translation of a post into a language),
+    other requests with the same key do not call the translator again, but wait for the same result.
+    Duplicate calls absorbed in this way are counted (also those absorbed by other worker processes).
+
+    Attributes:
+    # flights: A dictionary of calls in progress by key.
+    # lock: A lock for the dictionary and the counters.
+    # leaders: Number of calls actually made.
+    # absorbed: Number of duplicate calls that were not made.
+    '''
+
+    def __init__(self):
+        '''
+        Method for creating the layer.
+        '''
+
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.absorbed = 0
+
+
+    def do(self, key, function):
+        '''
+        Method for calling the function only once for all concurrent requests with the same key.
+
+        :param key: Key of the call (e.g. post ID, language and hash of the post text).
+        :param function: The function to call (without parameters).
+        :return: The result of the function (the same for all waiting requests).
+
+        Legend:
+        # self.flights.get(key): The call in progress with the same key (None if there is none).
+        # flight.done.wait(): Waiting for the result of the leading request.
+        # flight.error: The exception of the call is raised in all waiting requests too.
+        # flight.done.set(): Waking up the waiting requests.
+        '''
+
+        # Leading or waiting request:
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = Flight()
+                self.leaders += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                self.absorbed += 1
+                leader = False
+
+        # (waiting request):
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        # (leading request):
+        try:
+            flight.result = function()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+            if flight.waiters:
+                logger.info("Call %s shared with %s waiting requests.", key, flight.waiters)
+
+        return flight.result
+
+
+    def absorb(self, key):
+        '''
+        Method for counting a duplicate call absorbed outside of this process (another worker is translating).
+
+        :param key: Key of the call.
+        '''
+
+        with self.lock:
+            self.absorbed += 1
+        logger.info("Call %s is in progress in another worker.", key)
+
+
+    def stats(self):
+        '''
+        Method for getting the counters of the layer.
+
+        :return: A dictionary with the number of calls made, absorbed and in progress.
+        '''
+
+        with self.lock:
+            return {
+                'calls': self.leaders,
+                'absorbed': self.absorbed,
+                'in_flight': len(self.flights)
+            }
+
+
+# Instance of the layer (shared by all requests of the process):
+single_flight = SingleFlight()
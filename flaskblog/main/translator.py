@@ -0,0 +1,479 @@
+# FILE FOR THE TRANSLATOR SERVICE #
+# This file is used to define a long-lived translator shared by all requests and background threads.
+
+
+# External extensions:
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import json
+import logging
+import os
+import re
+import threading
+import time
+'''
+(Legend)
+From:
+# abc: A module for abstract base classes.
+# concurrent.futures: A module for running functions in a pool of threads.
+
+Import:
+# ABC: A base class of abstract classes (a backend without translate() cannot be created).
+# abstractmethod: A decorator of a method that each backend must define.
+# ThreadPoolExecutor: A class for a pool of threads (used to limit the time of one call).
+# TimeoutError: An exception raised when the call has not finished in time.
+# json: Built-in module for loading the dictionary of the local backend.
+# logging: A module for reporting events (here the state of the circuit breaker).
+# os: A module for working with file paths.
+# re: A module for regular expressions (here splitting a text into words).
+# threading: A module for running code in threads (here a lock for the circuit breaker and the fake calls).
+# time: A module for time functions.
+'''
+
+
+# Logger settings:
+logger = logging.getLogger(__name__)
+
+
+class TranslationUnavailable(Exception):
+    '''
+    An exception raised when the translation cannot be made (upstream too slow, failing, or circuit open).
+
+    The callers return the stored or the original (untranslated) text instead.
+    '''
+
+
+class TranslationPending(Exception):
+    '''
+    An exception raised when the same translation is already being made by another worker (or a background thread).
+
+    The callers do not call the translator again and ask the reader to try again in a moment.
+    '''
+
+
+class TranslatorBackend(ABC):
+    '''
+    A base class for translation backends (selected by TRANSLATOR_BACKEND in the configuration).
+
+    Each backend is created once at the start of the application (from_config) and shared by all threads,
+    so it must be thread-safe and it should load everything it needs in advance.
+    Each backend must define translate() (the class cannot be created without it).
+    '''
+
+    @classmethod
+    def from_config(cls, config):
+        '''
+        Class method for creating the backend from the application configuration.
+
+        :param config: The application configuration (app.config).
+        :return: An instance of the backend.
+        '''
+
+        return cls()
+
+
+    @abstractmethod
+    def translate(self, text, language):
+        '''
+        Method for translating a text.
+
+        :param text: The text to translate.
+        :param language: The target language of the translation.
+        :return: Translated text.
+        '''
+
+
+class GoogleBackend(TranslatorBackend):
+    '''
+    A class for translations from Google Translate (needs network access).
+
+    One instance of the Translator class (and its HTTP client) is kept for the whole life of the application,
+    so the connections are reused instead of new TLS handshakes for every translation.
+
+    Attributes:
+    # translator: An instance of the Translator class.
+    '''
+
+    def __init__(self, timeout):
+        '''
+        Method for creating the backend.
+
+        :param timeout: Time limit for the HTTP client (in seconds).
+
+        Legend:
+        # googletrans: A library that implemented Google Translate API (imported only if this backend is used).
+        # Translator(): A class providing translations from Google Translate
+        # raise_exception=True: Failed requests raise an exception (instead of returning the original text).
+        '''
+
+        from googletrans import Translator
+        self.translator = Translator(timeout=timeout, raise_exception=True)
+
+
+    @classmethod
+    def from_config(cls, config):
+        '''
+        Class method for creating the backend from the application configuration.
+
+        :param config: The application configuration (app.config).
+        :return: An instance of the backend.
+
+        Legend:
+        # TRANSLATOR_TIMEOUT: Time limit of one call (from the configuration).
+        '''
+
+        return cls(timeout=config['TRANSLATOR_TIMEOUT'])
+
+
+    def translate(self, text, language):
+        '''
+        Method for translating a text.
+
+        :param text: The text to translate.
+        :param language: The target language of the translation.
+        :return: Translated text.
+
+        Legend:
+        # translator.translate(): Method of the Translator class for translation.
+        # dest=language: Translation language.
+        # .text: Extracting the part with translated text.
+        '''
+
+        return self.translator.translate(text, dest=language).text
+
+
+class DictionaryBackend(TranslatorBackend):
+    '''
+    A class for local translations word by word from a dictionary (needs no network access).
+
+    The translation is deterministic and fast, so it is used for load tests, development and deployments
+    without internet access. Words missing in the dictionary are kept unchanged, as well as punctuation,
+    white space and the separator of batched texts.
+
+    Attributes:
+    # dictionaries: A dictionary of word dictionaries by target language ({"cs": {"hello": "ahoj"}, ...}).
+    '''
+
+    # Default dictionary (a file next to this module):
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'dictionary.json')
+
+    # Words of a text:
+    WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+    def __init__(self, path=None):
+        '''
+        Method for creating the backend (the dictionary is loaded once).
+
+        :param path: Path to the JSON file with the dictionaries (the default dictionary if not set).
+        '''
+
+        with open(path or self.DEFAULT_PATH, encoding='utf-8') as dictionary_file:
+            self.dictionaries = {
+                language: {word.lower(): translation for word, translation in words.items()}
+                for language, words in json.load(dictionary_file).items()
+            }
+
+
+    @classmethod
+    def from_config(cls, config):
+        '''
+        Class method for creating the backend from the application configuration.
+
+        :param config: The application configuration (app.config).
+        :return: An instance of the backend.
+
+        Legend:
+        # TRANSLATOR_DICTIONARY: Path to the JSON file with the dictionaries (from the configuration).
+        '''
+
+        return cls(path=config['TRANSLATOR_DICTIONARY'])
+
+
+    def translate(self, text, language):
+        '''
+        Method for translating a text word by word.
+
+        :param text: The text to translate.
+        :param language: The target language of the translation.
+        :return: Translated text.
+
+        Legend:
+        # WORD_PATTERN.sub(): Replacing each word of the text by the result of the inner function.
+        # word.lower(): The dictionary is searched regardless of case.
+        # word[0].isupper(): Words starting with a capital letter are translated with a capital letter.
+        '''
+
+        words = self.dictionaries.get(language, {})
+
+        def replace(match):
+            word = match.group(0)
+            translation = words.get(word.lower())
+            if translation is None:
+                return word
+            if word[0].isupper():
+                return translation[:1].upper() + translation[1:]
+            return translation
+
+        return self.WORD_PATTERN.sub(replace, text)
+
+
+class FakeBackend(TranslatorBackend):
+    '''
+    A class for local fake translations (used for testing without network access).
+
+    The translation is the original text with the language mark, e.g. "[cs] Hello".
+
+    Attributes:
+    # delay: Seconds of waiting before each translation (simulation of a slow upstream).
+    # fail: Setting for raising an exception instead of translation (simulation of a failing upstream).
+    # calls: Number of translations made.
+    # lock: A lock for the number of translations (the backend is shared by all threads).
+    '''
+
+    def __init__(self, delay=0, fail=False):
+        '''
+        Method for creating the backend.
+
+        :param delay: Seconds of waiting before each translation.
+        :param fail: Setting for raising an exception instead of translation.
+        '''
+
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.lock = threading.Lock()
+
+
+    @classmethod
+    def from_config(cls, config):
+        '''
+        Class method for creating the backend from the application configuration.
+
+        :param config: The application configuration (app.config).
+        :return: An instance of the backend.
+
+        Legend:
+        # TRANSLATOR_FAKE_DELAY: Seconds of waiting before each translation (e.g. longer than TRANSLATOR_TIMEOUT).
+        # TRANSLATOR_FAKE_FAIL: Setting for failing translations (e.g. to open the circuit breaker).
+        '''
+
+        return cls(delay=config['TRANSLATOR_FAKE_DELAY'], fail=config['TRANSLATOR_FAKE_FAIL'])
+
+
+    def translate(self, text, language):
+        '''
+        Method for a fake translation of a text.
+
+        :param text: The text to translate.
+        :param language: The target language of the translation.
+        :return: The text with the language mark.
+        '''
+
+        with self.lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("Fake translation failure.")
+
+        return f'[{language}] {text}'
+
+
+class TranslatorService:
+    '''
+    A class for the translator service (a long-lived object assigned to the application in create_app).
+
+    Each call has a time limit, and after repeated failures the circuit breaker is opened:
+    further calls fail immediately (without waiting for the upstream) until the reset time expires.
+    Then one trial call is let through, and the circuit is closed again if it succeeds.
+
+    Attributes:
+    # backend: The translation backend (selected by TRANSLATOR_BACKEND, see BACKENDS).
+    # executor: A pool of threads for calls with a time limit.
+    # timeout: Time limit of one call (in seconds).
+    # failure_threshold: Number of failures in a row that opens the circuit.
+    # reset_timeout: Seconds after which the open circuit lets a trial call through.
+    # failures: Number of failures in a row.
+    # opened_at: Time when the circuit was opened (None if the circuit is closed).
+    # lock: A lock for the state of the circuit (shared by all threads).
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the service.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.backend = None
+        self.executor = None
+        self.timeout = None
+        self.failure_threshold = None
+        self.reset_timeout = None
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app, backend=None):
+        '''
+        Method for assigning the service to the application.
+
+        :param app: The application.
+        :param backend: The translation backend (by default the one selected in the configuration).
+
+        Legend:
+        # create_backend(): A function for creating the backend selected by TRANSLATOR_BACKEND.
+        # TRANSLATOR_TIMEOUT: Time limit of one call (from the configuration).
+        # TRANSLATOR_POOL_SIZE: Maximum number of concurrent calls (from the configuration).
+        # TRANSLATOR_FAILURE_THRESHOLD: Number of failures that opens the circuit (from the configuration).
+        # TRANSLATOR_RESET_TIMEOUT: Seconds before a trial call of the open circuit (from the configuration).
+        # ThreadPoolExecutor(): A class for a pool of threads.
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        self.timeout = app.config['TRANSLATOR_TIMEOUT']
+        self.failure_threshold = app.config['TRANSLATOR_FAILURE_THRESHOLD']
+        self.reset_timeout = app.config['TRANSLATOR_RESET_TIMEOUT']
+        self.backend = backend or create_backend(app.config)
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config['TRANSLATOR_POOL_SIZE'],
+            thread_name_prefix='translator'
+        )
+        self.failures = 0
+        self.opened_at = None
+        app.extensions['translator'] = self
+
+
+    def translate(self, text, language):
+        '''
+        Method for translating a text (with a time limit and the circuit breaker).
+
+        :param text: The text to translate.
+        :param language: The target language of the translation.
+        :return: Translated text.
+
+        Legend:
+        # self._allow(): The circuit is closed (or a trial call is allowed).
+        # self.executor.submit(): Running the backend translation in the pool of threads.
+        # future.result(timeout=): Waiting for the result at most for the time limit.
+        # TranslationUnavailable: Raised if the circuit is open, the call is too slow or it fails.
+        '''
+
+        # Circuit breaker:
+        if not self._allow():
+            raise TranslationUnavailable("Translator circuit is open.")
+
+        # Translation with a time limit:
+        future = self.executor.submit(self.backend.translate, text, language)
+        try:
+            translation = future.result(timeout=self.timeout)
+        except TimeoutError:
+            self._failure()
+            raise TranslationUnavailable(f"Translation took longer than {self.timeout} s.")
+        except Exception as error:
+            self._failure()
+            raise TranslationUnavailable(f"Translation failed: {error!r}") from error
+
+        self._success()
+        return translation
+
+
+    def is_open(self):
+        '''
+        Method to check whether the circuit is open (calls fail immediately).
+
+        :return: True if the circuit is open and the reset time has not expired yet.
+        '''
+
+        with self.lock:
+            return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+
+    def _allow(self):
+        '''
+        Method to check whether a call can be made.
+
+        :return: True if the circuit is closed, or the reset time has expired (one trial call is let through).
+
+        Legend:
+        # time.monotonic(): Current time (not affected by system clock changes).
+        # self.opened_at = time.monotonic(): The trial call postpones other calls by another reset time.
+        '''
+
+        with self.lock:
+            if self.opened_at is None:
+                return True
+
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()
+                return True
+
+            return False
+
+
+    def _success(self):
+        '''
+        Method for recording a successful call (the circuit is closed).
+        '''
+
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info("Translator circuit closed.")
+            self.failures = 0
+            self.opened_at = None
+
+
+    def _failure(self):
+        '''
+        Method for recording a failed call (the circuit is opened after repeated failures).
+        '''
+
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Translator circuit opened after %s failures.", self.failures)
+                self.opened_at = time.monotonic()
+
+
+# Available backends (by the name used in TRANSLATOR_BACKEND):
+BACKENDS = {
+    'google': GoogleBackend,
+    'dictionary': DictionaryBackend,
+    'fake': FakeBackend
+}
+'''
+(Legend)
+# 'google': Translations from Google Translate (needs network access).
+# 'dictionary': Local translations word by word from a dictionary (TRANSLATOR_DICTIONARY).
+# 'fake': The original text with the language mark (for tests).
+'''
+
+
+def create_backend(config):
+    '''
+    A function for creating the translation backend selected in the configuration.
+
+    :param config: The application configuration (app.config).
+    :return: An instance of the backend.
+
+    Legend:
+    # TRANSLATOR_BACKEND: Name of the backend (from the configuration).
+    # BACKENDS: A dictionary of available backends.
+    # from_config(): Class method creating the backend from the configuration.
+    '''
+
+    name = config['TRANSLATOR_BACKEND']
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translator backend {name!r} (available: {', '.join(BACKENDS)}).")
+
+    logger.info("Translator backend: %s.", name)
+    return BACKENDS[name].from_config(config)
+
+
+# Instance of the service (assigned to the application in create_app):
+translator = TranslatorService()
@@ -0,0 +1,717 @@
+# FILE FOR ADDITIONAL FUNCTIONS ASSOCIATED WITH POST TRANSLATIONS #
+# This file is used to define functions for translating posts and storing the translations.
+
+
+# External extensions:
+from flask import current_app
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+import hashlib
+import re
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# sqlalchemy: A library for working with databases.
+# sqlalchemy.exc: A module with SQLAlchemy exceptions.
+# datetime: A library for date and time functions.
+
+Import:
+# current_app: A function providing access to a running application.
+# or_: A function joining search conditions (at least one must be met).
+# and_: A function joining search conditions (all must be met).
+# IntegrityError: An exception raised when a database constraint is violated.
+# datetime: Module for date and time objects.
+# timedelta: Module for duration (difference between two dates, or times).
+# hashlib: A module providing secure hash algorithms.
+# re: A module for regular expressions.
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post, Translation, TranslationSegment
+from flaskblog.main.translator import translator, TranslationUnavailable, TranslationPending
+from flaskblog.main.single_flight import single_flight
+from flaskblog.main.language import detect_language
+from flaskblog.cache import response_cache, post_tag
+from flaskblog.posts.utils import touch_feeds
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main.translator: The translator.py file in the main folder in the root directory.
+# flaskblog.main.single_flight: The single_flight.py file in the main folder in the root directory.
+# flaskblog.main.language: The language.py file in the main folder in the root directory.
+# flaskblog.cache: The cache.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: A class with defined columns for the posts database table.
+# Translation: A class with defined columns for the translations database table.
+# TranslationSegment: A class with defined columns for the translated paragraphs database table.
+# translator: The translator service (shared by all requests, with time limits and the circuit breaker).
+# TranslationUnavailable: An exception raised when the translation cannot be made.
+# TranslationPending: An exception raised when the same translation is being made by another worker.
+# single_flight: The single-flight layer (one translator call shared by all concurrent requests of the process).
+# detect_language: A function for detecting the language of a post (local, without network access).
+# response_cache: The cache of whole pages (pages displaying the post are removed when its translation changes).
+# post_tag: A function for the tag of pages displaying a post.
+# touch_feeds: A function for increasing the versions of the feeds displaying posts of an author.
+'''
+
+
+def source_hash(title, content):
+    '''
+    A function for creating a hash of the post text (used as a key for stored translations).
+
+    :param title: Title of the post.
+    :param content: Content of the post.
+    :return: Hexadecimal SHA-256 hash of the title and content.
+
+    Legend:
+    # hashlib.sha256(): Creating a hash object with the SHA-256 algorithm.
+    # '\\0': Separator between the title and the content (so "ab" + "c" differs from "a" + "bc").
+    # encode('utf-8'): Encode settings.
+    # hexdigest(): Returning the hash as a hexadecimal string.
+    '''
+
+    return hashlib.sha256((title + '\0' + content).encode('utf-8')).hexdigest()
+
+
+# Separator of texts packed into one translation request:
+SEPARATOR = '\n\n###\n\n'
+SEPARATOR_PATTERN = re.compile(r'\s*###\s*')
+'''
+(Legend)
+# SEPARATOR: A line placed between packed texts (kept unchanged by Google Translate).
+# SEPARATOR_PATTERN: A regular expression for splitting the translated texts (ignores changed white space).
+'''
+
+
+def pack_texts(texts, limit):
+    '''
+    A function for packing texts into batches (each batch is translated by one request to Google Translate).
+
+    :param texts: List of texts to translate.
+    :param limit: Maximum length of one batch (in characters).
+    :return: List of batches (each batch is a list of indexes into texts).
+
+    Legend:
+    # len(SEPARATOR): Each text in the batch is followed by the separator.
+    # '###' in text: A text containing the separator is translated alone (it could not be split back).
+    '''
+
+    batches = []
+    batch = []
+    size = 0
+
+    for index, text in enumerate(texts):
+        length = len(text) + len(SEPARATOR)
+
+        # (text translated alone):
+        if '###' in text:
+            batches.append([index])
+            continue
+
+        # (full batch):
+        if batch and size + length > limit:
+            batches.append(batch)
+            batch = []
+            size = 0
+
+        batch.append(index)
+        size += length
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def translate_texts(texts, language):
+    '''
+    A function for translating a list of texts with as few requests to the translator as possible.
+
+    :param texts: List of texts to translate.
+    :param language: The target language of the translation.
+    :return: List of translated texts (in the same order).
+
+    Legend:
+    # translator.translate(): Method of the translator service for translation (TranslationUnavailable on failure).
+    # TRANSLATION_BATCH_LIMIT: Maximum length of one request (from the configuration).
+    # pack_texts(): A function for packing texts into batches.
+    # SEPARATOR.join(): Joining the texts of the batch into one text.
+    # SEPARATOR_PATTERN.split(): Splitting the translated text back into the individual texts.
+    # len(parts) != len(batch): The separator has not been kept, the texts of the batch are translated one by one.
+    '''
+
+    # Translations (batch by batch):
+    translations = [None] * len(texts)
+    for batch in pack_texts(texts, current_app.config['TRANSLATION_BATCH_LIMIT']):
+
+        # (one request for the whole batch):
+        if len(batch) == 1:
+            parts = [translator.translate(texts[batch[0]], language)]
+        else:
+            joined = SEPARATOR.join(texts[index] for index in batch)
+            parts = SEPARATOR_PATTERN.split(translator.translate(joined, language).strip())
+
+        # (one request for each text of the batch):
+        if len(parts) != len(batch):
+            parts = [translator.translate(texts[index], language) for index in batch]
+
+        for index, part in zip(batch, parts):
+            translations[index] = part
+
+    return translations
+
+
+# Line breaks between paragraphs:
+PARAGRAPH_PATTERN = re.compile(r'(\s*\n\s*)')
+'''
+(Legend)
+# PARAGRAPH_PATTERN: A regular expression for splitting a text into paragraphs (the line breaks are kept).
+'''
+
+
+def split_paragraphs(text):
+    '''
+    A function for splitting a text into paragraphs and line breaks.
+
+    :param text: The text to split.
+    :return: List of parts (paragraphs at even positions, line breaks at odd positions, "".join() gives the text).
+
+    Legend:
+    # PARAGRAPH_PATTERN.split(): Splitting the text (the line breaks are kept thanks to the group in the pattern).
+    '''
+
+    return PARAGRAPH_PATTERN.split(text)
+
+
+def translate_paragraphs(texts, language):
+    '''
+    A function for translating texts paragraph by paragraph (only paragraphs not translated before are sent).
+
+    :param texts: List of texts to translate.
+    :param language: The target language of the translation.
+    :return: List of translated texts (in the same order, with the original line breaks).
+
+    Legend:
+    Paragraphs:
+    # split_paragraphs(): A function for splitting a text into paragraphs and line breaks.
+    # hashlib.sha256(): Hash of the paragraph (key of the stored translation).
+    # part.strip(): Empty paragraphs are not translated.
+
+    Stored paragraphs retrieving:
+    # TranslationSegment.query: Query for the TranslationSegment database table.
+    # TranslationSegment.source_hash.in_(): Search parameter for a list of values (in chunks of 500).
+
+    Translation:
+    # translate_texts(): A function for translating the missing paragraphs together (in batches).
+    # db.session.add(): Adding the new paragraphs to the database.
+    # db.session.commit(): Commit changes to the database.
+    # IntegrityError: The same paragraph was stored by another request in the meantime (the stored one is kept).
+    '''
+
+    # Paragraphs:
+    split_texts = [split_paragraphs(text) for text in texts]
+    paragraphs = {}
+    for parts in split_texts:
+        for part in parts[::2]:
+            if part.strip():
+                paragraphs[hashlib.sha256(part.encode('utf-8')).hexdigest()] = part
+
+    # Stored paragraphs retrieving:
+    hashes = list(paragraphs.keys())
+    translated = {}
+    for start in range(0, len(hashes), 500):
+        for segment in TranslationSegment.query.filter(
+            TranslationSegment.language == language,
+            TranslationSegment.source_hash.in_(hashes[start:start + 500])
+        ):
+            translated[segment.source_hash] = segment.text
+
+    # Translation of the missing paragraphs:
+    missing = [paragraph_hash for paragraph_hash in hashes if paragraph_hash not in translated]
+    if missing:
+        results = translate_texts([paragraphs[paragraph_hash] for paragraph_hash in missing], language)
+        for paragraph_hash, result in zip(missing, results):
+            translated[paragraph_hash] = result
+            db.session.add(TranslationSegment(language=language, source_hash=paragraph_hash, text=result))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+    # Assembling the translated texts:
+    translations = []
+    for parts in split_texts:
+        for index in range(0, len(parts), 2):
+            if parts[index].strip():
+                parts[index] = translated[hashlib.sha256(parts[index].encode('utf-8')).hexdigest()]
+        translations.append(''.join(parts))
+
+    return translations
+
+
+def translate_text(title, content, language):
+    '''
+    A function for translating the title and content of a post.
+
+    :param title: Title of the post.
+    :param content: Content of the post.
+    :param language: The target language of the translation.
+    :return: Translated title and content.
+
+    Legend:
+    # translate_paragraphs(): A function for translating texts paragraph by paragraph (in one request).
+    '''
+
+    title_translation, content_translation = translate_paragraphs([title, content], language)
+    return title_translation, content_translation
+
+
+def is_written_in(post, language):
+    '''
+    A function to check whether the post text is already written in the target language (no translation is needed).
+
+    :param post: The post.
+    :param language: The target language of the translation.
+    :return: True if the detected language of the post text is the target language.
+
+    Legend:
+    # detect_language(): A function for detecting the language of a post (None if it cannot be detected).
+    '''
+
+    return detect_language(post.title, post.content) == language
+
+
+def find_translation(post, language):
+    '''
+    A function for finding the stored translation of the current post text.
+
+    :param post: The post.
+    :param language: The language of the translation.
+    :return: Stored translation (instance of the Translation class) or None.
+
+    Legend:
+    # Translation.query: Query for the Translation database table.
+    # filter_by(): Search parameters (post, language and hash of the post text).
+    # first(): Returning the first value found (end of search).
+    '''
+
+    return Translation.query\
+        .filter_by(
+            post_id=post.id,
+            language=language,
+            source_hash=source_hash(post.title, post.content)
+        )\
+        .first()
+
+
+def is_pending(translation):
+    '''
+    A function to check whether the translation is still being prepared by the background threads.
+
+    :param translation: Stored translation (instance of the Translation class) or None.
+    :return: True if the translation is pending and the waiting time has not expired yet.
+
+    Legend:
+    # TRANSLATION_PENDING_TIMEOUT: Seconds after which the pending translation is considered lost.
+    # datetime.utcnow(): Current time.
+    '''
+
+    if translation is None or translation.status != 'pending':
+        return False
+
+    timeout = timedelta(seconds=current_app.config['TRANSLATION_PENDING_TIMEOUT'])
+    return translation.date_requested > datetime.utcnow() - timeout
+
+
+def translation_changed(post_id):
+    '''
+    A function for announcing a change of the translations of a post (pending, failed or finished translation).
+
+    :param post_id: The ID of the post.
+    :return: None (the change of the feed versions is committed).
+
+    Legend:
+    # Post.author_id: The author of the post (the feeds of all posts and of the author display the post).
+    # touch_feeds(): New versions of the feeds (their ETag changes).
+    # response_cache.invalidate(): Removing stored pages displaying the post.
+    '''
+
+    author_id = db.session.query(Post.author_id).filter_by(id=post_id).scalar()
+    if author_id is not None:
+        touch_feeds(author_id)
+        db.session.commit()
+    response_cache.invalidate(post_tag(post_id))
+
+
+def save_translation(post_id, language, text_hash, title, content, retry=True):
+    '''
+    A function for storing the finished translation of a post (new row or completion of a pending one).
+
+    :param post_id: The ID of the post.
+    :param language: The language of the translation.
+    :param text_hash: Hash of the translated post text.
+    :param title: Translated title.
+    :param content: Translated content.
+    :param retry: Setting for storing the translation again after a conflict (only once).
+    :return: Stored translation (instance of the Translation class).
+
+    Legend:
+    # Translation.query: Query for the Translation database table.
+    # db.session.add(translation): Adding data to the database.
+    # db.session.commit(): Commit changes to the database.
+    # IntegrityError: The same translation was stored by another request in the meantime - it is completed
+      by the second attempt (the row exists now). Any other error (e.g. a missing language) is raised again.
+    # translation_changed(): Announcing the change to the caches and feeds (the translation is finished).
+    '''
+
+    # Stored translation retrieving:
+    query = Translation.query.filter_by(post_id=post_id, language=language, source_hash=text_hash)
+    translation = query.first()
+
+    # (new row):
+    if translation is None:
+        translation = Translation(post_id=post_id, language=language, source_hash=text_hash)
+        db.session.add(translation)
+
+    # Entering data into database:
+    translation.title = title
+    translation.content = content
+    translation.status = 'done'
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if not retry or query.first() is None:
+            raise
+        return save_translation(post_id, language, text_hash, title, content, retry=False)
+    translation_changed(post_id)
+
+    return translation
+
+
+def get_translation(post, language):
+    '''
+    A function for getting the translation of a post (from the database, or from Google Translate).
+
+    Concurrent requests for the same translation share one call to the translator:
+    requests of this process wait for the result of the first one (single_flight),
+    and other workers find the translation claimed as pending (claim_translation).
+
+    :param post: The post to translate.
+    :param language: The target language of the translation.
+    :return: Stored translation (instance of the Translation class).
+
+    Legend:
+    # find_translation(): A function for finding the stored translation of the current post text.
+    # status == 'done': The stored translation is finished (pending and failed ones are translated here).
+    # is_written_in(): The post is already written in the target language (the original text is stored instead).
+    # single_flight.do(): Only the first concurrent request translates, the others wait for its result.
+    # (post.id, language, text_hash): Key of the translation (a changed post text is a different translation).
+    # claim_and_translate(): A function for claiming and translating the post (TranslationPending if claimed elsewhere).
+    # save_translation(): A function for storing the finished translation (each waiting request stores the same text).
+    '''
+
+    # Stored translation retrieving:
+    translation = find_translation(post, language)
+    if translation and translation.status == 'done':
+        return translation
+
+    # Post already written in the target language:
+    text_hash = source_hash(post.title, post.content)
+    if is_written_in(post, language):
+        return save_translation(post.id, language, text_hash, post.title, post.content)
+
+    # Translation (shared by concurrent requests) & entering data into database:
+    title_translation, content_translation = single_flight.do(
+        (post.id, language, text_hash),
+        lambda: claim_and_translate(post, language, text_hash)
+    )
+    return save_translation(post.id, language, text_hash, title_translation, content_translation)
+
+
+def claim_and_translate(post, language, text_hash):
+    '''
+    A function for translating a post after claiming its translation (so other workers do not translate it too).
+
+    :param post: The post to translate.
+    :param language: The target language of the translation.
+    :param text_hash: Hash of the post text.
+    :return: Translated title and content.
+
+    Legend:
+    # claim_translation(): A function for claiming the translation (False if someone else has claimed it).
+    # find_translation(): The translation was finished in the meantime (its text is returned).
+    # single_flight.absorb(): Counting the absorbed call (the translation is being made elsewhere).
+    # TranslationPending: The translation is being made by another worker (or a background thread).
+    # translate_text(): A function for translating the title and content with the translator service.
+    # mark_failed(): Releasing the claim after a failed translation (another request can try again).
+    '''
+
+    # Claiming the translation:
+    if not claim_translation(post.id, language, text_hash):
+        translation = find_translation(post, language)
+        if translation and translation.status == 'done':
+            return translation.title, translation.content
+        single_flight.absorb((post.id, language, text_hash))
+        raise TranslationPending(f"Translation of post {post.id} ({language}) is in progress.")
+
+    # Translation:
+    try:
+        return translate_text(post.title, post.content, language)
+    except TranslationUnavailable:
+        mark_failed(post.id, language, text_hash)
+        raise
+
+
+def claim_translation(post_id, language, text_hash):
+    '''
+    A function for claiming a translation in the database (shared by all workers of the application).
+
+    :param post_id: The ID of the post.
+    :param language: The language of the translation.
+    :param text_hash: Hash of the post text.
+    :return: True if the translation was claimed by this request, False if it is done or claimed by someone else.
+
+    Legend:
+    Claiming an existing row:
+    # Translation.query: Query for the Translation database table.
+    # or_(), and_(): Only failed rows or pending rows older than the waiting time can be claimed.
+    # TRANSLATION_PENDING_TIMEOUT: Seconds after which the pending translation is considered lost.
+    # update(): Changing the found rows in the database (one statement, so two workers cannot claim the same row).
+
+    Claiming a new row:
+    # status='pending': The translation is being made (other workers do not translate it).
+    # IntegrityError: The row was added by another worker in the meantime (it has claimed the translation).
+    # translation_changed(): Announcing the change to the caches and feeds (the translation is pending).
+    '''
+
+    # Claiming an existing row:
+    stale = datetime.utcnow() - timedelta(seconds=current_app.config['TRANSLATION_PENDING_TIMEOUT'])
+    claimed = Translation.query\
+        .filter(
+            Translation.post_id == post_id,
+            Translation.language == language,
+            Translation.source_hash == text_hash,
+            or_(
+                Translation.status == 'failed',
+                and_(Translation.status == 'pending', Translation.date_requested <= stale)
+            )
+        )\
+        .update({'status': 'pending', 'date_requested': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    if claimed:
+        translation_changed(post_id)
+        return True
+
+    if Translation.query.filter_by(post_id=post_id, language=language, source_hash=text_hash).first():
+        return False
+
+    # Claiming a new row:
+    db.session.add(Translation(post_id=post_id, language=language, source_hash=text_hash, status='pending'))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    translation_changed(post_id)
+
+    return True
+
+
+def translate_posts(posts, language):
+    '''
+    A function for getting translations of all posts on a page (stored ones, the rest translated in batches).
+
+    :param posts: List of displayed posts.
+    :param language: The target language of the translations (current page language).
+    :return: A dictionary of translations by post ID (only for posts in other languages).
+
+    Legend:
+    Stored translations retrieving:
+    # Translation.query: Query for the Translation database table (one query for the whole page).
+    # Translation.post_id.in_(): Search parameter for a list of values.
+    # source_hash(): Only translations of the current post text are used.
+
+    Translation:
+    # translate_paragraphs(): A function for translating titles and contents of all missing posts together.
+    # save_translation(): A function for storing the finished translation.
+    # TranslationUnavailable: The translator is not available, the missing posts are displayed untranslated.
+    # response_cache.degrade(): The untranslated page is not stored or validated (it is translated when possible).
+    '''
+
+    # Posts in other languages:
+    posts = [post for post in posts if post.language != language]
+    if not posts:
+        return {}
+
+    # Stored translations retrieving:
+    hashes = {post.id: source_hash(post.title, post.content) for post in posts}
+    translations = {
+        translation.post_id: translation
+        for translation in Translation.query.filter(
+            Translation.post_id.in_(hashes.keys()),
+            Translation.language == language,
+            Translation.status == 'done'
+        )
+        if translation.source_hash == hashes[translation.post_id]
+    }
+
+    # Posts already written in the target language:
+    missing = []
+    for post in posts:
+        if post.id in translations:
+            continue
+        if is_written_in(post, language):
+            translations[post.id] = save_translation(post.id, language, hashes[post.id], post.title, post.content)
+        else:
+            missing.append(post)
+
+    # Translation of the missing posts:
+    if missing:
+        texts = []
+        for post in missing:
+            texts += [post.title, post.content]
+        try:
+            results = single_flight.do(
+                (language, tuple((post.id, hashes[post.id]) for post in missing)),
+                lambda: translate_paragraphs(texts, language)
+            )
+        except TranslationUnavailable:
+            response_cache.degrade()
+            return translations
+
+        for number, post in enumerate(missing):
+            translations[post.id] = save_translation(
+                post.id,
+                language,
+                hashes[post.id],
+                results[2 * number],
+                results[2 * number + 1]
+            )
+
+    return translations
+
+
+def mark_pending(post, languages):
+    '''
+    A function for marking translations of a post as pending (before they are made by the background threads).
+
+    :param post: The post to translate.
+    :param languages: The target languages of the translations.
+    :return: None (the changes are committed).
+
+    Legend:
+    # source_hash(): Hash of the current post text.
+    # Translation.query: Query for the Translation database table (only missing rows are added).
+    # status='pending': The translation is waiting for the background threads.
+    # datetime.utcnow(): Current time (request time).
+    # IntegrityError: The translation was stored by a background thread in the meantime (nothing to mark).
+    # translation_changed(): Announcing the change to the caches and feeds (the translations are pending).
+    '''
+
+    text_hash = source_hash(post.title, post.content)
+
+    for language in languages:
+        translation = Translation.query\
+            .filter_by(post_id=post.id, language=language, source_hash=text_hash)\
+            .first()
+
+        if translation is None:
+            db.session.add(Translation(
+                post_id=post.id,
+                language=language,
+                source_hash=text_hash,
+                status='pending'
+            ))
+
+        elif translation.status == 'failed':
+            translation.status = 'pending'
+            translation.date_requested = datetime.utcnow()
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+    translation_changed(post.id)
+
+
+def mark_failed(post_id, language, text_hash):
+    '''
+    A function for marking a translation as failed (the translation is then made during the request).
+
+    :param post_id: The ID of the post.
+    :param language: The language of the translation.
+    :param text_hash: Hash of the post text.
+    :return: None (the change is committed).
+
+    Legend:
+    # Translation.query: Query for the Translation database table.
+    # filter_by(): Search parameters (only pending rows are changed, finished ones are kept).
+    # update(): Changing the found rows in the database.
+    # translation_changed(): Announcing the change to the caches and feeds (the translation is no longer pending).
+    '''
+
+    Translation.query\
+        .filter_by(post_id=post_id, language=language, source_hash=text_hash, status='pending')\
+        .update({'status': 'failed'})
+    db.session.commit()
+    translation_changed(post_id)
+
+
+def pending_translations(posts, language):
+    '''
+    A function for finding posts whose translation is being prepared (used on pages with a list of posts).
+
+    :param posts: List of displayed posts.
+    :param language: The language of the translation (current page language).
+    :return: A set of IDs of the posts with pending translation.
+
+    Legend:
+    # Translation.query: Query for the Translation database table (one query for the whole page).
+    # Translation.post_id.in_(): Search parameter for a list of values.
+    # is_pending(): A function to check whether the translation is still pending.
+    # The post text is not needed (it is loaded only on the post page): translations of the previous text
+    # are deleted when the post is changed (invalidate_translations), so a pending row is for the current text.
+    '''
+
+    # Posts in other languages:
+    posts = {post.id for post in posts if post.language != language}
+    if not posts:
+        return set()
+
+    # Pending translations retrieving:
+    translations = Translation.query\
+        .filter(
+            Translation.post_id.in_(posts),
+            Translation.language == language,
+            Translation.status == 'pending'
+        )\
+        .all()
+
+    return {translation.post_id for translation in translations if is_pending(translation)}
+
+
+def invalidate_translations(post):
+    '''
+    A function for deleting stored translations of a post (used after the post text has changed).
+
+    :param post: The post whose translations are no longer valid.
+    :return: None (the caller commits the change together with the post).
+
+    Legend:
+    # Translation.query: Query for the Translation database table.
+    # filter_by(post_id=post.id): Search parameters.
+    # delete(): Deleting all found rows from the database.
+    '''
+
+    Translation.query.filter_by(post_id=post.id).delete()
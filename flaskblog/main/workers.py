@@ -0,0 +1,222 @@
+# FILE FOR BACKGROUND TRANSLATIONS OF POSTS #
+# This file is used to define a pool of background threads translating new and updated posts.
+
+
+# External extensions:
+import logging
+import queue
+import threading
+import time
+'''
+(Legend)
+Import:
+# logging: A module for reporting events (here failed translations).
+# queue: A module providing thread-safe queues.
+# threading: A module for running code in threads.
+# time: A module for time functions (here waiting between attempts).
+'''
+
+
+# Internal extensions:
+from flaskblog import db, locales
+from flaskblog.db_models import Post
+from flaskblog.main.utils import source_hash, translate_text, save_translation, mark_pending, mark_failed, is_written_in
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# locales: A list of all configured languages.
+# Post: A class with defined columns for the posts database table.
+# source_hash: A function for creating a hash of the post text.
+# translate_text: A function for translating the title and content with the translator service.
+# save_translation: A function for storing the finished translation.
+# mark_pending: A function for marking translations of a post as pending.
+# mark_failed: A function for marking a translation as failed.
+# is_written_in: A function to check whether the post is already written in the target language.
+'''
+
+
+# Logger settings:
+logger = logging.getLogger(__name__)
+
+
+class TranslationWorkers:
+    '''
+    A class for a pool of background threads translating posts into all other configured languages.
+
+    The request only adds a job to the queue and the translation is made by the threads,
+    so the first reader of the translation does not wait for Google Translate.
+
+    Attributes:
+    # app: The application (the threads work within its context).
+    # jobs: A bounded queue of jobs (post ID, language, hash of the post text).
+    # threads: A list of running threads (started with the first job).
+    # lock: A lock for starting the threads only once.
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the pool (the threads are started with the first job).
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.app = None
+        self.jobs = None
+        self.threads = []
+        self.lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the pool to the application.
+
+        :param app: The application.
+
+        Legend:
+        # queue.Queue(maxsize=): A queue with a limited number of waiting jobs.
+        # TRANSLATION_QUEUE_SIZE: Maximum number of waiting jobs (from the configuration).
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        self.app = app
+        self.jobs = queue.Queue(maxsize=app.config['TRANSLATION_QUEUE_SIZE'])
+        app.extensions['translation_workers'] = self
+
+
+    def enqueue(self, post):
+        '''
+        Method for adding translations of the post into all other configured languages to the queue.
+
+        :param post: The saved post (committed to the database).
+        :return: None (the translations are made in the background).
+
+        Legend:
+        # locales: A list of all configured languages (the language of the post is skipped).
+        # mark_pending(): Marking the translations as pending (shown as "translation pending" on the pages).
+        # put_nowait(): Adding a job without waiting (queue.Full is raised if the queue is full).
+        # mark_failed(): The job did not fit into the queue, the translation will be made during the request.
+        '''
+
+        # Languages and hash of the post text:
+        languages = [locale.language for locale in locales if locale.language != post.language]
+        text_hash = source_hash(post.title, post.content)
+
+        # Pending translations:
+        mark_pending(post, languages)
+
+        # Adding jobs to the queue:
+        self._start()
+        for language in languages:
+            try:
+                self.jobs.put_nowait((post.id, language, text_hash))
+            except queue.Full:
+                logger.warning("Translation queue is full, post %s (%s) is translated on demand.", post.id, language)
+                mark_failed(post.id, language, text_hash)
+
+
+    def _start(self):
+        '''
+        Method for starting the threads (only once, with the first job).
+
+        Legend:
+        # TRANSLATION_WORKERS: Number of threads (from the configuration).
+        # threading.Thread(): A class for running code in a thread.
+        # daemon=True: The thread does not block the application shutdown.
+        '''
+
+        with self.lock:
+            if self.threads:
+                return
+
+            for number in range(self.app.config['TRANSLATION_WORKERS']):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f'translation-worker-{number}',
+                    daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+
+    def _work(self):
+        '''
+        Method running in each thread (takes jobs from the queue one by one).
+
+        Legend:
+        # self.jobs.get(): Waiting for the next job.
+        # self.app.app_context(): Context for working with the database outside of a request.
+        # self.jobs.task_done(): Marking the job as finished.
+        '''
+
+        while True:
+            post_id, language, text_hash = self.jobs.get()
+            try:
+                with self.app.app_context():
+                    self._translate(post_id, language, text_hash)
+            except Exception:
+                logger.exception("Translation of post %s (%s) failed.", post_id, language)
+            finally:
+                self.jobs.task_done()
+
+
+    def _translate(self, post_id, language, text_hash):
+        '''
+        Method for translating one post (with repeated attempts after a failure).
+
+        :param post_id: The ID of the post.
+        :param language: The target language of the translation.
+        :param text_hash: Hash of the post text at the time of the request.
+
+        Legend:
+        Post retrieving:
+        # db.session.get(Post, post_id): Return the post by ID (or None if it was deleted).
+        # source_hash(): The job is skipped if the post has been changed in the meantime (a newer job exists).
+
+        Translation:
+        # is_written_in(): The post is already written in the target language (the original text is stored).
+        # TRANSLATION_RETRIES: Number of repeated attempts (from the configuration).
+        # TRANSLATION_RETRY_DELAY: Seconds before the first repeated attempt (doubled with each attempt).
+        # translate_text(): A function for translating the title and content with the translator service.
+        # save_translation(): A function for storing the finished translation.
+        # mark_failed(): All attempts failed, the translation will be made during the request.
+        '''
+
+        # Post retrieving:
+        post = db.session.get(Post, post_id)
+        if post is None or source_hash(post.title, post.content) != text_hash:
+            return
+
+        # Post already written in the target language:
+        if is_written_in(post, language):
+            save_translation(post_id, language, text_hash, post.title, post.content)
+            return
+
+        # Translation (with repeated attempts):
+        retries = self.app.config['TRANSLATION_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                title_translation, content_translation = translate_text(post.title, post.content, language)
+                break
+            except Exception:
+                logger.warning("Translation of post %s (%s), attempt %s failed.", post_id, language, attempt + 1)
+                if attempt < retries:
+                    time.sleep(self.app.config['TRANSLATION_RETRY_DELAY'] * 2 ** attempt)
+        else:
+            mark_failed(post_id, language, text_hash)
+            return
+
+        # Entering data into database:
+        save_translation(post_id, language, text_hash, title_translation, content_translation)
+
+
+# Instance of the pool (assigned to the application in create_app):
+translation_workers = TranslationWorkers()
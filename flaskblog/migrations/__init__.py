@@ -0,0 +1,2 @@
+# FILE TO INITIALIZE A FOLDER AS A PACKAGE WITH DATABASE MIGRATIONS #
+# This file can be empty, just because the folder contains it, the application considers it as a package.
@@ -0,0 +1,214 @@
+# FILE FOR APPLYING DATABASE MIGRATIONS #
+# This file is used to define the migrator: versioned changes of the schema applied to an existing database.
+
+
+# External extensions:
+from flask.cli import AppGroup
+from sqlalchemy import text
+from datetime import datetime
+import click
+import importlib
+import logging
+import pkgutil
+'''
+(Legend)
+From:
+# flask.cli: A module of Flask for commands of the "flask" command line.
+# sqlalchemy: A library for working with databases.
+# datetime: A library for date and time functions.
+
+Import:
+# AppGroup: A class for a group of commands bound to the application (flask migrate ...).
+# text: A function for creating a plain SQL statement.
+# datetime: Module for date and time objects.
+# click: A library for command line interfaces (used by Flask).
+# importlib: A module for importing modules by name (here the migration scripts).
+# logging: A module for reporting events (here applied migrations).
+# pkgutil: A module for listing the modules of a package (here the migration scripts).
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.migrations import versions
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.migrations: The migrations folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# versions: The package with the migration scripts.
+'''
+
+
+# Logger settings:
+logger = logging.getLogger(__name__)
+
+
+# Table of applied migrations:
+VERSION_TABLE = 'schema_migration'
+
+
+class Migrator:
+    '''
+    A class for the migrator (applies migration scripts that have not been applied to the database yet).
+
+    Each script in the migrations/versions folder has a VERSION number, a DESCRIPTION and an upgrade(connection)
+    function. Applied versions are stored in the schema_migration table, and each script runs in its own
+    transaction together with the record of its version (a failed script leaves the database unchanged -
+    the transaction is begun explicitly, so it includes the changes of the schema too).
+
+    Attributes:
+    # app: The application.
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the migrator.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.app = None
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the migrator to the application.
+
+        :param app: The application.
+
+        Legend:
+        # app.extensions: A dictionary of the application extensions.
+        # app.cli.add_command(): Registering the "flask migrate" commands.
+        '''
+
+        self.app = app
+        app.extensions['migrator'] = self
+        app.cli.add_command(migrate_commands)
+
+
+    def migrations(self):
+        '''
+        Method for loading all migration scripts.
+
+        :return: List of migration modules ordered by version.
+
+        Legend:
+        # pkgutil.iter_modules(): Listing the modules of the versions package.
+        # importlib.import_module(): Importing the module by its name.
+        # VERSION: Version number of the migration (must be unique).
+        '''
+
+        modules = [
+            importlib.import_module(f'{versions.__name__}.{name}')
+            for _, name, _ in pkgutil.iter_modules(versions.__path__)
+        ]
+        modules.sort(key=lambda module: module.VERSION)
+
+        numbers = [module.VERSION for module in modules]
+        if len(numbers) != len(set(numbers)):
+            raise RuntimeError(f"Duplicate migration versions: {numbers}")
+
+        return modules
+
+
+    def applied(self, connection):
+        '''
+        Method for getting the applied versions (the table of applied migrations is created if it is missing).
+
+        :param connection: Database connection.
+        :return: A set of applied version numbers.
+        '''
+
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR(200) NOT NULL, "
+            "date_applied DATETIME NOT NULL)"
+        ))
+        return {row[0] for row in connection.execute(text(f"SELECT version FROM {VERSION_TABLE}"))}
+
+
+    def pending(self):
+        '''
+        Method for getting the migrations that have not been applied yet.
+
+        :return: List of migration modules ordered by version.
+
+        Legend:
+        # db.engine.begin(): A connection with a transaction (committed at the end of the block).
+        '''
+
+        with db.engine.begin() as connection:
+            applied = self.applied(connection)
+
+        return [module for module in self.migrations() if module.VERSION not in applied]
+
+
+    def upgrade(self):
+        '''
+        Method for applying all pending migrations (each one in its own transaction).
+
+        :return: List of applied migration modules.
+
+        Legend:
+        # db.engine.begin(): A connection with a transaction (rolled back if the migration fails).
+        # exec_driver_sql('BEGIN'): The SQLite driver (pysqlite) begins a transaction only before INSERT, UPDATE
+          and DELETE - without the explicit BEGIN, CREATE and ALTER statements would be committed at once
+          and stay in the database after a failed migration.
+        # module.upgrade(connection): Applying the changes of the migration.
+        # INSERT INTO schema_migration: The record of the applied version (in the same transaction).
+        '''
+
+        done = []
+        for module in self.pending():
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql('BEGIN')
+                module.upgrade(connection)
+                connection.execute(
+                    text(f"INSERT INTO {VERSION_TABLE} (version, description, date_applied) VALUES (:v, :d, :t)"),
+                    {'v': module.VERSION, 'd': module.DESCRIPTION, 't': datetime.utcnow()}
+                )
+            logger.info("Migration %04d applied: %s", module.VERSION, module.DESCRIPTION)
+            done.append(module)
+
+        return done
+
+
+# Instance of the migrator (assigned to the application in create_app):
+migrator = Migrator()
+
+
+# Commands of the "flask migrate" command line:
+migrate_commands = AppGroup('migrate', help="Database migrations.")
+
+
+@migrate_commands.command('upgrade')
+def upgrade_command():
+    '''
+    Command for applying all pending migrations (flask --app run migrate upgrade).
+    '''
+
+    done = migrator.upgrade()
+    for module in done:
+        click.echo(f"Applied {module.VERSION:04d}: {module.DESCRIPTION}")
+    if not done:
+        click.echo("The database is up to date.")
+
+
+@migrate_commands.command('status')
+def status_command():
+    '''
+    Command for listing the migrations and their state (flask --app run migrate status).
+    '''
+
+    pending = {module.VERSION for module in migrator.pending()}
+    for module in migrator.migrations():
+        state = 'pending' if module.VERSION in pending else 'applied'
+        click.echo(f"{module.VERSION:04d} {state:8} {module.DESCRIPTION}")
@@ -0,0 +1,2 @@
+# FILE TO INITIALIZE A FOLDER AS A PACKAGE WITH MIGRATION SCRIPTS #
+# Each file of this folder (vNNNN_name.py) is one migration, applied in the order of its version number.
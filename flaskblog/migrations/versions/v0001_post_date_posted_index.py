@@ -0,0 +1,33 @@
+# MIGRATION 0001 - INDEX OF POST DATES #
+# This file adds an index on the date of posts (the home page sorts posts by date on every request).
+
+
+# External extensions:
+from sqlalchemy import text
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# text: A function for creating a plain SQL statement.
+'''
+
+
+# Migration settings:
+VERSION = 1
+DESCRIPTION = "Index on post.date_posted"
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    # CREATE INDEX IF NOT EXISTS: The index may already exist (databases created by db.create_all()).
+    # ix_post_date_posted: Name of the index (the same as in db_models.py).
+    '''
+
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_post_date_posted ON post (date_posted)"))
@@ -0,0 +1,35 @@
+# MIGRATION 0002 - INDEX OF POSTS BY AUTHOR AND DATE #
+# This file adds a composite index on the author and date of posts (the user page filters by author and sorts by date).
+
+
+# External extensions:
+from sqlalchemy import text
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# text: A function for creating a plain SQL statement.
+'''
+
+
+# Migration settings:
+VERSION = 2
+DESCRIPTION = "Index on post (author_id, date_posted)"
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    # CREATE INDEX IF NOT EXISTS: The index may already exist (databases created by db.create_all()).
+    # ix_post_author_id_date_posted: Name of the index (the same as in db_models.py).
+    '''
+
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_post_author_id_date_posted ON post (author_id, date_posted)"
+    ))
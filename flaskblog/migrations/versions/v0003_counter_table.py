@@ -0,0 +1,57 @@
+# MIGRATION 0003 - TABLE OF MAINTAINED COUNTS #
+# This file adds the counter table and fills it with the current numbers of posts (all and per author).
+
+
+# External extensions:
+from sqlalchemy import text
+from datetime import datetime
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+# datetime: A library for date and time functions.
+
+Import:
+# text: A function for creating a plain SQL statement.
+# datetime: Module for date and time objects.
+'''
+
+
+# Migration settings:
+VERSION = 3
+DESCRIPTION = "Counter table with numbers of posts"
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    # CREATE TABLE IF NOT EXISTS: The table may already exist (databases created by db.create_all()).
+    # INSERT OR IGNORE: Existing counters are kept (they are already maintained by the application).
+    # 'posts': Number of all posts.
+    # 'posts_author_' || author_id: Number of posts of one author.
+    '''
+
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS counter ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "name VARCHAR(50) NOT NULL UNIQUE, "
+        "value INTEGER NOT NULL, "
+        "date_updated DATETIME NOT NULL)"
+    ))
+
+    now = datetime.utcnow()
+    connection.execute(
+        text("INSERT OR IGNORE INTO counter (name, value, date_updated) SELECT 'posts', COUNT(*), :now FROM post"),
+        {'now': now}
+    )
+    connection.execute(
+        text(
+            "INSERT OR IGNORE INTO counter (name, value, date_updated) "
+            "SELECT 'posts_author_' || author_id, COUNT(*), :now FROM post GROUP BY author_id"
+        ),
+        {'now': now}
+    )
@@ -0,0 +1,92 @@
+# MIGRATION 0004 - EXCERPT AND NUMBER OF WORDS OF POSTS #
+# This file adds the excerpt and word_count columns to posts and fills them for existing posts.
+
+
+# External extensions:
+from sqlalchemy import text
+import re
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# text: A function for creating a plain SQL statement.
+# re: A module for regular expressions (here words of the content).
+'''
+
+
+# Migration settings:
+VERSION = 4
+DESCRIPTION = "Post excerpt and word_count columns"
+
+
+# Excerpt settings (a copy of posts/utils.py when the migration was written):
+EXCERPT_LENGTH = 300
+WORD_PATTERN = re.compile(r'\S+')
+'''
+(Legend)
+# The migration does not import the application code - a later change of the excerpt in posts/utils.py
+  (or of its imports) must not change what this migration does to an old database.
+# EXCERPT_LENGTH: Maximum number of characters of the excerpt.
+# WORD_PATTERN: A regular expression for words (sequences of non-space characters).
+'''
+
+
+def make_excerpt(content):
+    '''
+    A function for creating an excerpt of the post content (the beginning of the content, cut after a whole word).
+
+    :param content: Content of the post.
+    :return: The excerpt (ending with "…" if the content is longer).
+    '''
+
+    content = content.strip()
+    if len(content) <= EXCERPT_LENGTH:
+        return content
+
+    excerpt = content[:EXCERPT_LENGTH + 1]
+    if not excerpt[-1].isspace() and len(excerpt.split(None, 1)) > 1:
+        excerpt = excerpt.rsplit(None, 1)[0]
+
+    return excerpt[:EXCERPT_LENGTH].rstrip(' \t\r\n.,;:-') + '…'
+
+
+def count_words(content):
+    '''
+    A function for counting words of the post content.
+
+    :param content: Content of the post.
+    :return: Number of words.
+    '''
+
+    return sum(1 for _ in WORD_PATTERN.finditer(content))
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    # PRAGMA table_info(post): Columns of the post table (the columns may already exist - db.create_all()).
+    # ALTER TABLE ... ADD COLUMN: Adding a column to the existing table.
+    # WHERE excerpt = '': Only posts without the excerpt are filled.
+    # make_excerpt(), count_words(): The copies above (the same results as the functions of posts/utils.py).
+    '''
+
+    # Adding the columns:
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(post)"))}
+    if 'excerpt' not in columns:
+        connection.execute(text("ALTER TABLE post ADD COLUMN excerpt TEXT NOT NULL DEFAULT ''"))
+    if 'word_count' not in columns:
+        connection.execute(text("ALTER TABLE post ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0"))
+
+    # Filling the columns for existing posts:
+    posts = connection.execute(text("SELECT id, content FROM post WHERE excerpt = ''")).all()
+    for post_id, content in posts:
+        connection.execute(
+            text("UPDATE post SET excerpt = :excerpt, word_count = :word_count WHERE id = :id"),
+            {'excerpt': make_excerpt(content), 'word_count': count_words(content), 'id': post_id}
+        )
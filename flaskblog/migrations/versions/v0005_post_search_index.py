@@ -0,0 +1,70 @@
+# MIGRATION 0005 - FULL-TEXT SEARCH INDEX OF POSTS #
+# This file creates the FTS5 index over the title and content of posts and the triggers keeping it up to date.
+
+
+# External extensions:
+from sqlalchemy import text
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# text: A function for creating a plain SQL statement.
+'''
+
+
+# Migration settings:
+VERSION = 5
+DESCRIPTION = "Full-text search index of posts (FTS5) with synchronization triggers"
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    Search index:
+    # USING fts5(title, content): A virtual table with the full-text index of the post title and content.
+    # content='post', content_rowid='id': The text is not stored twice, it is read from the post table.
+    # tokenize='unicode61 remove_diacritics 2': Words without diacritics ("prispevek" finds "příspěvek").
+
+    Triggers (the index follows every change of the post table, in any part of the application):
+    # post_search_insert: Adding a new post to the index.
+    # post_search_delete: Removing a deleted post from the index ('delete' command with the old text).
+    # post_search_update: Replacing the old text with the new one (only if the title or content changed).
+
+    Existing posts:
+    # 'rebuild': Building the index from all existing posts.
+    '''
+
+    # Search index:
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5("
+        "title, content, content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    ))
+
+    # Triggers:
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS post_search_insert AFTER INSERT ON post BEGIN "
+        "INSERT INTO post_search (rowid, title, content) VALUES (new.id, new.title, new.content); "
+        "END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS post_search_delete AFTER DELETE ON post BEGIN "
+        "INSERT INTO post_search (post_search, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS post_search_update AFTER UPDATE OF title, content ON post BEGIN "
+        "INSERT INTO post_search (post_search, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO post_search (rowid, title, content) VALUES (new.id, new.title, new.content); "
+        "END"
+    ))
+
+    # Existing posts:
+    connection.execute(text("INSERT INTO post_search (post_search) VALUES ('rebuild')"))
@@ -0,0 +1,35 @@
+# MIGRATION 0006 - VERSION OF POSTS #
+# This file adds the version column to posts (part of the key of cached page fragments).
+
+
+# External extensions:
+from sqlalchemy import text
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# text: A function for creating a plain SQL statement.
+'''
+
+
+# Migration settings:
+VERSION = 6
+DESCRIPTION = "Post version column"
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    # PRAGMA table_info(post): Columns of the post table (the column may already exist - db.create_all()).
+    # ALTER TABLE ... ADD COLUMN: Adding a column to the existing table (existing posts get the first version).
+    '''
+
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(post)"))}
+    if 'version' not in columns:
+        connection.execute(text("ALTER TABLE post ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
@@ -0,0 +1,39 @@
+# MIGRATION 0007 - DATE OF THE LAST CHANGE OF POSTS #
+# This file adds the updated_at column to posts (used for the Last-Modified header of the post page).
+
+
+# External extensions:
+from sqlalchemy import text
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# text: A function for creating a plain SQL statement.
+'''
+
+
+# Migration settings:
+VERSION = 7
+DESCRIPTION = "Post updated_at column"
+
+
+def upgrade(connection):
+    '''
+    A function for applying the migration.
+
+    :param connection: Database connection (within the transaction of the migration).
+
+    Legend:
+    # PRAGMA table_info(post): Columns of the post table (the column may already exist - db.create_all()).
+    # ALTER TABLE ... ADD COLUMN: Adding a column to the existing table (a constant default is required).
+    # SET updated_at = date_posted: Existing posts are considered unchanged since they were posted.
+    '''
+
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(post)"))}
+    if 'updated_at' not in columns:
+        connection.execute(text(
+            "ALTER TABLE post ADD COLUMN updated_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00.000000'"
+        ))
+        connection.execute(text("UPDATE post SET updated_at = date_posted"))
@@ -6,12 +6,16 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import current_user, login_required
 from flask_babel import lazy_gettext
+from sqlalchemy.orm import undefer
+from datetime import datetime
 '''
 (Legend)
 From:
 # flask: A micro web framework provides libraries to build web applications.
 # flask_login: A Flask extension that provides user session management.
 # flask_babel: A Flask extension that provides internationalization and localization.
+# sqlalchemy.orm: A module of SQLAlchemy for working with database objects.
+# datetime: A library for date and time functions.
 
 Import:
 # Blueprint: A class providing structuring of the application.
@@ -24,26 +28,63 @@ Import:
 # current_user: A function returns the proxy of the logged user.
 # login_required: A function to verify if the user is login.
 # lazy_gettext: A function to mark text for lazy translation (translation is delayed until needed).
+# undefer: Loading a deferred column together with the post (here the post content).
+# datetime: Module for date and time objects.
 '''
 
 
 # Internal extensions:
-from flaskblog import Locale, db
+from flaskblog import get_locale, db
 from flaskblog.db_models import Post, User
 from flaskblog.posts.forms import PostForm
+from flaskblog.main.utils import invalidate_translations, pending_translations, translate_posts, find_translation
+from flaskblog.main.workers import translation_workers
+from flaskblog.main.language import detect_language
+from flaskblog.posts.utils import with_authors, paginate_posts, post_count, count_post, set_content, make_excerpt
+from flaskblog.posts.utils import touch_feeds, post_validators, user_posts_validators
+from flaskblog.cache import response_cache, conditional, POSTS_TAG, post_tag, post_tags, user_tag
+from flaskblog.streaming import template_streaming
 '''
 (Legend)
 From:
 # flaskblog: __init__.py file in the root directory.
 # flaskblog.db_models: The db_models.py file in the root directory.
 # flaskblog.posts.forms: The forms.py file in the posts folder in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+# flaskblog.main.workers: The workers.py file in the main folder in the root directory.
+# flaskblog.main.language: The language.py file in the main folder in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+# flaskblog.cache: The cache.py file in the root directory.
+# flaskblog.streaming: The streaming.py file in the root directory.
 
 Import:
-# Locale: A class providing language settings.
+# get_locale: A function returning the page language of the current request.
 # db: An instance of SQLAlchemy class (used for databases).
 # Post: A class with defined columns for the posts database table.
 # User: A class with defined columns for the users database table.
 # PostForm: A class to manage the form data on the page (here for adding a new post).
+# invalidate_translations: A function for deleting stored translations of a post.
+# pending_translations: A function for finding posts whose translation is being prepared.
+# translate_posts: A function for getting translations of all posts on a page (translated in batches).
+# find_translation: A function for finding the stored translation of the current post text.
+# translation_workers: A pool of background threads translating new and updated posts.
+# detect_language: A function for detecting the language of a post from its text.
+# with_authors: A function for loading the authors of listed posts together with the posts.
+# paginate_posts: A function for reading one page of posts (keyset or page-number pagination).
+# post_count: A function for getting the number of posts from the maintained counter.
+# count_post: A function for changing the counters of posts (committed together with the post).
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+# make_excerpt: A function for creating an excerpt of the post content.
+# touch_feeds: A function for increasing the versions of the feeds displaying posts of an author.
+# post_validators: A function for the ETag and Last-Modified of the post page.
+# user_posts_validators: A function for the ETag and Last-Modified of the page with user posts.
+# response_cache: The cache of whole pages shared by all readers.
+# conditional: A decorator of a view answering conditional requests (304 Not Modified without rendering).
+# POSTS_TAG: Tag of all pages with a list of posts.
+# post_tag: A function for the tag of pages displaying a post.
+# post_tags: A function for the tags of a page with a list of posts (posts and their authors).
+# user_tag: A function for the tag of pages displaying a user.
+# template_streaming: The streaming of long pages (sent in parts while they are rendered).
 '''
 
 
@@ -51,6 +92,25 @@ Import:
 posts = Blueprint('posts', __name__)
 
 
+@posts.app_template_filter('excerpt')
+def excerpt_filter(content):
+    '''
+    Template filter for an excerpt of a text (used for translated posts on the pages with a list of posts).
+
+    :param content: The text (e.g. translated content of the post).
+    :return: The excerpt of the text.
+
+    Legend:
+    Decorator:
+    # @posts.app_template_filter('excerpt'): Registering the filter for all templates ({{ text | excerpt }}).
+
+    Excerpt:
+    # make_excerpt(): A function for creating an excerpt (the same as the stored excerpt of the post).
+    '''
+
+    return make_excerpt(content)
+
+
 @posts.route("/post/new", methods=['GET', 'POST'])
 @login_required
 def new_post():
@@ -71,8 +131,16 @@ def new_post():
 
     Entering data into database:
     # post: An instance of the Post class for post data.
+    # detect_language(): The language of the post is detected from its text (the page language if it is not clear).
+    # set_content(): Setting the content together with the excerpt and number of words.
     # db.session.add(post): Adding data to the database.
+    # count_post(): Increasing the counters of posts (in the same commit as the post).
+    # touch_feeds(): New versions of the feeds of all posts and of the author (in the same commit as the post).
     # db.session.commit(): Commit changes to the database.
+    # response_cache.invalidate(POSTS_TAG): Removing stored pages with a list of posts (the new post is added).
+
+    Background translation:
+    # translation_workers.enqueue(post): Adding translations of the post into other languages to the queue.
 
     Info message:
     # flash(): A function for display an informational messages.
@@ -88,7 +156,7 @@ def new_post():
     # title='New Post': Page title.
     # form=form: Page form.
     # legend=lazy_gettext('New Post'): The name of the page.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
 
     '''
 
@@ -99,12 +167,18 @@ def new_post():
         # (entering data into database):
         post = Post(
             title=form.title.data,
-            content=form.content.data,
             author=current_user,
-            language=Locale.current.language
+            language=detect_language(form.title.data, form.content.data, get_locale().language)
         )
+        set_content(post, form.content.data)
         db.session.add(post)
+        count_post(current_user.id, 1)
+        touch_feeds(current_user.id)
         db.session.commit()
+        response_cache.invalidate(POSTS_TAG)
+
+        # (background translation):
+        translation_workers.enqueue(post)
 
         # (info message & redirecting):
         flash(lazy_gettext("Your post has been created!"), 'success')
@@ -115,11 +189,13 @@ def new_post():
         'posts_create_post.html',
         title=lazy_gettext('New Post'),
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
 
 @posts.route("/post/<int:post_id>")
+@conditional(post_validators)
+@response_cache.cached
 def post(post_id):
     '''
     Route function for creating a selected post page.
@@ -130,38 +206,51 @@ def post(post_id):
     Legend:
     Decorator:
     # @users.route("/post/<int:post_id>"): Defining the page address (by root directory).
+    # @conditional(post_validators): The page is not rendered if the reader has its current version (304).
+    # @response_cache.cached: The page is stored for all readers (the parts of the reader are filled in).
 
     Post retrieving:
     # Post.query: Query for the Post database table.
+    # options(undefer(Post.content)): Loading the content together with the post (it is deferred on other pages).
     # get_or_404(post_id): Return the value (based on post ID) or raise a 404 error.
 
     Translation:
-    # Locale.post_to_translate[:]: The contents of the post_to_translate list of the Locale class attribute.
+    # request.args.get('translated', 0, type=int): Settings for displaying the post translated (set by main.translate).
+    # find_translation(): A function for finding the stored translation of the current post text.
+    # status == 'done': Only a finished translation is displayed.
+
+    Cache tags:
+    # response_cache.tag(): The stored page is removed when the post or its author is changed.
 
     Page rendering:
-    # render_template(): A function for rendering of an html template (based on the Jinja2 engine).
+    # template_streaming.render(): The page is sent in parts while it is rendered (the head of the page at once).
     # 'posts_post.html': Name of the html file (in the template directory).
     # title=post.title: Page title.
     # post=post: Post.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
-    # translate=translate: The contents of the post_to_translate list of the Locale class attribute / None.
+    # language=get_locale().language: The current page language (selected for the user of the request).
+    # translation=translation: The stored translation of the post / None.
     '''
 
     # Post retrieving:
-    post = Post.query.get_or_404(post_id)
+    post = Post.query.options(undefer(Post.content)).get_or_404(post_id)
 
     # Translation:
-    translate = Locale.post_to_translate[:]
-    if translate != [None]:
-        Locale.post_to_translate = [None]
+    translation = None
+    if request.args.get('translated', 0, type=int):
+        translation = find_translation(post, get_locale().language)
+        if translation and translation.status != 'done':
+            translation = None
+
+    # Cache tags:
+    response_cache.tag(post_tag(post.id), user_tag(post.author_id))
 
     # Page rendering:
-    return render_template(
+    return template_streaming.render(
         'posts_post.html',
         title=post.title,
         post=post,
-        language=Locale.current.language,
-        translate=translate
+        language=get_locale().language,
+        translation=translation
     )
 
 
@@ -196,7 +285,15 @@ def update_post(post_id):
     Entering data into database:
     # post.xxx: Data from the post's database table.
     # form.xxx.data: Page form data.
+    # invalidate_translations(post): Deleting stored translations (only if the title or content has changed).
+    # set_content(): Setting the content together with the excerpt and number of words.
+    # detect_language(): The language of the changed post is detected again (the previous one if it is not clear).
+    # post.version += 1: A new version of the post (its cached fragments are no longer used).
+    # post.updated_at: Date of the change (the Last-Modified header of the post page).
+    # touch_feeds(): New versions of the feeds displaying the post.
     # db.session.commit(): Commit changes to the database.
+    # response_cache.invalidate(post_tag(post.id)): Removing stored pages displaying the post.
+    # translation_workers.enqueue(post): Adding new translations of the post to the queue.
 
     Info message:
     # flash(): A function for display an informational messages.
@@ -218,7 +315,7 @@ def update_post(post_id):
     # title=lazy_gettext('Update Post'): Page title.
     # form=form: Page form.
     # legend=lazy_gettext('Update Post'): The name of the page.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     '''
 
     # Post retrieving:
@@ -233,9 +330,22 @@ def update_post(post_id):
     if form.validate_on_submit():
 
         # (entering data into database):
+        text_changed = post.title != form.title.data or post.content != form.content.data
+        if text_changed:
+            invalidate_translations(post)
         post.title = form.title.data
-        post.content = form.content.data
+        set_content(post, form.content.data)
+        if text_changed:
+            post.language = detect_language(post.title, post.content, post.language)
+        post.version += 1
+        post.updated_at = datetime.utcnow()
+        touch_feeds(post.author_id)
         db.session.commit()
+        response_cache.invalidate(post_tag(post.id))
+
+        # (background translation):
+        if text_changed:
+            translation_workers.enqueue(post)
 
         # (info message & redirecting):
         flash(lazy_gettext("Your post has been updated!"), 'success')
@@ -251,7 +361,7 @@ def update_post(post_id):
         'posts_create_post.html',
         title=lazy_gettext('Update Post'),
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
 
@@ -282,7 +392,10 @@ def delete_post(post_id):
 
     Deleting post:
     # db.session.delete(post): Deleting a post from the database.
+    # count_post(): Decreasing the counters of posts (in the same commit as the deletion).
+    # touch_feeds(): New versions of the feeds of all posts and of the author (in the same commit as the deletion).
     # db.session.commit(): Commit changes to the database.
+    # response_cache.invalidate(): Removing stored pages with a list of posts and pages displaying the post.
 
     Info message:
     # flash(): A function for display an informational messages.
@@ -302,7 +415,10 @@ def delete_post(post_id):
 
     # Deleting post:
     db.session.delete(post)
+    count_post(post.author_id, -1)
+    touch_feeds(post.author_id)
     db.session.commit()
+    response_cache.invalidate(POSTS_TAG, post_tag(post.id))
 
     # Info message & Redirecting:
     flash(lazy_gettext("Your post has been deleted!"), 'success')
@@ -310,6 +426,8 @@ def delete_post(post_id):
 
 
 @posts.route("/user/<string:username>")
+@conditional(user_posts_validators)
+@response_cache.cached
 def user_posts(username):
     '''
     Route function for creating a page with user posts.
@@ -317,9 +435,9 @@ def user_posts(username):
     :param username: Username.
     :return: Page with user posts.
 
-    Create a variable with the page number:
+    Create a variable with the translation settings:
     # request.args.get(): A method to access the URL parameter value.
-    # 'page', 1, type=int: Page counter settings.
+    # 'translated', 0, type=int: Settings for displaying all posts on the page translated (1) or original (0).
 
     User verification:
     # User.query: Query for the User database table.
@@ -329,33 +447,54 @@ def user_posts(username):
     Posts retrieving:
     # Post.query: Query for the Post database table.
     # .filter_by(author=user):  Search parameters.
-    # .order_by(Post.date_posted.desc()): Sorting the result by date, descending.
-    # .paginate(page=page, per_page=5): Setting the number of posts per page.
+    # with_authors(): Loading the authors together with the posts (the page does not query each author separately).
+    # undefer(Post.content): The content is loaded only for the translated page (otherwise the excerpt is displayed).
+    # paginate_posts(): Reading one page sorted by date, descending (cursors newer/older, or page numbers).
+    # post_count(user.id): Number of the user's posts (from the maintained counter), read only for the page numbers
+      ('pages' mode) - the keyset pages show the name of the author without the number of posts.
+
+    Cache tags:
+    # response_cache.tag(): The stored page is removed when posts are added or deleted, or a listed post is changed.
+
+    Translation:
+    # translate_posts(): Translations of all posts on the page (missing ones are translated in batches).
 
     Page rendering:
-    # render_template(): A function for rendering of an html template (based on the Jinja2 engine).
+    # template_streaming.render(): The page is sent in parts while it is rendered (the head of the page at once).
     # 'posts_user_posts.html': Name of the html file (in the template directory).
     # posts=posts: Posts data.
     # user=user: User data.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
+    # pending=pending_translations(): IDs of posts whose translation is being prepared.
+    # translated=translated: Settings for displaying the posts translated.
+    # translations=translations: A dictionary of translations by post ID.
     '''
 
-    # Create a variable with the page number:
-    page = request.args.get('page', 1, type=int)
+    # Create a variable with the translation settings:
+    translated = request.args.get('translated', 0, type=int)
 
     # User verification:
     user = User.query.filter_by(username=username).first_or_404()
 
     # Posts retrieving:
-    posts = Post.query\
-        .filter_by(author=user)\
-        .order_by(Post.date_posted.desc())\
-        .paginate(page=page, per_page=5)
+    query = with_authors(Post.query).filter_by(author=user)
+    if translated:
+        query = query.options(undefer(Post.content))
+    posts = paginate_posts(query, lambda: post_count(user.id))
+
+    # Cache tags:
+    response_cache.tag(POSTS_TAG, user_tag(user.id), *post_tags(posts.items))
+
+    # Translation:
+    translations = translate_posts(posts.items, get_locale().language) if translated else {}
 
     # Page rendering:
-    return render_template(
+    return template_streaming.render(
         'posts_user_posts.html',
         posts=posts,
         user=user,
-        language=Locale.current.language
+        language=get_locale().language,
+        pending=pending_translations(posts.items, get_locale().language),
+        translated=translated,
+        translations=translations
     )
\ No newline at end of file
@@ -0,0 +1,483 @@
+# FILE FOR ADDITIONAL FUNCTIONS ASSOCIATED WITH POSTS #
+# This file is used to define functions for retrieving posts on pages with a list of posts.
+
+
+# External extensions:
+from flask import current_app, request
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, lazyload
+from datetime import datetime
+import re
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# sqlalchemy: A library for working with databases.
+# sqlalchemy.exc: A module with SQLAlchemy exceptions.
+# sqlalchemy.orm: A module of SQLAlchemy for working with database objects.
+# datetime: A library for date and time functions.
+
+Import:
+# current_app: A function providing access to a running application.
+# request: A function to process data sent from the client to the server.
+# tuple_: A function for comparing several columns at once (date_posted, id).
+# IntegrityError: An exception raised when a database constraint is violated.
+# joinedload: Loading of related objects in the same query (LEFT OUTER JOIN).
+# selectinload: Loading of related objects in one additional query for the whole page (SELECT ... IN).
+# lazyload: Loading of related objects one by one on first access (one query per object).
+# datetime: Module for date and time objects.
+# re: A module for regular expressions (here words of the post content).
+'''
+
+
+# Internal extensions:
+from flaskblog import db, get_locale
+from flaskblog.db_models import Post, User, Translation, Counter
+from flaskblog.cache import make_etag
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.cache: The cache.py file in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# get_locale: A function returning the page language of the current request.
+# Post: A class with defined columns for the posts database table.
+# User: A class with defined columns for the users database table.
+# Translation: A class with defined columns for the translations database table.
+# Counter: A class with defined columns for the counter database table (maintained counts).
+# make_etag: A function for creating the ETag of the requested page.
+'''
+
+
+# Excerpt settings:
+EXCERPT_LENGTH = 300
+WORD_PATTERN = re.compile(r'\S+')
+'''
+(Legend)
+# EXCERPT_LENGTH: Maximum number of characters of the excerpt (displayed on the pages with a list of posts).
+# WORD_PATTERN: A regular expression for words (sequences of non-space characters).
+'''
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    '''
+    A function for creating an excerpt of the post content (the beginning of the content, cut after a whole word).
+
+    :param content: Content of the post.
+    :param length: Maximum number of characters of the excerpt.
+    :return: The excerpt (ending with "…" if the content is longer).
+
+    Legend:
+    # content[:length + 1]: One character more shows whether the last word is cut.
+    # rsplit(None, 1)[0]: Removing the cut word (if the excerpt has more words).
+    # rstrip(): Removing white space and punctuation before "…".
+    '''
+
+    content = content.strip()
+    if len(content) <= length:
+        return content
+
+    excerpt = content[:length + 1]
+    if not excerpt[-1].isspace() and len(excerpt.split(None, 1)) > 1:
+        excerpt = excerpt.rsplit(None, 1)[0]
+
+    return excerpt[:length].rstrip(' \t\r\n.,;:-') + '…'
+
+
+def count_words(content):
+    '''
+    A function for counting words of the post content.
+
+    :param content: Content of the post.
+    :return: Number of words.
+    '''
+
+    return sum(1 for _ in WORD_PATTERN.finditer(content))
+
+
+def set_content(post, content):
+    '''
+    A function for setting the content of a post together with its excerpt and number of words.
+
+    :param post: The post (new or edited).
+    :param content: The new content.
+    :return: None (the caller commits the change).
+
+    Legend:
+    # make_excerpt(): The excerpt stored for the pages with a list of posts (the content is not loaded there).
+    # count_words(): Number of words stored with the post.
+    '''
+
+    post.content = content
+    post.excerpt = make_excerpt(content)
+    post.word_count = count_words(content)
+
+
+# Strategies of loading the post authors (by the name used in POSTS_AUTHOR_LOADING):
+AUTHOR_LOADERS = {
+    'joined': joinedload,
+    'selectin': selectinload,
+    'lazy': lazyload
+}
+
+
+def with_authors(query):
+    '''
+    A function for loading the authors of listed posts together with the posts (instead of one query per post).
+
+    :param query: Query for the Post database table.
+    :return: The query with the selected loading strategy of the authors.
+
+    Legend:
+    # POSTS_AUTHOR_LOADING: Strategy of loading the authors - 'joined', 'selectin' or 'lazy' (from the configuration).
+    # AUTHOR_LOADERS: A dictionary of loading strategies.
+    # Post.author: Relationship to the author of the post (backref of User.posts).
+    # options(): Setting the loading strategy for this query only.
+    '''
+
+    strategy = current_app.config['POSTS_AUTHOR_LOADING']
+    if strategy not in AUTHOR_LOADERS:
+        raise ValueError(f"Unknown author loading {strategy!r} (available: {', '.join(AUTHOR_LOADERS)}).")
+
+    return query.options(AUTHOR_LOADERS[strategy](Post.author))
+
+
+# Format of the date in the cursor (the position in the list of posts):
+CURSOR_DATE_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def encode_cursor(post):
+    '''
+    A function for creating a cursor of a post (its position in the list of posts, used in the page links).
+
+    :param post: The post.
+    :return: The cursor (e.g. "20230909101500123456-35").
+
+    Legend:
+    # CURSOR_DATE_FORMAT: Date of the post with microseconds (without characters needing escaping in the URL).
+    # post.id: The ID of the post (distinguishes posts with the same date).
+    '''
+
+    return f'{post.date_posted.strftime(CURSOR_DATE_FORMAT)}-{post.id}'
+
+
+def decode_cursor(cursor):
+    '''
+    A function for reading a cursor from the page link.
+
+    :param cursor: The cursor (e.g. "20230909101500123456-35").
+    :return: Date and ID of the post (ValueError for an invalid cursor).
+
+    Legend:
+    # partition('-'): Splitting the cursor into the date and the ID.
+    # datetime.strptime(): Reading the date in the CURSOR_DATE_FORMAT.
+    '''
+
+    date, _, post_id = cursor.partition('-')
+    return datetime.strptime(date, CURSOR_DATE_FORMAT), int(post_id)
+
+
+class KeysetPage:
+    '''
+    A class for one page of posts in the keyset (cursor) pagination.
+
+    Instead of skipping the posts of previous pages (OFFSET) and counting all posts (COUNT), the page starts
+    right after the last post of the previous page (WHERE (date_posted, id) < cursor) and is read from the index,
+    so every page costs the same regardless of its depth.
+
+    Attributes:
+    # items: Posts of the page (from the newest).
+    # per_page: Number of posts per page.
+    # total: None - the posts of the list are not counted (the same attribute as in Pagination of the 'pages' mode).
+    # has_newer: There are newer posts (link to the previous page).
+    # has_older: There are older posts (link to the next page).
+    # newer_args: URL parameters of the link to the newer posts.
+    # older_args: URL parameters of the link to the older posts.
+    # position: URL parameters of the current page (e.g. for the link to translate the page).
+    '''
+
+    def __init__(self, query, per_page, older=None, newer=None):
+        '''
+        Method for reading one page of posts.
+
+        :param query: Query for the Post database table (with filters, without sorting).
+        :param per_page: Number of posts per page.
+        :param older: Cursor of the post after which the page starts (link "older").
+        :param newer: Cursor of the post before which the page ends (link "newer").
+
+        Legend:
+        Posts newer than the cursor:
+        # tuple_(Post.date_posted, Post.id) > : Posts after the cursor in the ascending order.
+        # limit(per_page + 1): One post more shows whether there are other posts behind the page.
+        # reverse(): The page is displayed from the newest post.
+
+        Posts older than the cursor (or the first page):
+        # tuple_(Post.date_posted, Post.id) < : Posts after the cursor in the descending order.
+        # older is not None: A page after the cursor always has newer posts.
+        '''
+
+        self.per_page = per_page
+        self.total = None
+
+        # Posts newer than the cursor:
+        if newer is not None:
+            posts = query\
+                .filter(tuple_(Post.date_posted, Post.id) > decode_cursor(newer))\
+                .order_by(Post.date_posted.asc(), Post.id.asc())\
+                .limit(per_page + 1)\
+                .all()
+            self.has_newer = len(posts) > per_page
+            self.has_older = True
+            self.items = posts[:per_page]
+            self.items.reverse()
+            self.position = {'newer': newer}
+
+        # Posts older than the cursor (or the first page):
+        else:
+            if older is not None:
+                query = query.filter(tuple_(Post.date_posted, Post.id) < decode_cursor(older))
+            posts = query\
+                .order_by(Post.date_posted.desc(), Post.id.desc())\
+                .limit(per_page + 1)\
+                .all()
+            self.has_newer = older is not None
+            self.has_older = len(posts) > per_page
+            self.items = posts[:per_page]
+            self.position = {'older': older} if older is not None else {}
+
+        # Links to the newer and older posts (a page without posts links to the first page):
+        self.newer_args = {'newer': encode_cursor(self.items[0])} if self.items else {}
+        self.older_args = {'older': encode_cursor(self.items[-1])} if self.items else {}
+
+
+def paginate_posts(query, count=None):
+    '''
+    A function for reading one page of posts (according to the pagination mode in the configuration).
+
+    :param query: Query for the Post database table (with filters, without sorting).
+    :param count: A function returning the number of all posts of the list (e.g. post_count), called only in the
+                  'pages' mode - the keyset pages need no number of posts.
+    :return: The page of posts (KeysetPage, or Pagination of Flask-SQLAlchemy in the 'pages' mode).
+
+    Legend:
+    # POSTS_PER_PAGE: Number of posts per page (from the configuration).
+    # PAGINATION_MODE: 'keyset' (links newer/older, the same cost of every page) or 'pages' (page numbers).
+
+    Page numbers:
+    # request.args.get('page', 1, type=int): The page number from the URL.
+    # paginate(): Reading the page (OFFSET), the posts are counted (COUNT) only if no count function is given.
+    # posts.total = count(): The maintained count is used for the page numbers.
+    # posts.position: URL parameters of the current page (the same attribute as in KeysetPage).
+
+    Cursors:
+    # request.args.get('older'), request.args.get('newer'): The cursor from the URL.
+    # ValueError: An invalid cursor (the first page is displayed).
+    '''
+
+    per_page = current_app.config['POSTS_PER_PAGE']
+
+    # Page numbers:
+    if current_app.config['PAGINATION_MODE'] == 'pages':
+        posts = query\
+            .order_by(Post.date_posted.desc(), Post.id.desc())\
+            .paginate(page=request.args.get('page', 1, type=int), per_page=per_page, count=count is None)
+        if count is not None:
+            posts.total = count()
+        posts.position = {'page': posts.page}
+        return posts
+
+    # Cursors:
+    try:
+        return KeysetPage(query, per_page, request.args.get('older'), request.args.get('newer'))
+    except ValueError:
+        return KeysetPage(query, per_page)
+
+
+def counter_name(author_id=None):
+    '''
+    A function for the name of the counter of posts.
+
+    :param author_id: The ID of the author (None for all posts).
+    :return: Name of the counter ('posts' or 'posts_author_<ID>').
+    '''
+
+    return 'posts' if author_id is None else f'posts_author_{author_id}'
+
+
+def post_count(author_id=None):
+    '''
+    A function for getting the number of posts from the maintained counter (instead of counting all posts).
+
+    :param author_id: The ID of the author (None for all posts).
+    :return: Number of posts.
+
+    Legend:
+    # Counter.query: Query for the Counter database table.
+    # counter is None: The counter does not exist yet, the posts are counted once and the counter is stored.
+    # count(): Counting the posts (SELECT COUNT).
+    # IntegrityError: The counter was stored by another request in the meantime (the stored one is used).
+    '''
+
+    name = counter_name(author_id)
+    counter = Counter.query.filter_by(name=name).first()
+
+    # (new counter):
+    if counter is None:
+        query = Post.query if author_id is None else Post.query.filter_by(author_id=author_id)
+        counter = Counter(name=name, value=query.count())
+        db.session.add(counter)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return post_count(author_id)
+
+    return counter.value
+
+
+def count_post(author_id, change):
+    '''
+    A function for changing the counters of posts after a post is added or deleted (all posts and the author's).
+
+    :param author_id: The ID of the author of the post.
+    :param change: Change of the count (1 for a new post, -1 for a deleted post).
+    :return: None (the caller commits the change together with the post).
+
+    Legend:
+    # Counter.query: Query for the Counter database table.
+    # update(): Changing the value in the database (value = value + change, safe for concurrent requests).
+    # synchronize_session=False: The objects loaded in the session are not changed (they are reloaded after commit).
+    # A missing counter is not created here (post_count() counts the posts when it is first needed).
+    '''
+
+    for name in (counter_name(), counter_name(author_id)):
+        Counter.query\
+            .filter_by(name=name)\
+            .update({'value': Counter.value + change}, synchronize_session=False)
+
+
+def feed_name(author_id=None):
+    '''
+    A function for the name of the version of a feed (a page with a list of posts).
+
+    :param author_id: The ID of the author (None for the feed of all posts).
+    :return: Name of the counter ('feed' or 'feed_author_<ID>').
+    '''
+
+    return 'feed' if author_id is None else f'feed_author_{author_id}'
+
+
+def feed_version(author_id=None):
+    '''
+    A function for getting the version of a feed (increased with every change displayed on the feed).
+
+    :param author_id: The ID of the author (None for the feed of all posts).
+    :return: The counter of the feed (value = version, date_updated = date of the last change).
+
+    Legend:
+    # Counter.query: Query for the Counter database table.
+    # counter is None: The version does not exist yet, it is stored with the value 0.
+    # IntegrityError: The version was stored by another request in the meantime (the stored one is used).
+    '''
+
+    name = feed_name(author_id)
+    counter = Counter.query.filter_by(name=name).first()
+
+    # (new version):
+    if counter is None:
+        counter = Counter(name=name, value=0)
+        db.session.add(counter)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return feed_version(author_id)
+
+    return counter
+
+
+def touch_feeds(author_id):
+    '''
+    A function for increasing the versions of the feeds displaying posts of an author (all posts and the author's).
+
+    :param author_id: The ID of the author (of a new, changed or deleted post, or of a changed account).
+    :return: None (the caller commits the change).
+
+    Legend:
+    # update(): Changing the value in the database (value = value + 1, safe for concurrent requests).
+    # date_updated: Date of the change (the Last-Modified header of the feed).
+    # A missing version is not created here (feed_version() creates it when it is first needed).
+    '''
+
+    for name in (feed_name(), feed_name(author_id)):
+        Counter.query\
+            .filter_by(name=name)\
+            .update({'value': Counter.value + 1, 'date_updated': datetime.utcnow()}, synchronize_session=False)
+
+
+def home_validators():
+    '''
+    A function for the validators of the home page (conditional requests, without rendering the page).
+
+    :return: ETag and the date of the last change (Last-Modified).
+
+    Legend:
+    # feed_version(): The version of the feed of all posts.
+    # make_etag(): The ETag of the page (also by URL parameters, page language and the reader).
+    '''
+
+    feed = feed_version()
+    return make_etag(feed.value), feed.date_updated
+
+
+def user_posts_validators(username):
+    '''
+    A function for the validators of the page with user posts (conditional requests, without rendering the page).
+
+    :param username: Username.
+    :return: ETag and the date of the last change (Last-Modified).
+
+    Legend:
+    # first_or_404(): Return the first value found or raise a 404 error.
+    # feed_version(user.id): The version of the feed of the user's posts.
+    '''
+
+    user = User.query.filter_by(username=username).first_or_404()
+    feed = feed_version(user.id)
+    return make_etag(feed.value), feed.date_updated
+
+
+def post_validators(post_id):
+    '''
+    A function for the validators of the post page (conditional requests, without rendering the page).
+
+    :param post_id: The ID of the post.
+    :return: ETag and the date of the last change (Last-Modified).
+
+    Legend:
+    # get_or_404(post_id): Return the value (based on post ID) or raise a 404 error.
+    # post.version: Version of the post (increased with each edit).
+    # post.author: Username and profile picture of the author are displayed on the page.
+    # Translation.id, Translation.status: State of the translations (only for the translated page).
+    # post.updated_at: Date of the last change of the post.
+    '''
+
+    post = Post.query.get_or_404(post_id)
+
+    translations = []
+    if request.args.get('translated', 0, type=int):
+        translations = db.session.query(Translation.id, Translation.status)\
+            .filter_by(post_id=post.id, language=get_locale().language)\
+            .order_by(Translation.id)\
+            .all()
+
+    return make_etag(
+        post.version,
+        post.author.username,
+        post.author.profile_picture,
+        [tuple(translation) for translation in translations]
+    ), post.updated_at
@@ -0,0 +1,2 @@
+# FILE TO INITIALIZE A FOLDER AS A BLUEPRINT APPLICATION VIEW EXTENSION #
+# This file can be empty, just because the folder contains it, the application considers it as a part of the view.
\ No newline at end of file
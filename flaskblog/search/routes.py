@@ -0,0 +1,110 @@
+# FILE FOR BUILDING WEB PAGES - SEARCH SUBSECTION #
+# This file is used to define and create the page with search results.
+
+
+# External extensions:
+from flask import Blueprint, render_template, request
+from sqlalchemy.exc import OperationalError
+import logging
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# sqlalchemy.exc: Exceptions of SQLAlchemy.
+
+Import:
+# Blueprint: A class providing structuring of the application.
+# render_template: A function to render the html template (based on the Jinja2 engine).
+# request: A function to process data sent from the client to the server.
+# OperationalError: An exception of the database (here a missing search index).
+# logging: A module for reporting events (here an unavailable search).
+'''
+
+
+# Internal extensions:
+from flaskblog import db, get_locale, locales
+from flaskblog.search.utils import match_query, search_posts
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.search.utils: The utils.py file in the search folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# get_locale: A function returning the page language of the current request.
+# locales: A list of all configured languages.
+# match_query: A function for creating the FTS5 query from the searched text.
+# search_posts: A function for reading one page of search results.
+'''
+
+
+# Logger settings:
+logger = logging.getLogger(__name__)
+
+
+# Page blueprint settings:
+search = Blueprint('search', __name__)
+
+
+@search.route("/search")
+def search_results():
+    '''
+    Route function for creating a page with search results.
+
+    :return: Page with search results.
+
+    Legend:
+    Decorator:
+    # @search.route("/search"): Defining the page address (by root directory).
+
+    Create variables with the search settings:
+    # request.args.get('q', ''): The searched text (from the search form).
+    # request.args.get('lang'): Language of the searched posts (only a configured language, otherwise all).
+    # locale.get_display_name(): Name of the language in the page language (for the language filter).
+
+    Search:
+    # match_query(): The FTS5 query (empty if the text has no words - nothing is searched).
+    # search_posts(): Reading one page of results ranked by relevance (cursors previous/next).
+    # OperationalError: The database has no search index (a database of an older version before
+      "flask migrate upgrade") - the page says that the search is not available instead of an error.
+
+    Page rendering:
+    # render_template(): A function for rendering of an html template (based on the Jinja2 engine).
+    # 'search_results.html': Name of the html file (in the template directory).
+    # results=results: Search results (None if nothing is searched).
+    # unavailable=unavailable: The search index is missing.
+    # search_text=search_text: The searched text (displayed in the search form).
+    # search_language=search_language: The language filter.
+    # languages=languages: A list of languages for the language filter (code, name).
+    # language=get_locale().language: The current page language (selected for the user of the request).
+    '''
+
+    # Create variables with the search settings:
+    search_text = request.args.get('q', '').strip()
+    search_language = request.args.get('lang')
+    languages = [(locale.language, locale.get_display_name(get_locale()).capitalize()) for locale in locales]
+    if search_language not in dict(languages):
+        search_language = None
+
+    # Search:
+    query = match_query(search_text)
+    results, unavailable = None, False
+    if query:
+        try:
+            results = search_posts(query, search_language)
+        except OperationalError:
+            db.session.rollback()
+            logger.warning("Search is not available (run 'flask migrate upgrade' to create the search index).")
+            unavailable = True
+
+    # Page rendering:
+    return render_template(
+        'search_results.html',
+        results=results,
+        unavailable=unavailable,
+        search_text=search_text,
+        search_language=search_language,
+        languages=languages,
+        language=get_locale().language
+    )
@@ -0,0 +1,259 @@
+# FILE FOR ADDITIONAL FUNCTIONS ASSOCIATED WITH SEARCH #
+# This file is used to define functions for full-text search of posts (FTS5 index created by migration 0005).
+
+
+# External extensions:
+from flask import current_app, request
+from markupsafe import Markup, escape
+from sqlalchemy import text, bindparam
+import re
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# markupsafe: A library for safe HTML strings (used by Jinja2).
+# sqlalchemy: A library for working with databases.
+
+Import:
+# current_app: A function providing access to a running application.
+# request: A function to process data sent from the client to the server.
+# Markup: A string that is displayed in the template without escaping (here the highlighted words).
+# escape: A function for escaping HTML characters of a text.
+# text: A function for creating a plain SQL statement.
+# bindparam: A function for a parameter of the SQL statement (here a list of IDs).
+# re: A module for regular expressions (here words of the searched text).
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post
+from flaskblog.posts.utils import with_authors
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: A class with defined columns for the posts database table.
+# with_authors: A function for loading the authors of listed posts together with the posts.
+'''
+
+
+# Search settings:
+QUERY_LENGTH = 200
+QUERY_TERMS = 10
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+SNIPPET_WORDS = 24
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+'''
+(Legend)
+# QUERY_LENGTH: Maximum number of characters of the searched text (the rest is ignored).
+# QUERY_TERMS: Maximum number of searched words.
+# TITLE_WEIGHT: Weight of a word found in the title (in the bm25 ranking).
+# CONTENT_WEIGHT: Weight of a word found in the content (in the bm25 ranking).
+# SNIPPET_WORDS: Number of words of the snippet (the part of the content around the found words).
+# HIGHLIGHT_START, HIGHLIGHT_END: Marks of the found words (replaced by <mark> after escaping the text).
+# TERM_PATTERN: A regular expression for words (the FTS5 query syntax of the user is not used).
+'''
+
+
+def match_query(search_text):
+    '''
+    A function for creating the FTS5 query from the searched text (posts containing all the words).
+
+    :param search_text: The searched text (from the search form).
+    :return: The FTS5 query (e.g. '"flask" "blog"'), or an empty string if the text has no words.
+
+    Legend:
+    # search_text[:QUERY_LENGTH]: Only the beginning of a long text is used.
+    # TERM_PATTERN.findall(): Words of the text (operators and quotes of the user are skipped).
+    # f'"{term}"': Each word as a phrase of the FTS5 query (words separated by spaces must all be found).
+    '''
+
+    terms = TERM_PATTERN.findall(search_text[:QUERY_LENGTH])[:QUERY_TERMS]
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def highlight(marked_text):
+    '''
+    A function for converting the found words marked by FTS5 into HTML.
+
+    :param marked_text: A text with the found words between HIGHLIGHT_START and HIGHLIGHT_END.
+    :return: A safe HTML string with the found words in <mark> tags.
+
+    Legend:
+    # escape(): The text of the post is escaped (the marks are not HTML characters and stay unchanged).
+    # Markup(): The result is displayed in the template without escaping.
+    '''
+
+    return Markup(
+        str(escape(marked_text))
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def encode_rank_cursor(rank, post_id):
+    '''
+    A function for creating a cursor of a search result (its position in the list of results).
+
+    :param rank: The bm25 rank of the result (a lower value is a better result).
+    :param post_id: The ID of the post (distinguishes results with the same rank).
+    :return: The cursor (e.g. "-2.0140845070422535e-06_35").
+
+    Legend:
+    # repr(rank): The exact value of the rank (the same value is read back from the cursor).
+    '''
+
+    return f'{rank!r}_{post_id}'
+
+
+def decode_rank_cursor(cursor):
+    '''
+    A function for reading a cursor of a search result from the page link.
+
+    :param cursor: The cursor (e.g. "-2.0140845070422535e-06_35").
+    :return: Rank and ID of the post (ValueError for an invalid cursor).
+
+    Legend:
+    # rpartition('_'): Splitting the cursor into the rank and the ID.
+    '''
+
+    rank, _, post_id = cursor.rpartition('_')
+    return float(rank), int(post_id)
+
+
+class SearchPage:
+    '''
+    A class for one page of search results in the keyset pagination (by rank and post ID).
+
+    The results are ordered by the bm25 rank (words found in the title weigh more than in the content),
+    and the page starts right after the last result of the previous page (WHERE (rank, id) > cursor).
+    The snippets with highlighted words are made only for the results of the page.
+
+    Attributes:
+    # items: Posts of the page (from the best result).
+    # titles: A dictionary of titles with highlighted words by post ID.
+    # snippets: A dictionary of content snippets with highlighted words by post ID.
+    # has_previous: There are better results (link to the previous page).
+    # has_next: There are worse results (link to the next page).
+    # previous_args: URL parameters of the link to the previous page.
+    # next_args: URL parameters of the link to the next page.
+    '''
+
+    def __init__(self, query, language, per_page, after=None, before=None):
+        '''
+        Method for reading one page of search results.
+
+        :param query: The FTS5 query (from match_query()).
+        :param language: Language of the searched posts (None for all languages).
+        :param per_page: Number of results per page.
+        :param after: Cursor of the result after which the page starts (link "next").
+        :param before: Cursor of the result before which the page ends (link "previous").
+
+        Legend:
+        Ranked results:
+        # bm25(post_search, TITLE_WEIGHT, CONTENT_WEIGHT): Rank of the post (a lower value is a better result).
+        # post_search MATCH :query: Posts containing all the searched words (read from the index).
+        # post.language = :language: The language filter (the post table is joined by the ID).
+        # (rank, id) > cursor, limit(per_page + 1): The page after the cursor (one result more shows the next page).
+
+        Posts:
+        # with_authors(): Loading the authors together with the posts.
+        # Post.id.in_(): Posts of the page (ordered by the rank afterwards).
+
+        Snippets:
+        # highlight(post_search, 0, ...): The title with the found words marked.
+        # snippet(post_search, 1, ...): The part of the content around the found words.
+        '''
+
+        # Ranked results:
+        parameters = {
+            'query': query,
+            'title_weight': TITLE_WEIGHT,
+            'content_weight': CONTENT_WEIGHT,
+            'limit': per_page + 1
+        }
+        conditions = ''
+        if language is not None:
+            conditions += ' AND post.language = :language'
+            parameters['language'] = language
+
+        if before is not None:
+            parameters['rank'], parameters['id'] = decode_rank_cursor(before)
+            position, order = 'WHERE (rank, id) < (:rank, :id)', 'rank DESC, id DESC'
+        elif after is not None:
+            parameters['rank'], parameters['id'] = decode_rank_cursor(after)
+            position, order = 'WHERE (rank, id) > (:rank, :id)', 'rank, id'
+        else:
+            position, order = '', 'rank, id'
+
+        ranked = db.session.execute(text(
+            "SELECT id, rank FROM ("
+            "SELECT post.id AS id, bm25(post_search, :title_weight, :content_weight) AS rank "
+            "FROM post_search JOIN post ON post.id = post_search.rowid "
+            f"WHERE post_search MATCH :query{conditions}) "
+            f"{position} ORDER BY {order} LIMIT :limit"
+        ), parameters).all()
+
+        more = len(ranked) > per_page
+        ranked = ranked[:per_page]
+        if before is not None:
+            ranked.reverse()
+            self.has_previous, self.has_next = more, True
+        else:
+            self.has_previous, self.has_next = after is not None, more
+
+        # Posts:
+        ids = [row.id for row in ranked]
+        posts = {post.id: post for post in with_authors(Post.query).filter(Post.id.in_(ids))} if ids else {}
+        self.items = [posts[post_id] for post_id in ids if post_id in posts]
+
+        # Snippets:
+        self.titles, self.snippets = {}, {}
+        if ids:
+            rows = db.session.execute(
+                text(
+                    "SELECT rowid, "
+                    "highlight(post_search, 0, :start, :end), "
+                    "snippet(post_search, 1, :start, :end, '…', :words) "
+                    "FROM post_search WHERE post_search MATCH :query AND rowid IN :ids"
+                ).bindparams(bindparam('ids', expanding=True)),
+                {'start': HIGHLIGHT_START, 'end': HIGHLIGHT_END, 'words': SNIPPET_WORDS, 'query': query, 'ids': ids}
+            )
+            for post_id, title, snippet in rows:
+                self.titles[post_id] = highlight(title)
+                self.snippets[post_id] = highlight(snippet)
+
+        # Links to the previous and next results:
+        self.previous_args = {'before': encode_rank_cursor(ranked[0].rank, ranked[0].id)} if ranked else {}
+        self.next_args = {'after': encode_rank_cursor(ranked[-1].rank, ranked[-1].id)} if ranked else {}
+
+
+def search_posts(query, language=None):
+    '''
+    A function for reading one page of search results (the position is read from the URL).
+
+    :param query: The FTS5 query (from match_query()).
+    :param language: Language of the searched posts (None for all languages).
+    :return: The page of results (SearchPage).
+
+    Legend:
+    # POSTS_PER_PAGE: Number of results per page (from the configuration).
+    # request.args.get('after'), request.args.get('before'): The cursor from the URL.
+    # ValueError: An invalid cursor (the first page is displayed).
+    '''
+
+    per_page = current_app.config['POSTS_PER_PAGE']
+
+    try:
+        return SearchPage(query, language, per_page, request.args.get('after'), request.args.get('before'))
+    except ValueError:
+        return SearchPage(query, language, per_page)
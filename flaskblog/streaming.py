@@ -0,0 +1,140 @@
+# FILE FOR THE STREAMING OF PAGES #
+# This file is used to send long pages (post, lists of posts) in parts while they are being rendered:
+# the head of the page with the navigation is sent at once, and the rest follows in chunks of a set size.
+
+
+# External extensions:
+from flask import current_app, render_template, stream_with_context, session, g
+from markupsafe import Markup
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+# markupsafe: A library for safe HTML strings (used by Jinja2).
+
+Import:
+# current_app: A function providing access to a running application.
+# render_template: A function to render the html template (used if the streaming is off).
+# stream_with_context: A function keeping the request for the rendering after the view returns.
+# session: A dictionary stored in the user's cookie (here the pending messages).
+# g: An object for storing data during one request (here the streaming and the holes of the response cache).
+# Markup: A string that is displayed in the template without escaping (here the mark of a flush).
+'''
+
+
+# Mark of the place where the page is sent at once (inserted by {{ stream_flush() }}):
+FLUSH_MARK = '<!--stream-flush-->'
+
+
+class TemplateStreaming:
+    '''
+    A class for the streaming of rendered pages.
+
+    The page is rendered by parts (Jinja2 template.generate()) and sent in chunks of STREAM_CHUNK_SIZE
+    characters, so the whole page is never built in memory, and the browser gets the head of the page
+    (CSS, navigation) before the post content is rendered - {{ stream_flush() }} in layout.html sends
+    everything rendered so far at once. The response cache stores a streamed page too (cache.py), and the
+    compression middleware compresses each chunk as it is sent (compression.py).
+
+    Attributes:
+    # enabled: Setting for streaming the pages (from the configuration, otherwise render_template).
+    # chunk_size: Number of characters of a sent chunk (from the configuration).
+    '''
+
+    def __init__(self, app=None):
+        '''
+        Method for creating the streaming.
+
+        :param app: The application (optional, can be set later by init_app).
+        '''
+
+        self.enabled = False
+        self.chunk_size = 0
+
+        if app is not None:
+            self.init_app(app)
+
+
+    def init_app(self, app):
+        '''
+        Method for assigning the streaming to the application.
+
+        :param app: The application.
+
+        Legend:
+        # STREAM_TEMPLATES: Setting for streaming the long pages.
+        # STREAM_CHUNK_SIZE: Number of characters of a sent chunk.
+        # app.jinja_env.globals: Functions available in all templates (here stream_flush).
+        # app.extensions: A dictionary of the application extensions.
+        '''
+
+        self.enabled = app.config['STREAM_TEMPLATES']
+        self.chunk_size = app.config['STREAM_CHUNK_SIZE']
+        app.jinja_env.globals['stream_flush'] = self.flush
+        app.extensions['template_streaming'] = self
+
+
+    def flush(self):
+        '''
+        Method for marking the place where the page is sent at once (called by {{ stream_flush() }} in templates).
+
+        :return: The mark of the flush (only if the page is being streamed, otherwise an empty string).
+        '''
+
+        return Markup(FLUSH_MARK) if g.get('streaming') else ''
+
+
+    def render(self, template_name, **context):
+        '''
+        Method for rendering a page as a streamed response (or as a whole page if the streaming is off).
+
+        :param template_name: Name of the html file (in the template directory).
+        :param context: Variables of the template.
+        :return: The streamed response (or the rendered page).
+
+        Legend:
+        # get_or_select_template(): The compiled template.
+        # update_template_context(): Variables of all templates (e.g. current_user, config).
+        # g.get('cache_holes'): Holes of the page being stored by the response cache (kept for the rendering).
+        # template.generate(): The page rendered part by part (each part is a short string).
+        # FLUSH_MARK: Everything rendered so far is sent at once (the mark itself is not sent).
+        # self.chunk_size: Rendered parts are joined into chunks of this size (a chunk is a write to the network).
+        # stream_with_context(): The rendering runs after the view returns (within the same request).
+        # '_flashes' in session: A page with pending messages is rendered whole - get_flashed_messages() removes them
+          from the session, which must happen before the session cookie is sent with the headers of the response.
+        '''
+
+        if not self.enabled or '_flashes' in session:
+            return render_template(template_name, **context)
+
+        app = current_app._get_current_object()
+        template = app.jinja_env.get_or_select_template(template_name)
+        app.update_template_context(context)
+        holes = g.get('cache_holes')
+
+        def generate():
+            g.streaming = True
+            if holes is not None:
+                g.cache_holes = holes
+
+            chunk, size = [], 0
+            for part in template.generate(context):
+                if FLUSH_MARK in part:
+                    before, _, after = part.partition(FLUSH_MARK)
+                    chunk.append(before)
+                    yield ''.join(chunk)
+                    chunk, size = [after], len(after)
+                    continue
+                chunk.append(part)
+                size += len(part)
+                if size >= self.chunk_size:
+                    yield ''.join(chunk)
+                    chunk, size = [], 0
+            if chunk:
+                yield ''.join(chunk)
+
+        return app.response_class(stream_with_context(generate()), mimetype='text/html')
+
+
+# Instance of the streaming (assigned to the application in create_app):
+template_streaming = TemplateStreaming()
@@ -29,10 +29,12 @@ Import:
 
 
 # Internal extensions:
-from flaskblog import Locale, db, bcrypt
+from flaskblog import get_locale, db, bcrypt
 from flaskblog.db_models import User
 from flaskblog.users.forms import RegistrationForm, LoginForm, UpdateAccountForm, RequestResetForm, ResetPasswordForm
 from flaskblog.users.utils import save_picture, send_reset_email
+from flaskblog.cache import response_cache, user_tag
+from flaskblog.posts.utils import touch_feeds
 '''
 (Legend)
 From:
@@ -40,9 +42,11 @@ From:
 # flaskblog.db_models: The db_models.py file in the root directory.
 # flaskblog.users.forms: The forms.py file in the users folder in the root directory.
 # flaskblog.users.utils: The utils.py file in the users folder in the root directory.
+# flaskblog.cache: The cache.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
 
 Import:
-# Locale: A class providing language settings.
+# get_locale: A function returning the page language of the current request.
 # db: An instance of SQLAlchemy class (used for databases).
 # bcrypt: An instance of Bcrypt class (used for encryption).
 # User: A class with defined columns for the users database table.
@@ -53,6 +57,9 @@ Import:
 # ResetPasswordForm: A class to manage the form data on the page (here for password reset, after request).
 # save_picture: A functions for processing and saving a profile picture.
 # send_reset_email: A function to send an email with a time token for password change.
+# response_cache: The cache of whole pages shared by all readers.
+# user_tag: A function for the tag of pages displaying a user.
+# touch_feeds: A function for increasing the versions of the feeds displaying posts of an author.
 '''
 
 
@@ -103,7 +110,7 @@ def register():
     # 'users_register.html': Name of the html file (in the template directory).
     # title='Register': Page title.
     # form=form: Page form.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     '''
 
     # User logging check:
@@ -135,7 +142,7 @@ def register():
         'users_register.html',
         title='Register',
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
 
@@ -184,7 +191,7 @@ def login():
     # 'users_login.html': Name of the html file (in the template directory).
     # title='Login': Page title.
     # form=form: Page form.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     '''
 
     # User logging check:
@@ -213,7 +220,7 @@ def login():
         'users_login.html',
         title='Login',
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
 
@@ -263,7 +270,9 @@ def account():
     # save_picture(): A functions for processing and saving a profile picture.
     # current_user: A function returns the proxy of the logged user.
     # form.xxx.data: Page form data.
+    # touch_feeds(): New versions of the feeds displaying the user's posts (username, profile picture).
     # db.session.commit(): Commit changes to the database.
+    # response_cache.invalidate(): Removing stored pages displaying the user (username, profile picture).
 
     Info message:
     # flash(): A function for display an informational messages.
@@ -289,7 +298,7 @@ def account():
     # title='Account': Page title.
     # profile_picture=profile_picture: Profile picture.
     # form=form: Page form.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     '''
 
     # Entry form validation:
@@ -301,7 +310,9 @@ def account():
             current_user.profile_picture = save_picture(form.picture.data)
         current_user.username = form.username.data
         current_user.email = form.email.data
+        touch_feeds(current_user.id)
         db.session.commit()
+        response_cache.invalidate(user_tag(current_user.id))
 
         # (info message & redirecting):
         flash(lazy_gettext("Your account has been updated!"), 'success')
@@ -321,7 +332,7 @@ def account():
         title='Account',
         profile_picture=profile_picture,
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
 
@@ -364,7 +375,7 @@ def reset_request():
     # 'users_reset_request.html': Name of the html file (in the template directory).
     # title='Reset Password': Page title.
     # form=form: Page form.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     '''
 
     # User logging check:
@@ -388,7 +399,7 @@ def reset_request():
         'users_reset_request.html',
         title='Reset Password',
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
 
@@ -425,7 +436,7 @@ def reset_token(token):
     # 'users_reset_token.html': Name of the html file (in the template directory).
     # title='Reset Password': Page title.
     # form=form: Page form.
-    # language=Locale.current.language: The current page language (based on the language attribute in the Locale class).
+    # language=get_locale().language: The current page language (selected for the user of the request).
     '''
 
     # User logging check:
@@ -460,6 +471,6 @@ def reset_token(token):
         'users_reset_token.html',
         title='Reset Password',
         form=form,
-        language=Locale.current.language
+        language=get_locale().language
     )
 
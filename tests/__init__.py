@@ -0,0 +1,2 @@
+# TESTS OF THE APPLICATION #
+# Run from the root directory: python -m pytest
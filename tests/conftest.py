@@ -0,0 +1,190 @@
+# SHARED SETTINGS OF THE TESTS #
+# This file is used to create the applications of the tests with their own temporary databases.
+
+
+# External extensions:
+from datetime import datetime, timedelta
+import json
+import os
+import shutil
+import tempfile
+import pytest
+'''
+(Legend)
+Import:
+# datetime, timedelta: Classes for date and time (here the dates of the test posts).
+# json: Built-in module for transferring data as text (here the configuration file).
+# os: A module for working with files and folders.
+# shutil: A module for copying and removing files (here the shipped database).
+# tempfile: A module for temporary folders.
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Working folder of the tests:
+WORKING_FOLDER = tempfile.mkdtemp(prefix='flaskblog-tests-')
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED_DATABASE = os.path.join(ROOT_FOLDER, 'instance', 'site.db')
+'''
+(Legend)
+# WORKING_FOLDER: config.py reads instance/config.json of the working folder when it is imported,
+  so the tests run in a temporary folder with their own configuration file.
+# ROOT_FOLDER: The root directory of the repository.
+# SHIPPED_DATABASE: The database of the repository (its schema is older than the models).
+'''
+
+os.makedirs(os.path.join(WORKING_FOLDER, 'instance'))
+with open(os.path.join(WORKING_FOLDER, 'instance', 'config.json'), 'w') as config_file:
+    json.dump({'SECRET_KEY': 'tests', 'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, config_file)
+os.chdir(WORKING_FOLDER)
+
+
+# Internal extensions:
+from flaskblog import create_app, db, bcrypt
+from flaskblog.db_models import User, Post
+from flaskblog.posts.utils import set_content
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# create_app: A function for creating the application.
+# db: An instance of SQLAlchemy class (used for databases).
+# bcrypt: An instance of Bcrypt class (used for encryption).
+# User, Post: Classes with defined columns for the database tables.
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+'''
+
+
+def pytest_configure(config):
+    '''
+    A function for registering the mark of the benchmarks.
+
+    Legend:
+    # benchmark: Tests measuring time, they run only with FLASKBLOG_BENCHMARK=1 (their results depend on the machine).
+    '''
+
+    config.addinivalue_line('markers', 'benchmark: a test measuring time (run with FLASKBLOG_BENCHMARK=1)')
+
+
+def pytest_collection_modifyitems(config, items):
+    '''
+    A function for skipping the benchmarks in the regular run of the tests.
+    '''
+
+    if os.environ.get('FLASKBLOG_BENCHMARK') == '1':
+        return
+
+    skip = pytest.mark.skip(reason='a benchmark (run with FLASKBLOG_BENCHMARK=1)')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    '''
+    A function for removing the working folder after all tests.
+    '''
+
+    os.chdir(ROOT_FOLDER)
+    shutil.rmtree(WORKING_FOLDER, ignore_errors=True)
+
+
+@pytest.fixture
+def database(tmp_path):
+    '''
+    Fixture with the path to an empty database of the test.
+    '''
+
+    return tmp_path / 'site.db'
+
+
+@pytest.fixture
+def shipped_database(database):
+    '''
+    Fixture with the path to a copy of the database of the repository (with the posts, without migrations).
+    '''
+
+    shutil.copyfile(SHIPPED_DATABASE, database)
+    return database
+
+
+@pytest.fixture
+def make_app(database):
+    '''
+    Fixture with a function for creating the application of the test.
+
+    Legend:
+    # settings: Settings of the test (the database of the test, no network, no caches, no CSRF).
+    # **changes: Settings of the test function (e.g. POSTS_PER_PAGE=25).
+    '''
+
+    def make(**changes):
+        settings = {
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+            'WTF_CSRF_ENABLED': False,
+            'TRANSLATOR_BACKEND': 'fake',
+            'CACHE_ENABLED': False,
+            'FRAGMENT_CACHE_MAX_BYTES': 0,
+            'COMPRESS_ENABLED': False
+        }
+        settings.update(changes)
+        return create_app(settings=settings)
+
+    return make
+
+
+@pytest.fixture
+def add_posts():
+    '''
+    Fixture with a function for adding an author with posts to the database.
+
+    Legend:
+    # date_posted: Each post is one minute newer than the previous one (from the start date).
+    # The counters of posts are created by post_count() when they are first needed.
+    '''
+
+    def add(app, count, username='author', start=datetime(2023, 1, 1)):
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com', password='password')
+            db.session.add(user)
+            for number in range(count):
+                post = Post(
+                    title=f'Post {number}',
+                    author=user,
+                    language='en',
+                    date_posted=start + timedelta(minutes=number)
+                )
+                set_content(post, f'Content of the post number {number}.')
+                db.session.add(post)
+            db.session.commit()
+            return user.id
+
+    return add
+
+
+@pytest.fixture
+def login():
+    '''
+    Fixture with a function for registering a reader and logging them in (any reader can register).
+
+    Legend:
+    # bcrypt.generate_password_hash(): The password is stored as by the registration.
+    # client.post('/login'): The session cookie of the logged reader is kept by the test client.
+    '''
+
+    def log_in(app, client, username='reader'):
+        with app.app_context():
+            password = bcrypt.generate_password_hash('password').decode('utf-8')
+            user = User(username=username, email=f'{username}@example.com', password=password)
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        client.post('/login', data={'email': f'{username}@example.com', 'password': 'password'})
+        return user_id
+
+    return log_in
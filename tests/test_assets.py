@@ -0,0 +1,153 @@
+# TESTS OF THE FINGERPRINTED STATIC ASSETS #
+# The build of the assets (names with the hash of the content, precompressed variants, manifest), their addresses,
+# the immutable headers, files that are not built, and the removal of the assets.
+
+
+# External extensions:
+import gzip
+import os
+from flask import url_for
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+
+Import:
+# gzip: A module for decompressing the precompressed variants.
+# os: A module for working with files and folders (here random data that cannot be compressed).
+# url_for: A function for creating the address of a static file.
+'''
+
+
+# Internal extensions:
+from flaskblog.assets import hashed_name
+'''
+(Legend)
+From:
+# flaskblog.assets: The assets.py file in the root directory.
+
+Import:
+# hashed_name: A function for the name of the built asset.
+'''
+
+
+# Content of the static folder of the tests:
+STYLE = b'body { margin: 0; padding: 0; }\n' * 100
+ICON = os.urandom(2000)
+GZIP = {'Accept-Encoding': 'gzip'}
+'''
+(Legend)
+# STYLE: A text file (its gzip variant is much smaller).
+# ICON: A file that cannot be compressed (no variant is kept).
+# GZIP: Headers of a browser accepting gzip.
+'''
+
+
+def make_assets(make_app, tmp_path, **changes):
+    '''
+    A function for the application with its own static folder (the static folder of the repository is not changed).
+
+    :return: The application and its assets.
+    '''
+
+    static = tmp_path / 'static'
+    (static / 'profile_pictures').mkdir(parents=True)
+    (static / 'main.css').write_bytes(STYLE)
+    (static / 'favicon.ico').write_bytes(ICON)
+    app = make_app(**changes)
+    app.static_folder = str(static)
+    return app, app.extensions['assets']
+
+
+def static_url(app, filename):
+    '''
+    A function for the address of a static file (as created by url_for in the templates).
+    '''
+
+    with app.test_request_context():
+        return url_for('static', filename=filename)
+
+
+def test_hashed_name():
+    '''
+    The name of the built asset contains the beginning of the hash of the content.
+    '''
+
+    first = hashed_name('css/main.css', b'a')
+    assert first.startswith('assets/css/main.') and first.endswith('.css')
+    assert len(first) == len('assets/css/main..css') + 12
+    assert hashed_name('css/main.css', b'a') == first != hashed_name('css/main.css', b'b')
+
+
+def test_build_writes_assets_and_manifest(make_app, tmp_path):
+    '''
+    The build copies each static file under its hashed name, keeps only the variants that are smaller,
+    and the addresses of the built files are created by url_for.
+    '''
+
+    app, assets = make_assets(make_app, tmp_path)
+
+    stats = assets.build(app)
+
+    style, icon = assets.files['main.css'], assets.files['favicon.ico']
+    assert stats['files'] == 2
+    assert (tmp_path / 'static' / style).read_bytes() == STYLE
+    assert gzip.decompress((tmp_path / 'static' / f'{style}.gz').read_bytes()) == STYLE
+    assert 'gzip' in assets.variants[style]
+    assert icon not in assets.variants
+    assert (tmp_path / 'static' / 'assets' / 'manifest.json').exists()
+    assert static_url(app, 'main.css') == f'/static/{style}'
+
+
+def test_built_asset_is_immutable(make_app, tmp_path):
+    '''
+    A built asset is sent with Cache-Control immutable for ASSETS_MAX_AGE, as the precompressed variant the browser
+    accepts (not compressed again by the middleware), a file that is not built is sent as before.
+
+    Legend:
+    # new.jpg: A profile picture uploaded after the build.
+    '''
+
+    app, assets = make_assets(make_app, tmp_path, COMPRESS_ENABLED=True, ASSETS_MAX_AGE=1000)
+    assets.build(app)
+    (tmp_path / 'static' / 'profile_pictures' / 'new.jpg').write_bytes(ICON)
+    client = app.test_client()
+    url = static_url(app, 'main.css')
+
+    compressed = client.get(url, headers=GZIP)
+    plain = client.get(url)
+    not_built = client.get(static_url(app, 'profile_pictures/new.jpg'))
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == STYLE
+    assert compressed.headers['Content-Type'].startswith('text/css')
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert 'Content-Encoding' not in plain.headers and plain.get_data() == STYLE
+    for response in (compressed, plain):
+        assert response.cache_control.immutable and response.cache_control.public
+        assert response.cache_control.max_age == 1000
+    assert not_built.get_data() == ICON
+    assert not not_built.cache_control.immutable
+
+
+def test_changed_file_gets_a_new_name(make_app, tmp_path):
+    '''
+    A changed file is built under a new name (the old asset is kept for pages stored by the browsers),
+    and after the removal of the assets the original names are used again.
+    '''
+
+    app, assets = make_assets(make_app, tmp_path)
+    assets.build(app)
+    old = assets.files['main.css']
+
+    (tmp_path / 'static' / 'main.css').write_bytes(STYLE + b'p { color: red; }\n')
+    assets.build(app)
+    new = assets.files['main.css']
+
+    assert new != old
+    assert (tmp_path / 'static' / old).exists() and (tmp_path / 'static' / new).exists()
+    assert static_url(app, 'main.css') == f'/static/{new}'
+
+    assets.clean(app)
+    assert not (tmp_path / 'static' / 'assets').exists()
+    assert static_url(app, 'main.css') == '/static/main.css'
@@ -0,0 +1,288 @@
+# TESTS OF THE CACHES AND CONDITIONAL REQUESTS #
+# Pages are stored and validated only when they display the current data, stored pages filled in with the parts
+# of each reader, pages removed by the tags of changed posts, conditional requests (304), fragments of posts
+# shared by the pages and readers, statistics of the caches.
+
+
+# External extensions:
+from datetime import datetime
+import pytest
+'''
+(Legend)
+From:
+# datetime: A library for date and time functions.
+
+Import:
+# datetime: Module for date and time objects (here the date of the added posts).
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.cache import FragmentCache
+from flaskblog.db_models import Post
+from flaskblog.main.workers import translation_workers
+from flaskblog.posts.utils import touch_feeds, set_content
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.cache: The cache.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main.workers: The workers.py file in the main folder in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# FragmentCache: A class for the cache of rendered page fragments.
+# Post: Class with defined columns for the database table of posts.
+# translation_workers: The pool of background threads translating new and updated posts.
+# touch_feeds: A function for increasing the versions of the feeds (called by the views changing posts).
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+'''
+
+
+# Headers of a browser asking for an English page:
+ENGLISH = {'Accept-Language': 'en'}
+
+
+def test_untranslated_page_is_not_stored_or_validated(make_app, add_posts):
+    '''
+    A list of posts displayed untranslated (the translator is not available) is rendered again by each request,
+    and the first request after the translator recovers displays the translations.
+
+    Legend:
+    # CACHE_ENABLED=True: The page would be stored for all readers.
+    # backend.fail: The fake translation backend fails (simulation of an unavailable translator).
+    # ETag, Last-Modified: Without validators the reader cannot get 304 for the untranslated page.
+    '''
+
+    app = make_app(CACHE_ENABLED=True)
+    add_posts(app, 3)
+    backend = app.extensions['translator'].backend
+    client = app.test_client()
+    url = '/?translated=1'
+
+    backend.fail = True
+    for _ in range(2):
+        response = client.get(url, headers={'Accept-Language': 'cs'})
+        assert '[cs]' not in response.get_data(as_text=True)
+        assert response.headers['X-Cache'] == 'MISS'
+        assert 'ETag' not in response.headers
+        assert 'Last-Modified' not in response.headers
+        assert response.headers['Cache-Control'] == 'no-cache'
+    assert app.extensions['response_cache'].stats()['stores'] == 0
+
+    backend.fail = False
+    response = client.get(url, headers={'Accept-Language': 'cs'})
+    assert '[cs]' in response.get_data(as_text=True)
+    assert 'ETag' in response.headers
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_stored_page_is_filled_in_for_each_reader(make_app, add_posts, login, streamed):
+    '''
+    A page stored for one reader is served to the others with their own navigation (the holes of the page),
+    and the session cookie of the reader who rendered it is not stored with the page.
+
+    Legend:
+    # streamed: The page stored while it is streamed (store_stream) or rendered whole.
+    # href="/logout": The navigation of a logged reader.
+    '''
+
+    app = make_app(CACHE_ENABLED=True, STREAM_TEMPLATES=streamed)
+    add_posts(app, 3)
+    anonymous, reader = app.test_client(), app.test_client()
+    login(app, reader)
+
+    first = reader.get('/', headers=ENGLISH)
+    first_page = first.get_data(as_text=True)
+    second = anonymous.get('/', headers=ENGLISH)
+    second_page = second.get_data(as_text=True)
+
+    assert first.headers['X-Cache'] == 'MISS' and second.headers['X-Cache'] == 'HIT'
+    assert 'href="/logout"' in first_page
+    assert 'href="/logout"' not in second_page and 'href="/login"' in second_page
+    assert 'Set-Cookie' not in second.headers
+    assert 'href="/logout"' in reader.get('/', headers=ENGLISH).get_data(as_text=True)
+
+
+def test_changed_post_removes_its_pages(make_app, login, monkeypatch):
+    '''
+    An edited post removes the stored pages displaying it (its page and the lists of posts),
+    the pages of other posts stay stored.
+
+    Legend:
+    # translation_workers.enqueue: The background translation of the edited post is left to the tests of the workers.
+    '''
+
+    app = make_app(CACHE_ENABLED=True)
+    client = app.test_client()
+    author_id = login(app, client)
+    monkeypatch.setattr(translation_workers, 'enqueue', lambda post: None)
+    with app.app_context():
+        for number in range(2):
+            post = Post(title=f'Post {number}', author_id=author_id, language='en')
+            set_content(post, f'Content of the post number {number}.')
+            db.session.add(post)
+        db.session.commit()
+
+    def x_cache(url):
+        response = client.get(url, headers=ENGLISH)
+        return response.headers['X-Cache'], response.get_data(as_text=True)
+
+    urls = ['/post/1', '/post/2', '/']
+    for url in urls:
+        x_cache(url)
+    assert [x_cache(url)[0] for url in urls] == ['HIT', 'HIT', 'HIT']
+
+    client.post('/post/1/update', data={'title': 'Edited post', 'content': 'Edited content.'})
+    pages = [x_cache(url) for url in urls]
+
+    assert [status for status, _ in pages] == ['MISS', 'HIT', 'MISS']
+    assert 'Edited post' in pages[0][1] and 'Edited post' in pages[2][1]
+    assert app.extensions['response_cache'].stats()['invalidations'] == 2
+
+
+def test_unchanged_page_is_not_modified(make_app, add_posts):
+    '''
+    A reader sending back the ETag or the date of the page gets 304 Not Modified until a post is added.
+
+    Legend:
+    # If-None-Match: The ETag of the page of the reader.
+    # If-Modified-Since: The date of the page of the reader (Last-Modified).
+    # Vary: The page depends on the session (Cookie) and on the language of the browser (Accept-Language).
+    # add_posts(), touch_feeds(): A new post changes the version of the feed (as in the view creating a post).
+    '''
+
+    app = make_app()
+    add_posts(app, 3)
+    client = app.test_client()
+
+    page = client.get('/', headers=ENGLISH)
+    page.get_data()
+    etag, last_modified = page.headers['ETag'], page.headers['Last-Modified']
+    assert page.headers['Cache-Control'] == 'no-cache'
+    assert {'Cookie', 'Accept-Language'} <= set(page.vary)
+
+    for validator in [{'If-None-Match': etag}, {'If-Modified-Since': last_modified}]:
+        response = client.get('/', headers={**ENGLISH, **validator})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    author_id = add_posts(app, 1, username='writer', start=datetime(2024, 1, 1))
+    with app.app_context():
+        touch_feeds(author_id)
+        db.session.commit()
+    response = client.get('/', headers={**ENGLISH, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'writer' in response.get_data(as_text=True)
+
+
+def test_etag_depends_on_language(make_app, add_posts):
+    '''
+    The page in another language of the browser has another ETag (the ETag of the English page is not valid).
+    '''
+
+    app = make_app()
+    add_posts(app, 3)
+    client = app.test_client()
+
+    page = client.get('/', headers=ENGLISH)
+    page.get_data()
+    etag = page.headers['ETag']
+    response = client.get('/', headers={'Accept-Language': 'cs', 'If-None-Match': etag})
+    response.get_data()
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('enabled, status', [(False, 404), (True, 200)])
+def test_cache_stats_are_off_by_default(make_app, login, enabled, status):
+    '''
+    The statistics of the caches are not available to logged readers unless they are enabled.
+    '''
+
+    app = make_app(CACHE_STATS_ENABLED=enabled)
+    client = app.test_client()
+    login(app, client)
+    assert client.get('/cache_stats').status_code == status
+
+
+def test_fragment_is_rendered_once(make_app):
+    '''
+    A fragment is rendered by the first call and read by the next ones, without the memory limit
+    (FRAGMENT_CACHE_MAX_BYTES=0) it is rendered each time.
+
+    Legend:
+    # caller: The body of the {% call %} block (counts its renderings).
+    '''
+
+    renders = []
+
+    def caller():
+        renders.append(1)
+        return '<article>Post</article>'
+
+    cache = FragmentCache(make_app(FRAGMENT_CACHE_MAX_BYTES=1000))
+    first = cache.fragment('article', 1, 1, caller=caller)
+    second = cache.fragment('article', 1, 1, caller=caller)
+    assert first == second == '<article>Post</article>'
+    assert len(renders) == 1
+    assert cache.stats()['hits'] == cache.stats()['misses'] == 1
+
+    off = FragmentCache(make_app(FRAGMENT_CACHE_MAX_BYTES=0))
+    off.fragment('article', 1, 1, caller=caller)
+    off.fragment('article', 1, 1, caller=caller)
+    assert len(renders) == 3
+    assert off.stats()['entries'] == 0
+
+
+def test_least_recently_used_fragment_is_removed(make_app):
+    '''
+    Over FRAGMENT_CACHE_MAX_BYTES, the least recently used fragment is removed first, and a fragment larger
+    than the limit is not stored.
+    '''
+
+    cache = FragmentCache(make_app(FRAGMENT_CACHE_MAX_BYTES=25))
+    for key in ('a', 'b', 'a', 'c'):
+        cache.fragment(key, caller=lambda: 'x' * 10)
+    cache.fragment('large', caller=lambda: 'x' * 26)
+
+    assert list(cache.entries) == [('a',), ('c',)]
+    assert cache.size == 20
+    assert cache.stats()['evictions'] == 1
+
+
+def test_fragments_of_posts_are_shared(make_app, add_posts, login):
+    '''
+    The articles of a page are rendered once for all readers, and an edited post (a new version) is rendered again.
+
+    Legend:
+    # version += 1, touch_feeds(): The post is edited as by the route (a new key of its fragment).
+    '''
+
+    app = make_app(FRAGMENT_CACHE_MAX_BYTES=1000000)
+    add_posts(app, 3)
+    fragments = app.extensions['fragment_cache']
+    reader, other_reader = app.test_client(), app.test_client()
+    login(app, other_reader)
+
+    reader.get('/', headers=ENGLISH).get_data()
+    other_reader.get('/', headers=ENGLISH).get_data()
+    assert (fragments.misses, fragments.hits) == (3, 3)
+
+    with app.app_context():
+        post = db.session.get(Post, 2)
+        post.title = 'Edited post'
+        post.version += 1
+        touch_feeds(post.author_id)
+        db.session.commit()
+    page = reader.get('/', headers=ENGLISH).get_data(as_text=True)
+
+    assert (fragments.misses, fragments.hits) == (4, 5)
+    assert 'Edited post' in page and 'Post 1' not in page
@@ -0,0 +1,203 @@
+# TESTS OF THE COMPRESSION OF RESPONSES #
+# Choice of the encoding, headers of compressed pages, conditional requests, streamed pages and stored bodies.
+
+
+# External extensions:
+import gzip
+import zlib
+import pytest
+'''
+(Legend)
+Import:
+# gzip: A module for decompressing whole gzip bodies.
+# zlib: A module for decompressing streamed gzip bodies chunk by chunk.
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog.compression import choose_encoding, brotli
+'''
+(Legend)
+From:
+# flaskblog.compression: The compression.py file in the root directory.
+
+Import:
+# choose_encoding: A function for choosing the encoding accepted by the browser.
+# brotli: The brotli library (None if it is not installed).
+'''
+
+
+# Headers of a browser accepting gzip:
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.mark.parametrize('accept_encoding, encodings, encoding', [
+    ('gzip, deflate, br', ['br', 'gzip'], 'br'),
+    ('gzip, deflate, br', ['gzip'], 'gzip'),
+    ('br;q=0.5, gzip', ['br', 'gzip'], 'gzip'),
+    ('*', ['br', 'gzip'], 'br'),
+    ('gzip;q=0, identity', ['gzip'], None),
+    ('', ['br', 'gzip'], None),
+])
+def test_choose_encoding(accept_encoding, encodings, encoding):
+    '''
+    The encoding with the highest quality is chosen (the order of preference for the same quality).
+    '''
+
+    assert choose_encoding(accept_encoding, encodings) == encoding
+
+
+def test_whole_page_is_compressed(make_app, add_posts):
+    '''
+    A page rendered whole is compressed by gzip with its new Content-Length, and Vary names Accept-Encoding.
+    '''
+
+    app = make_app(COMPRESS_ENABLED=True, STREAM_TEMPLATES=False)
+    add_posts(app, 3)
+    client = app.test_client()
+
+    plain = client.get('/')
+    response = client.get('/', headers=GZIP)
+
+    assert 'Content-Encoding' not in plain.headers
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) == len(response.data) < len(plain.data)
+    assert gzip.decompress(response.data) == plain.data
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+
+def test_brotli_is_preferred(make_app, add_posts):
+    '''
+    A browser accepting brotli and gzip gets brotli if it is installed (otherwise gzip).
+    '''
+
+    app = make_app(COMPRESS_ENABLED=True, STREAM_TEMPLATES=False)
+    add_posts(app, 3)
+    client = app.test_client()
+
+    plain = client.get('/')
+    response = client.get('/', headers={'Accept-Encoding': 'gzip, deflate, br'})
+
+    if brotli is None:
+        assert app.extensions['compression'].encodings == ['gzip']
+        assert response.headers['Content-Encoding'] == 'gzip'
+    else:
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == plain.data
+
+
+def test_etag_is_weak_and_revalidated(make_app, add_posts):
+    '''
+    The ETag of a compressed page is weak, and the reader sending it back gets 304 Not Modified.
+
+    Legend:
+    # W/: The compressed page has other bytes than the uncompressed one, it is the same version of the page.
+    # If-None-Match: The weak ETag matches the ETag of the page (contains_weak in conditional()).
+    '''
+
+    app = make_app(COMPRESS_ENABLED=True, STREAM_TEMPLATES=False)
+    add_posts(app, 3)
+    client = app.test_client()
+
+    etag = client.get('/').headers['ETag']
+    response = client.get('/', headers=GZIP)
+    assert response.headers['ETag'] == f'W/{etag}'
+
+    revalidated = client.get('/', headers={**GZIP, 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert 'Content-Encoding' not in revalidated.headers
+
+
+def test_head_is_not_compressed(make_app, add_posts):
+    '''
+    A HEAD request passes through the middleware unchanged.
+    '''
+
+    app = make_app(COMPRESS_ENABLED=True, STREAM_TEMPLATES=False)
+    add_posts(app, 3)
+    compression = app.extensions['compression']
+
+    response = app.test_client().head('/', headers=GZIP)
+
+    assert 'Content-Encoding' not in response.headers
+    assert compression.compressed == compression.skipped == 0
+
+
+def test_streamed_page_is_compressed_chunk_by_chunk(make_app, add_posts):
+    '''
+    Each chunk of a streamed page is compressed and sent at once - the head of the page can be decompressed
+    before the rest of the page is rendered.
+
+    Legend:
+    # buffered=False: The chunks of the response are read one by one.
+    # zlib.decompressobj(31): A gzip decompressor of the chunks received so far.
+    # </header>: The navigation ends the first chunk of the page ({{ stream_flush() }} in layout.html).
+    '''
+
+    app = make_app(COMPRESS_ENABLED=True, STREAM_TEMPLATES=True)
+    add_posts(app, 3)
+    client = app.test_client()
+
+    response = client.get('/', buffered=False, headers=GZIP)
+    chunks = list(response.response)
+    response.close()
+    decompressor = zlib.decompressobj(31)
+    first = decompressor.decompress(chunks[0])
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert len(chunks) > 2
+    assert b'</header>' in first and b'Post 0' not in first
+    assert gzip.decompress(b''.join(chunks)) == client.get('/').data
+    assert app.extensions['compression'].streamed == 1
+
+
+def test_stored_bodies_are_reused(make_app, add_posts):
+    '''
+    The same page is compressed once (the stored body is sent again).
+    '''
+
+    app = make_app(COMPRESS_ENABLED=True, STREAM_TEMPLATES=False)
+    add_posts(app, 3)
+    client = app.test_client()
+
+    first = client.get('/', headers=GZIP)
+    second = client.get('/', headers=GZIP)
+    stats = app.extensions['compression'].stats()
+
+    assert first.data == second.data
+    assert stats['compressed'] == 2
+    assert stats['stored_hits'] == 1
+    assert stats['entries'] == 1
+
+
+def test_least_recently_used_body_is_removed(make_app):
+    '''
+    Over COMPRESS_CACHE_MAX_BYTES, the least recently used body is removed first.
+
+    Legend:
+    # bodies: Bodies of different content (compressed to the same size).
+    # compress(): A used body becomes the most recently used one.
+    '''
+
+    bodies = [bytes([65 + number]) * 2000 for number in range(3)]
+    size = len(gzip.compress(bodies[0]))
+    app = make_app(COMPRESS_ENABLED=True, COMPRESS_CACHE_MAX_BYTES=2 * size + 10)
+    compression = app.extensions['compression']
+
+    compression.compress(bodies[0], 'gzip')
+    compression.compress(bodies[1], 'gzip')
+    compression.compress(bodies[0], 'gzip')
+    compression.compress(bodies[2], 'gzip')
+
+    assert compression.stored_hits == 1
+    assert len(compression.entries) == 2
+    assert compression.size <= compression.max_bytes
+
+    compression.compress(bodies[0], 'gzip')
+    assert compression.stored_hits == 2
+    compression.compress(bodies[1], 'gzip')
+    assert compression.stored_hits == 2
@@ -0,0 +1,211 @@
+# TESTS AND BENCHMARK OF THE DATABASE ENGINE SETTINGS #
+# PRAGMA settings of each new SQLite connection, the pool of a database file, and reading while a post is written.
+# The benchmark runs with: FLASKBLOG_BENCHMARK=1 python -m pytest tests/test_db_engine.py -s
+
+
+# External extensions:
+import threading
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+# sqlalchemy.exc: Exceptions of SQLAlchemy.
+
+Import:
+# threading: A module for threads (here the readers and the writer of the benchmark).
+# time: A module for time functions (here the duration of the benchmark).
+# pytest: A framework for writing and running tests.
+# text: A function for a raw SQL statement (here the PRAGMA queries).
+# OperationalError: An exception of the database (here 'database is locked').
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post
+from flaskblog.posts.utils import set_content
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: Class with defined columns for the database table of posts.
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+'''
+
+
+# Benchmark settings:
+READERS = 4
+DURATION = 3
+PROFILES = {
+    'rollback journal': {
+        'SQLITE_JOURNAL_MODE': None,
+        'SQLITE_SYNCHRONOUS': None,
+        'SQLITE_CACHE_SIZE': None,
+        'SQLITE_MMAP_SIZE': None
+    },
+    'tuned profile': {}
+}
+'''
+(Legend)
+# READERS: Number of threads reading the newest posts (as the home page does).
+# DURATION: Duration of the measurement of each profile (seconds).
+# PROFILES: Settings compared by the benchmark - the SQLite defaults and the settings of the configuration.
+'''
+
+
+def pragma(app, name):
+    '''
+    A function for the value of a PRAGMA setting of a connection of the application.
+    '''
+
+    with app.app_context():
+        return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+
+def test_connections_get_the_profile(make_app):
+    '''
+    Each connection of a database file uses the WAL journal and the settings of the configuration.
+
+    Legend:
+    # synchronous: 1 is NORMAL (2 is FULL, the SQLite default).
+    '''
+
+    app = make_app(SQLITE_CACHE_SIZE=-8000, SQLITE_BUSY_TIMEOUT=1234)
+
+    assert pragma(app, 'journal_mode') == 'wal'
+    assert pragma(app, 'synchronous') == 1
+    assert pragma(app, 'cache_size') == -8000
+    assert pragma(app, 'busy_timeout') == 1234
+    assert pragma(app, 'mmap_size') == app.config['SQLITE_MMAP_SIZE']
+
+
+def test_unset_settings_keep_the_defaults(make_app):
+    '''
+    A setting set to None is not applied (the SQLite default is kept).
+    '''
+
+    app = make_app(**PROFILES['rollback journal'])
+
+    assert pragma(app, 'journal_mode') == 'delete'
+    assert pragma(app, 'synchronous') == 2
+
+
+@pytest.mark.parametrize('uri', ['sqlite://', 'sqlite:///:memory:'])
+def test_in_memory_database_has_no_pool(make_app, uri):
+    '''
+    An in-memory database uses one shared connection, so the pool settings of SQLITE_POOL are not applied.
+    '''
+
+    app = make_app(SQLALCHEMY_DATABASE_URI=uri)
+
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS'] == {}
+    assert pragma(app, 'busy_timeout') == app.config['SQLITE_BUSY_TIMEOUT']
+
+
+def test_database_file_has_the_pool(make_app):
+    '''
+    A database file uses a pool of connections with the settings of SQLITE_POOL (SQLALCHEMY_ENGINE_OPTIONS
+    take precedence).
+    '''
+
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 3})
+
+    with app.app_context():
+        assert db.engine.pool.size() == 3
+        assert db.engine.pool._max_overflow == app.config['SQLITE_POOL']['max_overflow']
+
+
+def read_under_write(app, writing=True):
+    '''
+    A function for reading the newest posts in READERS threads while one thread writes new posts.
+
+    :param app: The application with the posts.
+    :param writing: Setting for running the writer (False measures the readers alone).
+    :return: Numbers of reads and writes per second, and the number of errors.
+
+    Legend:
+    # db.session.rollback(): Each read ends its transaction (as a request does), so a reader does not keep
+      the old state of the database.
+    # OperationalError: 'database is locked' - the writer or a reader waited longer than busy_timeout.
+    '''
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + DURATION
+
+    def read():
+        done = errors = 0
+        with app.app_context():
+            while time.monotonic() < deadline:
+                try:
+                    Post.query.order_by(Post.date_posted.desc()).limit(5).all()
+                    done += 1
+                except OperationalError:
+                    errors += 1
+                db.session.rollback()
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += errors
+
+    def write():
+        done = errors = 0
+        with app.app_context():
+            while time.monotonic() < deadline:
+                post = Post(title=f'Written {done}', author_id=1, language='en')
+                set_content(post, 'Content of a written post.')
+                db.session.add(post)
+                try:
+                    db.session.commit()
+                    done += 1
+                except OperationalError:
+                    db.session.rollback()
+                    errors += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=read) for _ in range(READERS)]
+    if writing:
+        threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return counts['reads'] / DURATION, counts['writes'] / DURATION, counts['errors']
+
+
+@pytest.mark.benchmark
+def test_reading_under_writing(make_app, add_posts, tmp_path):
+    '''
+    With the tuned profile, the writer is not slowed down by the readers, and no read or write fails.
+
+    Legend:
+    # Each profile has its own database file with 500 posts.
+    # The readers are measured alone and with the writer. The reads are not asserted - the threads share one
+      interpreter, so with the tuned profile the readers get less time because the writer commits several times
+      more often (synchronous=NORMAL does not wait for the disk), while alone they read as fast as with the
+      rollback journal.
+    '''
+
+    results = {}
+    for name, settings in PROFILES.items():
+        database = tmp_path / f"{name.replace(' ', '-')}.db"
+        app = make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{database}', **settings)
+        add_posts(app, 500)
+        alone = read_under_write(app, writing=False)
+        results[name] = read_under_write(app)
+        print(f"\n{name}: {alone[0]:.0f} reads/s alone, {results[name][0]:.0f} reads/s and "
+              f"{results[name][1]:.0f} writes/s together, {results[name][2]} errors", end='')
+
+    assert results['tuned profile'][2] == 0
+    assert results['tuned profile'][1] > results['rollback journal'][1]
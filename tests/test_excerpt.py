@@ -0,0 +1,106 @@
+# TESTS OF THE EXCERPTS OF POSTS #
+# The stored excerpt and number of words of a post, and the content loaded only on the page of one post
+# (the pages with a list of posts display the excerpt).
+
+
+# External extensions:
+import pytest
+from sqlalchemy import event
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# pytest: A framework for writing and running tests.
+# event: A module for listening to the events of the database engine (here the executed statements).
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post
+from flaskblog.posts.utils import make_excerpt, count_words, set_content
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: Class with defined columns for the database table of posts.
+# make_excerpt: A function for creating an excerpt of the post content.
+# count_words: A function for counting words of the post content.
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+'''
+
+
+@pytest.mark.parametrize('content, length, excerpt', [
+    ('  Short post.\n', 20, 'Short post.'),
+    ('one two three', 8, 'one two…'),
+    ('one two, three', 8, 'one two…'),
+    ('one two three', 7, 'one two…'),
+    ('abcdefghij', 5, 'abcde…'),
+])
+def test_make_excerpt(content, length, excerpt):
+    '''
+    A longer content is cut after the last whole word (without the punctuation before "…"), a single long word
+    is cut at the length.
+    '''
+
+    assert make_excerpt(content, length) == excerpt
+
+
+def test_set_content():
+    '''
+    The content of a post is set together with its excerpt and number of words.
+    '''
+
+    post = Post()
+    set_content(post, 'word ' * 100)
+
+    assert post.content == 'word ' * 100
+    assert post.excerpt == make_excerpt(post.content)
+    assert len(post.excerpt) <= 301 and post.excerpt.endswith('…')
+    assert post.word_count == count_words(post.content) == 100
+
+
+def test_content_is_loaded_only_for_one_post(make_app, add_posts):
+    '''
+    The pages with a list of posts do not read the content column (they display the excerpt),
+    the page of one post reads it.
+
+    Legend:
+    # before_cursor_execute: Each executed statement (the columns read from the post table).
+    # 'post.content': The content column in the statements of SQLAlchemy.
+    '''
+
+    app = make_app()
+    author_id = add_posts(app, 3)
+    with app.app_context():
+        post = Post(title='Long post', author_id=author_id, language='en')
+        set_content(post, 'A long sentence of the post. ' * 30)
+        db.session.add(post)
+        db.session.commit()
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client = app.test_client()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            home = client.get('/').get_data(as_text=True)
+            client.get('/user/author').get_data()
+            lists = statements[:]
+            client.get('/post/4').get_data()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert not any('post.content' in statement for statement in lists)
+    assert any('post.content' in statement for statement in statements[len(lists):])
+    assert make_excerpt('A long sentence of the post. ' * 30) in home
+    assert ('A long sentence of the post. ' * 30).strip() not in home
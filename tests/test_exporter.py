@@ -0,0 +1,110 @@
+# TESTS OF THE STATIC EXPORT #
+# The first export of the pages, the next (incremental) export of unchanged pages and the pages of deleted posts.
+
+
+# External extensions:
+import json
+import os
+'''
+(Legend)
+Import:
+# json: Built-in module for transferring data as text (here the manifest of the export).
+# os: A module for working with files and folders.
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post
+from flaskblog.exporter import MANIFEST, page_file
+from flaskblog.posts.utils import count_post, touch_feeds
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.exporter: The exporter.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: Class with defined columns for the database table of posts.
+# MANIFEST: Name of the file with the exported pages.
+# page_file: A function for the file name of an exported page.
+# count_post: A function for changing the counters of posts.
+# touch_feeds: A function for increasing the versions of the feeds displaying posts of an author.
+'''
+
+
+def export(app, folder):
+    '''
+    A function for exporting the blog by the "flask export" command (one process of the pool).
+
+    :return: The line with the statistics of the export.
+    '''
+
+    result = app.test_cli_runner().invoke(args=['export', '--folder', str(folder), '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    return result.output.strip().splitlines()[-1]
+
+
+def test_pages_are_exported(make_app, add_posts, tmp_path):
+    '''
+    The first export writes each page for each language, the error pages, the static folder and the manifest.
+
+    Legend:
+    # '/about': The about page of the administrator (404 without the user) is not exported.
+    '''
+
+    app = make_app()
+    add_posts(app, 3)
+    folder = tmp_path / 'site'
+
+    export(app, folder)
+    with open(folder / MANIFEST) as file:
+        pages = json.load(file)['pages']
+
+    assert set(pages['en']) >= {'/', '/post/1', '/post/2', '/post/3', '/user/author'}
+    assert '/about' not in pages['en']
+    assert set(pages['cs']) == set(pages['en'])
+    assert 'Content of the post number 0.' in (folder / page_file('en', '/post/1')).read_text()
+    assert (folder / 'en' / 'errors' / '404.html').exists()
+    assert (folder / 'static').is_dir()
+
+
+def test_next_export_keeps_unchanged_pages(make_app, add_posts, tmp_path):
+    '''
+    The next export renders no unchanged page (304 by the ETag of the manifest) and writes no file,
+    and the pages of a deleted post are removed.
+
+    Legend:
+    # os.path.getmtime(): An unchanged file keeps the date of its change (for the CDN).
+    # count_post(), touch_feeds(): The post is deleted as by the route (new versions of the lists of posts).
+    '''
+
+    app = make_app()
+    add_posts(app, 3)
+    folder = tmp_path / 'site'
+
+    first = export(app, folder)
+    home = folder / page_file('en', '/')
+    changed = os.path.getmtime(home)
+    second = export(app, folder)
+
+    assert first.startswith('Rendered ') and ', removed 0.' in first
+    assert second.startswith('Rendered 0, unchanged ') and second.endswith('written 0, removed 0.')
+    assert os.path.getmtime(home) == changed
+
+    with app.app_context():
+        post = db.session.get(Post, 2)
+        db.session.delete(post)
+        count_post(post.author_id, -1)
+        touch_feeds(post.author_id)
+        db.session.commit()
+    third = export(app, folder)
+
+    assert third.endswith('removed 2.')
+    assert not (folder / page_file('en', '/post/2')).exists()
+    assert not (folder / page_file('cs', '/post/2')).exists()
+    assert 'Post 1' not in home.read_text()
+    assert 'Post 0' in home.read_text()
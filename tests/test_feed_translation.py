@@ -0,0 +1,126 @@
+# TESTS OF THE TRANSLATED LISTS OF POSTS #
+# Packing of texts into batches, one request of the translator for a whole page of posts, a separator lost
+# by the translator, and a page displayed untranslated when the translator is not available.
+
+
+# External extensions:
+import pytest
+'''
+(Legend)
+Import:
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog.db_models import Translation
+from flaskblog.main.utils import pack_texts, translate_texts, SEPARATOR
+'''
+(Legend)
+From:
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+
+Import:
+# Translation: Class with defined columns for the database table of translations.
+# pack_texts: A function for packing texts into batches.
+# translate_texts: A function for translating a list of texts with as few requests as possible.
+# SEPARATOR: The line placed between packed texts.
+'''
+
+
+# Headers of a Czech reader:
+CZECH = {'Accept-Language': 'cs'}
+
+
+@pytest.mark.parametrize('texts, limit, batches', [
+    (['a' * 10, 'b' * 10, 'c' * 10], 1000, [[0, 1, 2]]),
+    (['a' * 10, 'b' * 10, 'c' * 10], 2 * (10 + len(SEPARATOR)), [[0, 1], [2]]),
+    (['a' * 100, 'b' * 10], 50, [[0], [1]]),
+    (['a', 'b ### c', 'd'], 1000, [[1], [0, 2]]),
+])
+def test_pack_texts(texts, limit, batches):
+    '''
+    Texts are packed into batches up to the limit (a longer text is alone), a text with the separator is alone.
+    '''
+
+    assert pack_texts(texts, limit) == batches
+
+
+def test_batch_is_split_back(make_app):
+    '''
+    The texts of a batch are translated by one request and split back in their order, over the limit
+    by more requests.
+    '''
+
+    texts = ['First text.', 'Second text.', 'Third text.']
+    app = make_app(TRANSLATION_BATCH_LIMIT=2 * (12 + len(SEPARATOR)))
+    backend = app.extensions['translator'].backend
+
+    with app.app_context():
+        translations = translate_texts(texts, 'cs')
+
+    assert translations == ['[cs] First text.', 'Second text.', '[cs] Third text.']
+    assert backend.calls == 2
+
+
+def test_lost_separator_translates_texts_one_by_one(make_app, monkeypatch):
+    '''
+    When the translator does not keep the separator, the texts of the batch are translated one by one.
+
+    Legend:
+    # translate: The backend joining the lines of the text (the separator is lost).
+    '''
+
+    app = make_app()
+    backend = app.extensions['translator'].backend
+    calls = []
+
+    def translate(text, language):
+        calls.append(text)
+        return f'[{language}] ' + ' '.join(text.replace('###', '').split())
+
+    monkeypatch.setattr(backend, 'translate', translate)
+    with app.app_context():
+        translations = translate_texts(['One.', 'Two.'], 'cs')
+
+    assert translations == ['[cs] One.', '[cs] Two.']
+    assert calls[1:] == ['One.', 'Two.']
+
+
+def test_translated_page_is_one_request(make_app, add_posts):
+    '''
+    All titles and contents of a translated page are sent by one request, stored, and read by the next request.
+
+    Legend:
+    # translated=1: The list of posts displayed translated.
+    '''
+
+    app = make_app(POSTS_PER_PAGE=5)
+    add_posts(app, 5)
+    backend = app.extensions['translator'].backend
+    client = app.test_client()
+
+    first = client.get('/?translated=1', headers=CZECH).get_data(as_text=True)
+    second = client.get('/?translated=1', headers=CZECH).get_data(as_text=True)
+
+    assert backend.calls == 1
+    assert '[cs] Post 4' in first and '[cs] Post 4' in second
+    with app.app_context():
+        assert Translation.query.filter_by(language='cs', status='done').count() == 5
+
+
+def test_page_without_translator_is_untranslated(make_app, add_posts):
+    '''
+    When the translator is not available, the page displays the original posts and no translation is stored.
+    '''
+
+    app = make_app(TRANSLATOR_FAKE_FAIL=True)
+    add_posts(app, 3)
+
+    page = app.test_client().get('/?translated=1', headers=CZECH)
+
+    assert page.status_code == 200
+    assert 'Post 2' in page.get_data(as_text=True)
+    with app.app_context():
+        assert Translation.query.count() == 0
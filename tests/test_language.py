@@ -0,0 +1,144 @@
+# TESTS AND BENCHMARK OF THE LANGUAGE DETECTION #
+# Posts of 1k, 10k and 30k characters in English and Czech are detected correctly (from a sample of the text)
+# and in a limited time. The benchmark runs with: FLASKBLOG_BENCHMARK=1 python -m pytest tests/test_language.py -s
+
+
+# External extensions:
+import statistics
+import time
+import pytest
+'''
+(Legend)
+Import:
+# statistics: A module for statistics (here the median of the measured times).
+# time: A module for time functions (here measuring the detection).
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog.main.language import detect_language, language_detector, SAMPLE_LIMIT
+'''
+(Legend)
+From:
+# flaskblog.main.language: The language.py file in the main folder in the root directory.
+
+Import:
+# detect_language: A function for detecting the language of a post.
+# language_detector: The instance of the detector (distances of a text from the languages).
+# SAMPLE_LIMIT: Number of characters of the text used for the detection.
+'''
+
+
+# Benchmark settings:
+SIZES = [1000, 10000, 30000]
+REPEATS = 20
+TIME_BUDGET = 0.025
+TEXTS = {
+    'en': (
+        "The weather was nice this morning, so we decided to walk through the old town and then up the hill "
+        "to the castle. I have been thinking about how to write better code for a long time. The most important "
+        "thing is that the code should be easy to read, because you will read it many more times than you write "
+        "it. There are many ways to travel around the country, but the train is still my favourite one. You can "
+        "read a book, look out of the window and nobody is in a hurry. The children were playing in the garden "
+        "while their parents were preparing dinner in the kitchen. Music has always been an important part of "
+        "my life, and it always changes my mood for the better.\n"
+    ),
+    'cs': (
+        "Dnes ráno bylo krásné počasí, a tak jsme se rozhodli projít se starým městem a potom vyjít na kopec až "
+        "k hradu. Už dlouho přemýšlím o tom, jak psát lepší kód. Nejdůležitější je, aby byl kód snadno čitelný, "
+        "protože ho budete číst mnohem častěji, než ho píšete. Po celé zemi se dá cestovat mnoha způsoby, ale vlak "
+        "je pořád můj nejoblíbenější. Můžete si číst knihu, dívat se z okna a nikdo nikam nespěchá. Děti si hrály "
+        "na zahradě, zatímco rodiče připravovali v kuchyni večeři. Hudba byla vždycky důležitou součástí mého "
+        "života a vždycky mi zlepší náladu.\n"
+    )
+}
+'''
+(Legend)
+# SIZES: Numbers of characters of the measured posts (the longest post has 30,000 characters).
+# REPEATS: Number of detections of each post (the median time is compared).
+# TIME_BUDGET: Maximum median time of one detection (seconds) - about ten times the time measured when
+  the detector was written (1-3 ms), so a slower machine passes too.
+# TEXTS: Paragraphs repeated to the size of the post.
+'''
+
+
+def make_post(language, size):
+    '''
+    A function for a post of the given size.
+
+    :param language: The language of the text ('en' or 'cs').
+    :param size: Number of characters of the content.
+    :return: The content of the post.
+    '''
+
+    text = TEXTS[language]
+    return (text * (size // len(text) + 1))[:size]
+
+
+def measure(content, language):
+    '''
+    A function for measuring the detection of a post.
+
+    :param content: The content of the post.
+    :param language: The expected language.
+    :return: The median time of one detection (seconds).
+
+    Legend:
+    # time.perf_counter(): A clock for measuring short times.
+    '''
+
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        detected = detect_language('Title', content)
+        times.append(time.perf_counter() - start)
+        assert detected == language
+
+    return statistics.median(times)
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('language', TEXTS)
+def test_detection_of_long_posts(language, size):
+    '''
+    The language of posts of all sizes is detected correctly.
+    '''
+
+    assert detect_language('Title', make_post(language, size)) == language
+
+
+def test_detection_reads_only_the_sample():
+    '''
+    Only the first SAMPLE_LIMIT characters are used - the text behind them does not change the result.
+
+    Legend:
+    # english + czech: An English sample followed by a long Czech text is detected as English.
+    '''
+
+    english = make_post('en', SAMPLE_LIMIT)
+    czech = make_post('cs', 30000)
+
+    assert language_detector.distances(english + czech) == language_detector.distances(english)
+    assert language_detector.detect(english + czech) == 'en'
+    assert language_detector.detect(czech[:SAMPLE_LIMIT] + english * 10) == 'cs'
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('language', TEXTS)
+def test_detection_time(language):
+    '''
+    The detection of posts of all sizes is within the time budget, and the time does not grow with the length
+    of posts longer than the sample.
+
+    Legend:
+    # SAMPLE_LIMIT: Posts longer than the limit are detected from a sample (10k and 30k characters take the same
+      time - a detector reading the whole post takes three times longer for 30k).
+    '''
+
+    medians = {size: measure(make_post(language, size), language) for size in SIZES}
+    for size, median in medians.items():
+        print(f"\n{language} {size:>6} characters (sample limit {SAMPLE_LIMIT}): median {median * 1000:.2f} ms", end='')
+
+    assert all(median < TIME_BUDGET for median in medians.values())
+    assert medians[30000] < 2 * medians[10000]
@@ -0,0 +1,88 @@
+# TESTS OF THE PAGE LANGUAGE #
+# The language of each request (the reader's choice, the browser preference, the default language),
+# and a change of the language kept only for the reader who made it.
+
+
+# External extensions:
+from flask import session
+import pytest
+'''
+(Legend)
+From:
+# flask: A micro web framework provides libraries to build web applications.
+
+Import:
+# session: The session of the reader (here the selected language).
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog import get_locale
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+
+Import:
+# get_locale: A function returning the page language of the current request.
+'''
+
+
+@pytest.mark.parametrize('headers, selected, language', [
+    ({}, None, 'cs'),
+    ({'Accept-Language': 'en-US,en;q=0.9'}, None, 'en'),
+    ({'Accept-Language': 'de, cs;q=0.5'}, None, 'cs'),
+    ({'Accept-Language': 'de'}, None, 'cs'),
+    ({'Accept-Language': 'en'}, 'cs', 'cs'),
+    ({'Accept-Language': 'cs'}, 'en', 'en'),
+])
+def test_language_of_the_request(make_app, headers, selected, language):
+    '''
+    The language selected by the reader comes first, then the best configured language of the browser,
+    then Czech.
+    '''
+
+    app = make_app()
+
+    with app.test_request_context('/', headers=headers):
+        if selected:
+            session['language'] = selected
+        assert get_locale().language == language
+
+
+def test_default_language_outside_of_a_request(make_app):
+    '''
+    Outside of a request (e.g. the background threads) the default language is used.
+    '''
+
+    app = make_app()
+
+    with app.app_context():
+        assert get_locale().language == 'cs'
+
+
+def test_changed_language_is_kept_only_for_the_reader(make_app):
+    '''
+    A reader changing the language gets the other language on the next pages (in a permanent session cookie),
+    while another reader with the same browser keeps the language of the browser.
+
+    Legend:
+    # Referer: The reader is returned to the page with the link (the home page without it).
+    # Three changes: Czech -> English -> Czech -> English.
+    # Expires: The session cookie is permanent (kept after closing the browser).
+    '''
+
+    app = make_app()
+    czech = {'Accept-Language': 'cs'}
+    reader, other_reader = app.test_client(), app.test_client()
+
+    back = reader.get('/change_language', headers={**czech, 'Referer': '/about'})
+    home = reader.get('/change_language', headers=czech)
+    reader.get('/change_language', headers=czech)
+
+    assert back.headers['Location'] == '/about'
+    assert home.headers['Location'] == '/home'
+    assert 'Expires' in back.headers['Set-Cookie']
+    assert 'Domů' not in reader.get('/', headers=czech).get_data(as_text=True)
+    assert 'Domů' in other_reader.get('/', headers=czech).get_data(as_text=True)
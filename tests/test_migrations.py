@@ -0,0 +1,222 @@
+# TESTS OF THE DATABASE MIGRATIONS #
+# Migrations of an existing database, and the indexes used by the lists of posts (EXPLAIN QUERY PLAN).
+
+
+# External extensions:
+from sqlalchemy import event, text
+import types
+import pytest
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# event: A module for listening to the events of the database engine (here the executed statements).
+# text: A function for creating a plain SQL statement.
+# types: A module with SimpleNamespace (here a migration script of the test).
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post
+from flaskblog.posts.utils import encode_cursor, make_excerpt, count_words
+from flaskblog.migrations.migrator import migrator
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+# flaskblog.migrations.migrator: The migrator.py file in the migrations folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: Class with defined columns for the database table of posts.
+# encode_cursor: A function for creating the cursor of a post (used in the page links).
+# make_excerpt, count_words: Functions for the excerpt and the number of words of new posts.
+# migrator: An instance of the migrator.
+'''
+
+
+def listing_plans(app, url):
+    '''
+    A function for the query plans of the lists of posts executed by a page.
+
+    :param app: The application.
+    :param url: The address of the page.
+    :return: A list of query plans (each one is a list of the details of its steps).
+
+    Legend:
+    # before_cursor_execute: Each executed statement with its parameters.
+    # get_data(): The streamed page is rendered while it is read.
+    # ORDER BY post.date_posted: The statement reading the posts of the list.
+    # EXPLAIN QUERY PLAN: The plan of the statement (indexes used, temporary sorting).
+    '''
+
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = app.test_client().get(url)
+            response.get_data()
+            assert response.status_code == 200
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        plans = []
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                if 'FROM post' in statement and 'ORDER BY post.date_posted' in statement:
+                    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+                    plans.append([row[-1] for row in rows])
+
+    assert plans, f"No list of posts was read by {url}"
+    return plans
+
+
+def test_status_lists_pending_migrations(shipped_database, make_app):
+    '''
+    The flask migrate commands do not apply the migrations at the start (status lists them as pending).
+    '''
+
+    app = make_app()
+    result = app.test_cli_runner().invoke(args=['migrate', 'status'])
+
+    assert result.exit_code == 0
+    assert len(result.output.splitlines()) == len(migrator.migrations())
+    assert all(' pending ' in line for line in result.output.splitlines())
+
+
+def test_upgrade_of_shipped_database(shipped_database, make_app):
+    '''
+    All migrations are applied to the database of the repository, each one only once.
+    '''
+
+    app = make_app()
+    with app.app_context():
+        done = migrator.upgrade()
+        assert [module.VERSION for module in done] == [module.VERSION for module in migrator.migrations()]
+        assert migrator.pending() == []
+        assert migrator.upgrade() == []
+
+
+def test_excerpts_of_shipped_posts(shipped_database, make_app):
+    '''
+    The migration 0004 fills the excerpts and numbers of words of the shipped posts as new posts get them
+    (its frozen copy of the functions gives the same results).
+    '''
+
+    app = make_app()
+    with app.app_context():
+        migrator.upgrade()
+        posts = db.session.execute(text("SELECT content, excerpt, word_count FROM post")).all()
+
+    assert posts
+    assert all(excerpt == make_excerpt(content) for content, excerpt, _ in posts)
+    assert all(word_count == count_words(content) for content, _, word_count in posts)
+
+
+def test_failed_migration_changes_nothing(make_app, add_posts, monkeypatch):
+    '''
+    A migration failing after a change of the schema leaves the database unchanged (also the schema),
+    and its version is not recorded.
+
+    Legend:
+    # broken: A migration script adding a column and filling it before it fails.
+    # monkeypatch.setattr(): The migrator loads only this script.
+    '''
+
+    app = make_app()
+    add_posts(app, 2)
+
+    def upgrade(connection):
+        connection.execute(text("ALTER TABLE post ADD COLUMN broken INTEGER"))
+        connection.execute(text("UPDATE post SET broken = 1"))
+        raise RuntimeError("Broken migration.")
+
+    broken = types.SimpleNamespace(VERSION=99, DESCRIPTION="Broken migration", upgrade=upgrade)
+    monkeypatch.setattr(migrator, 'migrations', lambda: [broken])
+
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            migrator.upgrade()
+        with db.engine.connect() as connection:
+            columns = {row[1] for row in connection.execute(text("PRAGMA table_info(post)"))}
+        assert 'broken' not in columns
+        assert migrator.pending() == [broken]
+
+
+def test_home_uses_date_index(shipped_database, make_app):
+    '''
+    The home page reads its posts by the index of the date (no temporary sorting of all posts).
+    '''
+
+    app = make_app()
+    with app.app_context():
+        migrator.upgrade()
+
+    for plan in listing_plans(app, '/'):
+        assert any('ix_post_date_posted' in step for step in plan), plan
+        assert not any('USE TEMP B-TREE' in step for step in plan), plan
+
+
+def test_user_posts_use_author_date_index(shipped_database, make_app):
+    '''
+    The page with user posts reads them by the index of the author and the date (no temporary sorting).
+    '''
+
+    app = make_app()
+    with app.app_context():
+        migrator.upgrade()
+
+    for plan in listing_plans(app, '/user/Sudip2708'):
+        assert any('ix_post_author_id_date_posted' in step for step in plan), plan
+        assert not any('USE TEMP B-TREE' in step for step in plan), plan
+
+
+@pytest.mark.parametrize('url, index', [
+    ('/', 'ix_post_date_posted'),
+    ('/user/Sudip2708', 'ix_post_author_id_date_posted')
+])
+@pytest.mark.parametrize('direction', ['older', 'newer'])
+def test_cursor_pages_use_indexes(shipped_database, make_app, url, index, direction):
+    '''
+    The pages after a cursor read their posts by the same index (the cursor is a range of the index, no sorting).
+
+    Legend:
+    # (post.date_posted, post.id) < (?, ?): The row-value condition of the cursor (> for the newer posts).
+    # date_posted<?, date_posted>?: The condition is searched in the index (the posts before the cursor are not read).
+    '''
+
+    app = make_app()
+    with app.app_context():
+        migrator.upgrade()
+        posts = Post.query.order_by(Post.date_posted.desc()).all()
+        cursor = encode_cursor(posts[len(posts) // 2])
+    condition = 'date_posted<?' if direction == 'older' else 'date_posted>?'
+
+    for plan in listing_plans(app, f'{url}?{direction}={cursor}'):
+        assert any(f'SEARCH post USING INDEX {index}' in step and condition in step for step in plan), plan
+        assert not any('USE TEMP B-TREE' in step for step in plan), plan
+
+
+def test_new_database_has_indexes(make_app, add_posts):
+    '''
+    A new database created by db.create_all() has the same indexes (its migrations change nothing).
+    '''
+
+    app = make_app()
+    add_posts(app, 10, username='writer')
+    with app.app_context():
+        migrator.upgrade()
+
+    assert all(any('ix_post_date_posted' in step for step in plan) for plan in listing_plans(app, '/'))
+    assert all(any('ix_post_author_id_date_posted' in step for step in plan)
+               for plan in listing_plans(app, '/user/writer'))
@@ -0,0 +1,224 @@
+# TESTS OF THE PAGINATION OF POSTS #
+# Cursors of the keyset pages, posts with the same date, the first and last page, the counters of posts
+# following new and deleted posts, and the counters read only for the page numbers.
+
+
+# External extensions:
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+'''
+(Legend)
+From:
+# datetime: A library for date and time functions.
+# sqlalchemy: A library for working with databases.
+
+Import:
+# datetime: Module for date and time objects (here the date of a cursor).
+# pytest: A framework for writing and running tests.
+# event: A module for listening to the events of the database engine (here the executed statements).
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post, Counter
+from flaskblog.main.workers import translation_workers
+from flaskblog.posts.utils import KeysetPage, encode_cursor, decode_cursor, counter_name, post_count, count_post
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main.workers: The workers.py file in the main folder in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post, Counter: Classes with defined columns for the database tables of posts and counters.
+# translation_workers: The pool of background threads translating new and updated posts.
+# KeysetPage: A class for one page of posts in the keyset (cursor) pagination.
+# encode_cursor, decode_cursor: Functions for creating and reading the cursor of a post.
+# counter_name: A function for the name of the counter of posts (the feed versions are in the same table).
+# post_count: A function for getting the number of posts from the maintained counter.
+# count_post: A function for changing the counters of posts after a post is added or deleted.
+'''
+
+
+def newest_first(app):
+    '''
+    A function for the IDs of all posts in the order of the lists (from the newest, the ID decides the same dates).
+    '''
+
+    with app.app_context():
+        return [post.id for post in Post.query.order_by(Post.date_posted.desc(), Post.id.desc())]
+
+
+def test_cursor_round_trip():
+    '''
+    The cursor of a post is read back as its exact date (with microseconds) and ID.
+    '''
+
+    post = Post(id=35, date_posted=datetime(2023, 9, 9, 10, 15, 0, 123456))
+
+    assert encode_cursor(post) == '20230909101500123456-35'
+    assert decode_cursor(encode_cursor(post)) == (post.date_posted, 35)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_pages_go_through_posts_with_the_same_date(make_app, add_posts):
+    '''
+    The older pages list every post once, also posts with the same date split between two pages,
+    and the newer pages go back through the same pages.
+
+    Legend:
+    # add_posts() twice with the same start: Each post of the first author has the date of a post of the second one.
+    # has_newer, has_older: The first page has no newer posts, the last page has no older posts.
+    '''
+
+    app = make_app()
+    add_posts(app, 7, username='first')
+    add_posts(app, 7, username='second')
+    everything = newest_first(app)
+
+    pages, cursor = [], {}
+    with app.app_context():
+        while True:
+            page = KeysetPage(Post.query, 3, **cursor)
+            pages.append(page)
+            if not page.has_older:
+                break
+            cursor = {'older': page.older_args['older']}
+
+        backwards = [pages[-1]]
+        while backwards[-1].has_newer:
+            backwards.append(KeysetPage(Post.query, 3, newer=backwards[-1].newer_args['newer']))
+
+        ids = [[post.id for post in page.items] for page in pages]
+        back_ids = [[post.id for post in page.items] for page in reversed(backwards)]
+
+    assert [post_id for page in ids for post_id in page] == everything
+    assert [len(page) for page in ids] == [3, 3, 3, 3, 2]
+    assert not pages[0].has_newer and pages[0].has_older
+    assert pages[-1].has_newer and not pages[-1].has_older
+    assert back_ids[1:] == ids[1:]
+    assert back_ids[0] == everything[:3]
+
+
+def test_empty_list_has_one_page(make_app):
+    '''
+    A list without posts is the first and last page at once (without links).
+    '''
+
+    app = make_app()
+    with app.app_context():
+        page = KeysetPage(Post.query, 3)
+
+    assert page.items == []
+    assert not page.has_newer and not page.has_older
+    assert page.newer_args == page.older_args == {}
+    assert page.total is None
+
+
+def test_invalid_cursor_displays_the_first_page(make_app, add_posts):
+    '''
+    A page with an invalid cursor in the URL displays the first page instead of an error.
+    '''
+
+    app = make_app(POSTS_PER_PAGE=3)
+    add_posts(app, 5)
+    client = app.test_client()
+
+    assert client.get('/?older=broken').get_data() == client.get('/').get_data()
+
+
+@pytest.mark.parametrize('mode, counted', [('keyset', False), ('pages', True)])
+def test_posts_are_counted_only_for_page_numbers(make_app, add_posts, mode, counted):
+    '''
+    The counter of posts is read only for the page numbers ('pages' mode), the keyset pages do not need it.
+
+    Legend:
+    # before_cursor_execute: Each executed statement with its parameters (the name of the read counter).
+    # (5): The number of posts of the author displayed on the user page.
+    '''
+
+    app = make_app(PAGINATION_MODE=mode, POSTS_PER_PAGE=3)
+    author_id = add_posts(app, 5)
+    names = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if 'FROM counter' in statement:
+            names.extend(parameters)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            client = app.test_client()
+            home = client.get('/').get_data(as_text=True)
+            user_page = client.get('/user/author').get_data(as_text=True)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert (counter_name() in names) == counted
+    assert (counter_name(author_id) in names) == counted
+    assert ('author (5)' in user_page) == counted
+    assert 'Post 4' in home
+
+
+def test_posts_are_counted_once(make_app, add_posts):
+    '''
+    The posts are counted only when the counter does not exist yet, then the stored counter is read.
+
+    Legend:
+    # count_post(): A missing counter is not created by a change (the posts are counted when it is needed).
+    '''
+
+    app = make_app()
+    author_id = add_posts(app, 4)
+    add_posts(app, 2, username='other')
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        count_post(author_id, 1)
+        assert Counter.query.count() == 0
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            counts = [post_count(), post_count(author_id), post_count(), post_count(author_id)]
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert counts == [6, 4, 6, 4]
+    assert sum('count(' in statement.lower() for statement in statements) == 2
+
+
+def test_counters_follow_new_and_deleted_posts(make_app, login, monkeypatch):
+    '''
+    A new post increases and a deleted post decreases the counter of all posts and the counter of its author.
+
+    Legend:
+    # translation_workers.enqueue: The background translation of the new post is left to the tests of the workers.
+    '''
+
+    app = make_app()
+    client = app.test_client()
+    author_id = login(app, client)
+    monkeypatch.setattr(translation_workers, 'enqueue', lambda post: None)
+
+    def counts():
+        with app.app_context():
+            return post_count(), post_count(author_id)
+
+    assert counts() == (0, 0)
+    for number in range(2):
+        client.post('/post/new', data={'title': f'Post {number}', 'content': 'A new post.'})
+    assert counts() == (2, 2)
+
+    client.post('/post/1/delete')
+    assert counts() == (1, 1)
+    with app.app_context():
+        assert Post.query.count() == 1
@@ -0,0 +1,91 @@
+# TESTS OF THE NUMBER OF QUERIES #
+# The lists of posts read the posts with their authors and translations in a constant number of queries
+# (no query per post).
+
+
+# External extensions:
+from sqlalchemy import event
+from datetime import datetime
+import pytest
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+
+Import:
+# event: A module for listening to the events of the database engine (here the executed statements).
+# datetime: Class for date and time (here the dates of the test posts).
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+'''
+
+
+def count_queries(app, url):
+    '''
+    A function for the number of queries executed by a page.
+
+    :param app: The application.
+    :param url: The address of the page.
+    :return: Number of executed statements.
+
+    Legend:
+    # before_cursor_execute: Each statement sent to the database.
+    # get_data(): The streamed page is rendered while it is read (its queries are counted too).
+    '''
+
+    queries = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = app.test_client().get(url)
+            response.get_data()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize('url', ['/', '/user/author', '/?translated=1', '/user/author?translated=1'])
+def test_listing_queries_do_not_grow_with_page_size(make_app, add_posts, url):
+    '''
+    A page of 5 and of 25 posts executes the same number of queries, and repeated requests do not change it.
+
+    Legend:
+    # CACHE_ENABLED, FRAGMENT_CACHE_MAX_BYTES: No stored pages or articles (each request renders the page).
+    # writer_<number>: Newer posts of 30 different authors on the home page (authors not loaded with the posts
+      would be read one by one - the session keeps an author already read, so one author would hide it).
+    # other: The second author of the user page - their posts are between the posts of the author (the same
+      minutes), so the page reads the posts of its author only from the mixed posts.
+    # translated=1: The translations of the posts of the page are read (and made by the fake backend) together.
+    # The first request creates the counters and the translations, so it is not counted.
+    '''
+
+    counts = {}
+    for per_page in (5, 25):
+        app = make_app(POSTS_PER_PAGE=per_page, CACHE_ENABLED=False, FRAGMENT_CACHE_MAX_BYTES=0)
+        if not counts:
+            add_posts(app, 30)
+            add_posts(app, 30, username='other', start=datetime(2023, 1, 1, 0, 0, 30))
+            for number in range(30):
+                add_posts(app, 1, username=f'writer_{number}', start=datetime(2024, 1, 1, 0, number))
+        count_queries(app, url)
+        counts[per_page] = [count_queries(app, url) for _ in range(3)]
+
+    assert counts[5] == counts[25]
+    assert len(set(counts[5])) == 1
@@ -0,0 +1,158 @@
+# TESTS OF THE FULL-TEXT SEARCH #
+# Ranking, the language filter and the cursors of the results, the index following the changes of posts,
+# and the search of a database without the index.
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post
+from flaskblog.posts.utils import set_content
+from flaskblog.search.utils import SearchPage, match_query
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+# flaskblog.search.utils: The utils.py file in the search folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post: Class with defined columns for the database table of posts.
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+# SearchPage: A class for one page of search results.
+# match_query: A function for creating the FTS5 query from the searched text.
+'''
+
+
+def add_post(app, author_id, title, content, language='en'):
+    '''
+    A function for adding one post (the index is updated by the triggers).
+
+    :return: The ID of the post.
+    '''
+
+    with app.app_context():
+        post = Post(title=title, author_id=author_id, language=language)
+        set_content(post, content)
+        db.session.add(post)
+        db.session.commit()
+        return post.id
+
+
+def found(app, search_text, language=None, per_page=10, **cursor):
+    '''
+    A function for the IDs of the posts of one page of search results.
+    '''
+
+    with app.app_context():
+        return [post.id for post in SearchPage(match_query(search_text), language, per_page, **cursor).items]
+
+
+def test_new_database_can_be_searched(make_app, add_posts):
+    '''
+    A database created by db.create_all() has the search index (without "flask migrate upgrade").
+    '''
+
+    app = make_app()
+    add_posts(app, 3)
+
+    page = app.test_client().get('/search?q=number', headers={'Accept-Language': 'en'})
+
+    assert page.status_code == 200
+    assert page.get_data(as_text=True).count('<mark>number</mark>') == 3
+
+
+def test_title_is_ranked_first(make_app, add_posts):
+    '''
+    A word found in the title weighs more than the same word found in the content.
+    '''
+
+    app = make_app()
+    author_id = add_posts(app, 0)
+    in_content = add_post(app, author_id, 'Greetings', 'Hello to all readers of the blog.')
+    in_title = add_post(app, author_id, 'Hello', 'A post about something else.')
+    add_post(app, author_id, 'Weather', 'It is raining today.')
+
+    assert found(app, 'hello') == [in_title, in_content]
+
+
+def test_language_filter(make_app, add_posts):
+    '''
+    Only posts of the selected language are found (all languages without the filter).
+    '''
+
+    app = make_app()
+    author_id = add_posts(app, 0)
+    english = add_post(app, author_id, 'Flask', 'A blog written in Flask.', 'en')
+    czech = add_post(app, author_id, 'Flask', 'Blog napsaný ve Flasku.', 'cs')
+
+    assert found(app, 'flask', 'en') == [english]
+    assert found(app, 'flask', 'cs') == [czech]
+    assert sorted(found(app, 'flask')) == sorted([english, czech])
+
+
+def test_cursors_go_through_all_results(make_app, add_posts):
+    '''
+    The next pages list every result once in the order of the rank, and the previous pages go back.
+
+    Legend:
+    # Posts with the same text have the same rank (the ID decides their order).
+    '''
+
+    app = make_app()
+    add_posts(app, 7)
+    everything = found(app, 'post')
+
+    pages, cursor = [], {}
+    with app.app_context():
+        while True:
+            page = SearchPage(match_query('post'), None, 3, **cursor)
+            pages.append([post.id for post in page.items])
+            if not page.has_next:
+                break
+            cursor = {'after': page.next_args['after']}
+        previous = SearchPage(match_query('post'), None, 3, before=page.previous_args['before'])
+
+    assert len(everything) == 7
+    assert pages == [everything[0:3], everything[3:6], everything[6:7]]
+    assert [post.id for post in previous.items] == everything[3:6]
+    assert previous.has_previous and previous.has_next
+
+
+def test_index_follows_changes_of_posts(make_app, add_posts):
+    '''
+    The triggers add a new post to the index, replace the text of an edited post and remove a deleted post.
+    '''
+
+    app = make_app()
+    author_id = add_posts(app, 0)
+    post_id = add_post(app, author_id, 'Mountains', 'A trip to the mountains.')
+    assert found(app, 'mountains') == [post_id]
+
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        post.title = 'Sea'
+        set_content(post, 'A trip to the sea.')
+        db.session.commit()
+    assert found(app, 'mountains') == []
+    assert found(app, 'sea') == [post_id]
+
+    with app.app_context():
+        db.session.delete(db.session.get(Post, post_id))
+        db.session.commit()
+    assert found(app, 'sea') == []
+
+
+def test_search_without_index_is_unavailable(make_app, shipped_database):
+    '''
+    The shipped database (before "flask migrate upgrade") has no search index, the page says so instead
+    of an error.
+    '''
+
+    app = make_app()
+
+    page = app.test_client().get('/search?q=hello', headers={'Accept-Language': 'en'})
+
+    assert page.status_code == 200
+    assert 'Search is not available at the moment.' in page.get_data(as_text=True)
@@ -0,0 +1,55 @@
+# TESTS OF THE STREAMING OF PAGES #
+# Streamed pages are the same as pages rendered whole, and pending messages are displayed once.
+
+
+# External extensions:
+import pytest
+'''
+(Legend)
+Import:
+# pytest: A framework for writing and running tests.
+'''
+
+
+@pytest.mark.parametrize('streaming', [True, False])
+def test_message_is_displayed_once(make_app, login, streaming):
+    '''
+    A message flashed before a redirect to a streamed page is displayed once (it is removed from the session).
+
+    Legend:
+    # STREAM_TEMPLATES: The home page is streamed (or rendered whole).
+    # /post/new: Creating a post flashes a message and redirects to the home page.
+    # alert-success: The displayed message.
+    '''
+
+    app = make_app(STREAM_TEMPLATES=streaming)
+    client = app.test_client()
+    login(app, client)
+    client.post('/post/new', data={'title': 'Hello', 'content': 'Hello world, this is the first post.'})
+
+    pages = [client.get('/').get_data(as_text=True) for _ in range(3)]
+    assert ['alert-success' in page for page in pages] == [True, False, False]
+
+
+def test_streamed_page_is_sent_in_chunks(make_app, add_posts):
+    '''
+    The head of the page is sent as the first chunk, and the streamed page equals the page rendered whole.
+
+    Legend:
+    # buffered=False: The chunks of the response are read one by one.
+    # </header>: The navigation ends the first chunk ({{ stream_flush() }} in layout.html).
+    '''
+
+    app = make_app()
+    add_posts(app, 3)
+    client = app.test_client()
+
+    response = client.get('/', buffered=False)
+    chunks = list(response.response)
+    response.close()
+    assert response.is_streamed
+    assert len(chunks) > 1
+    assert b'</header>' in chunks[0] and b'Post 0' not in chunks[0]
+
+    app.extensions['template_streaming'].enabled = False
+    assert client.get('/').data == b''.join(chunks)
@@ -0,0 +1,241 @@
+# TESTS OF THE STORED TRANSLATIONS #
+# A translation stored by the first click and reused by the next ones, displayed only to the reader asking for it,
+# removed with a changed or deleted post,
+# concurrent requests for the same translation sharing one call of the translator (with the fake backend),
+# a translation stored by another request in the meantime.
+
+
+# External extensions:
+import threading
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+'''
+(Legend)
+From:
+# sqlalchemy: A library for working with databases.
+# sqlalchemy.exc: Exceptions of SQLAlchemy.
+
+Import:
+# threading: A module for threads (here concurrent requests for a translation).
+# pytest: A framework for writing and running tests.
+# event: A module for listening to the events of the session (here a row stored before the commit).
+# IntegrityError: An exception of the database (here a unique or NOT NULL constraint).
+'''
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post, Translation
+from flaskblog.main.utils import get_translation, save_translation
+from flaskblog.main.single_flight import single_flight
+from flaskblog.main.workers import translation_workers
+from flaskblog.posts.utils import set_content
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+# flaskblog.main.single_flight: The single_flight.py file in the main folder in the root directory.
+# flaskblog.main.workers: The workers.py file in the main folder in the root directory.
+# flaskblog.posts.utils: The utils.py file in the posts folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post, Translation: Classes with defined columns for the database tables of posts and translations.
+# get_translation: A function for getting the translation of a post (stored or from the translator).
+# save_translation: A function for storing the finished translation of a post.
+# single_flight: The single-flight layer (one translator call shared by all concurrent requests of the process).
+# translation_workers: The pool of background threads translating new and updated posts.
+# set_content: A function for setting the content of a post together with its excerpt and number of words.
+'''
+
+
+# Number of concurrent requests:
+REQUESTS = 8
+
+# Headers of a Czech reader:
+CZECH = {'Accept-Language': 'cs'}
+
+
+def stored(app, post_id):
+    '''
+    A function for the stored translations of a post (language, status and title).
+    '''
+
+    with app.app_context():
+        return sorted(
+            (translation.language, translation.status, translation.title)
+            for translation in Translation.query.filter_by(post_id=post_id)
+        )
+
+
+def test_translation_is_stored_and_reused(make_app, add_posts):
+    '''
+    The first click on "translate" stores the translation, the next clicks read it without calling the translator.
+
+    Legend:
+    # calls == 1: The title and the content are sent in one request (the fake backend marks the joined text once).
+    # translated=1: The post page displays the stored translation.
+    '''
+
+    app = make_app()
+    add_posts(app, 1)
+    backend = app.extensions['translator'].backend
+    client = app.test_client()
+
+    first = client.get('/translate/1', headers=CZECH)
+    calls = backend.calls
+    second = client.get('/translate/1', headers=CZECH)
+    page = client.get(second.headers['Location'], headers=CZECH).get_data(as_text=True)
+
+    assert first.status_code == second.status_code == 302
+    assert second.headers['Location'].endswith('/post/1?translated=1')
+    assert calls == backend.calls == 1
+    assert stored(app, 1) == [('cs', 'done', '[cs] Post 0')]
+    assert '[cs] Post 0' in page
+
+
+def test_translation_is_displayed_only_on_request(make_app, add_posts):
+    '''
+    A translation requested by one reader is not displayed to another reader of the post (each request reads
+    the stored translation of its own language only with translated=1).
+
+    Legend:
+    # Accept-Language 'en': The post is written in English, so there is no English translation to display.
+    '''
+
+    app = make_app()
+    add_posts(app, 1)
+    first_reader, second_reader = app.test_client(), app.test_client()
+
+    first_reader.get('/translate/1', headers=CZECH)
+    translated = first_reader.get('/post/1?translated=1', headers=CZECH).get_data(as_text=True)
+    original = second_reader.get('/post/1', headers=CZECH).get_data(as_text=True)
+    english = {'Accept-Language': 'en'}
+    other_language = second_reader.get('/post/1?translated=1', headers=english).get_data(as_text=True)
+
+    assert '[cs] Post 0' in translated
+    assert '[cs] Post 0' not in original and 'Post 0' in original
+    assert '[cs] Post 0' not in other_language and 'Post 0' in other_language
+
+
+def test_translations_are_removed_with_the_post_text(make_app, login, monkeypatch):
+    '''
+    An edit of the title or content removes the stored translations of the post (an edit without a change
+    of the text keeps them), and a deleted post takes its translations with it.
+
+    Legend:
+    # translation_workers.enqueue: The background translation of the edited post is left to the tests
+      of the workers (here only the stored rows are checked).
+    '''
+
+    app = make_app()
+    client = app.test_client()
+    author_id = login(app, client)
+    monkeypatch.setattr(translation_workers, 'enqueue', lambda post: None)
+    with app.app_context():
+        post = Post(title='Mountains', author_id=author_id, language='en')
+        set_content(post, 'A trip to the mountains.')
+        db.session.add(post)
+        db.session.commit()
+        get_translation(post, 'cs')
+
+    client.post('/post/1/update', data={'title': 'Mountains', 'content': 'A trip to the mountains.'})
+    assert stored(app, 1) == [('cs', 'done', '[cs] Mountains')]
+
+    client.post('/post/1/update', data={'title': 'Sea', 'content': 'A trip to the sea.'})
+    assert stored(app, 1) == []
+
+    with app.app_context():
+        get_translation(db.session.get(Post, 1), 'cs')
+    client.post('/post/1/delete')
+    assert stored(app, 1) == []
+    with app.app_context():
+        assert Translation.query.count() == 0
+
+
+def test_concurrent_requests_share_one_call(make_app, add_posts, login):
+    '''
+    REQUESTS threads asking for the same missing translation call the backend once, the other calls are absorbed
+    (the counters are in /cache_stats).
+
+    Legend:
+    # TRANSLATOR_FAKE_DELAY: The first call lasts long enough for all threads to ask for the translation.
+    # threading.Barrier(): All threads ask at the same time.
+    # single_flight: The layer is shared by the whole process (the counters are compared before and after).
+    '''
+
+    app = make_app(TRANSLATOR_FAKE_DELAY=0.3, CACHE_STATS_ENABLED=True)
+    add_posts(app, 1)
+    backend = app.extensions['translator'].backend
+    before = single_flight.stats()
+    barrier = threading.Barrier(REQUESTS)
+    titles = []
+
+    def request():
+        with app.app_context():
+            post = db.session.get(Post, 1)
+            barrier.wait()
+            titles.append(get_translation(post, 'cs').title)
+
+    threads = [threading.Thread(target=request) for _ in range(REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    client = app.test_client()
+    login(app, client)
+    stats = client.get('/cache_stats').get_json()['translations']
+
+    assert backend.calls == 1
+    assert titles == ['[cs] Post 0'] * REQUESTS
+    assert stats['calls'] - before['calls'] == 1
+    assert stats['absorbed'] - before['absorbed'] == REQUESTS - 1
+    assert stats['in_flight'] == 0
+    with app.app_context():
+        assert Translation.query.filter_by(post_id=1, language='cs', status='done').count() == 1
+
+
+def test_translation_stored_in_the_meantime_is_completed(make_app, add_posts):
+    '''
+    When another request stores the same translation between the query and the commit, the stored row is
+    completed by the second attempt.
+
+    Legend:
+    # before_flush: The row is stored by another connection right before the session writes its own one.
+    # once=True: Only the first attempt meets the conflict.
+    '''
+
+    app = make_app()
+    add_posts(app, 1)
+
+    def store_in_the_meantime(session, flush_context, instances):
+        with db.engine.begin() as connection:
+            connection.execute(Translation.__table__.insert().values(
+                post_id=1, language='cs', source_hash='hash', title='', content='', status='pending'
+            ))
+
+    with app.app_context():
+        event.listen(db.session(), 'before_flush', store_in_the_meantime, once=True)
+        translation = save_translation(1, 'cs', 'hash', 'Titulek', 'Obsah')
+
+        assert translation.title == 'Titulek'
+        rows = Translation.query.filter_by(post_id=1, language='cs').all()
+        assert [(row.status, row.title) for row in rows] == [('done', 'Titulek')]
+
+
+def test_other_integrity_error_is_raised(make_app, add_posts):
+    '''
+    An integrity error without a stored row (here a missing language) is raised, not tried again.
+    '''
+
+    app = make_app()
+    add_posts(app, 1)
+
+    with app.app_context():
+        with pytest.raises(IntegrityError):
+            save_translation(1, None, 'hash', 'Titulek', 'Obsah')
+        assert Translation.query.count() == 0
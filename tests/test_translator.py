@@ -0,0 +1,172 @@
+# TESTS OF THE TRANSLATOR SERVICE #
+# Time limit of the calls and the circuit breaker (with the fake backend, no network access), the backends
+# selected in the configuration and the dictionary backend.
+
+
+# External extensions:
+import json
+import threading
+import time
+import pytest
+'''
+(Legend)
+Import:
+# json: Built-in module for transferring data as text (here the dictionary of the test).
+# threading: A module for threads (here concurrent calls of the backend).
+# time: A module for time functions (here waiting for the reset time of the circuit).
+# pytest: A framework for writing and running tests.
+'''
+
+
+# Internal extensions:
+from flaskblog.main.translator import TranslationUnavailable, TranslatorBackend, DictionaryBackend, FakeBackend
+from flaskblog.main.translator import create_backend
+from flaskblog.main.utils import SEPARATOR
+'''
+(Legend)
+From:
+# flaskblog.main.translator: The translator.py file in the main folder in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+
+Import:
+# TranslationUnavailable: An exception raised when the translation cannot be made.
+# TranslatorBackend: The base class of the translation backends.
+# DictionaryBackend: A class for local translations word by word from a dictionary.
+# FakeBackend: A class for local fake translations.
+# create_backend: A function for creating the translation backend selected in the configuration.
+# SEPARATOR: The line placed between packed texts (kept by the backends).
+'''
+
+
+def test_slow_translation_is_unavailable(make_app):
+    '''
+    A call slower than TRANSLATOR_TIMEOUT raises TranslationUnavailable without waiting for the backend.
+    '''
+
+    app = make_app(TRANSLATOR_FAKE_DELAY=0.5, TRANSLATOR_TIMEOUT=0.05)
+    translator = app.extensions['translator']
+
+    start = time.monotonic()
+    with pytest.raises(TranslationUnavailable):
+        translator.translate('Hello', 'cs')
+    assert time.monotonic() - start < 0.5
+    assert translator.failures == 1
+
+
+def test_circuit_opens_after_failures(make_app):
+    '''
+    After TRANSLATOR_FAILURE_THRESHOLD failures in a row, calls fail without calling the backend.
+    '''
+
+    app = make_app(TRANSLATOR_FAKE_FAIL=True, TRANSLATOR_FAILURE_THRESHOLD=3, TRANSLATOR_RESET_TIMEOUT=60)
+    translator = app.extensions['translator']
+
+    for _ in range(3):
+        assert not translator.is_open()
+        with pytest.raises(TranslationUnavailable):
+            translator.translate('Hello', 'cs')
+    assert translator.is_open()
+
+    with pytest.raises(TranslationUnavailable, match='circuit is open'):
+        translator.translate('Hello', 'cs')
+    assert translator.backend.calls == 3
+
+
+def test_circuit_half_opens_after_reset_time(make_app):
+    '''
+    After TRANSLATOR_RESET_TIMEOUT one trial call is let through: a failed one opens the circuit again,
+    a successful one closes it.
+    '''
+
+    app = make_app(TRANSLATOR_FAKE_FAIL=True, TRANSLATOR_FAILURE_THRESHOLD=2, TRANSLATOR_RESET_TIMEOUT=0.1)
+    translator = app.extensions['translator']
+    for _ in range(2):
+        with pytest.raises(TranslationUnavailable):
+            translator.translate('Hello', 'cs')
+    assert translator.is_open()
+
+    # Failed trial call:
+    time.sleep(0.15)
+    with pytest.raises(TranslationUnavailable, match='failed'):
+        translator.translate('Hello', 'cs')
+    assert translator.backend.calls == 3
+    with pytest.raises(TranslationUnavailable, match='circuit is open'):
+        translator.translate('Hello', 'cs')
+    assert translator.backend.calls == 3
+
+    # Successful trial call:
+    translator.backend.fail = False
+    time.sleep(0.15)
+    assert translator.translate('Hello', 'cs') == '[cs] Hello'
+    assert not translator.is_open()
+    assert translator.failures == 0
+
+
+def test_backend_must_translate():
+    '''
+    A backend without the translate() method cannot be created.
+    '''
+
+    class IncompleteBackend(TranslatorBackend):
+        pass
+
+    with pytest.raises(TypeError, match='translate'):
+        IncompleteBackend.from_config({})
+
+
+def test_fake_backend_counts_concurrent_calls():
+    '''
+    The calls of the fake backend shared by several threads are all counted.
+    '''
+
+    backend = FakeBackend()
+
+    def translate():
+        for _ in range(1000):
+            backend.translate('Hello', 'cs')
+
+    threads = [threading.Thread(target=translate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.calls == 8000
+
+
+@pytest.mark.parametrize('name, backend_class', [('dictionary', DictionaryBackend), ('fake', FakeBackend)])
+def test_backend_is_selected_in_the_configuration(make_app, name, backend_class):
+    '''
+    The translator uses the backend named by TRANSLATOR_BACKEND, an unknown name is an error.
+    '''
+
+    app = make_app(TRANSLATOR_BACKEND=name)
+
+    assert type(app.extensions['translator'].backend) is backend_class
+    with pytest.raises(ValueError, match='deepl'):
+        create_backend({'TRANSLATOR_BACKEND': 'deepl'})
+
+
+def test_dictionary_backend():
+    '''
+    The default dictionary translates word by word: capital letters are kept, unknown words, punctuation
+    and the separator of batched texts are left unchanged, a language without a dictionary is not translated.
+    '''
+
+    backend = DictionaryBackend()
+    text = 'Hello world, Flask!' + SEPARATOR + 'Good day.'
+
+    assert backend.translate(text, 'cs') == 'Ahoj svět, Flask!' + SEPARATOR + 'Dobrý den.'
+    assert backend.translate(text, 'xx') == text
+
+
+def test_dictionary_from_the_configuration(make_app, tmp_path):
+    '''
+    TRANSLATOR_DICTIONARY replaces the default dictionary (its words are matched regardless of case).
+    '''
+
+    path = tmp_path / 'dictionary.json'
+    path.write_text(json.dumps({'cs': {'Cat': 'kočka'}}), encoding='utf-8')
+    app = make_app(TRANSLATOR_BACKEND='dictionary', TRANSLATOR_DICTIONARY=str(path))
+
+    assert app.extensions['translator'].translate('A cat, a CAT and a dog.', 'cs') == 'A kočka, a Kočka and a dog.'
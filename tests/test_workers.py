@@ -0,0 +1,168 @@
+# TESTS OF THE BACKGROUND TRANSLATIONS #
+# Translations of new posts made by the background threads, the pending and failed states (a full queue),
+# repeated attempts with a growing delay and jobs of a changed post.
+
+
+# Internal extensions:
+from flaskblog import db
+from flaskblog.db_models import Post, Translation
+from flaskblog.main import workers
+from flaskblog.main.utils import source_hash, mark_pending, pending_translations
+'''
+(Legend)
+From:
+# flaskblog: The __init__.py file in the root directory.
+# flaskblog.db_models: The db_models.py file in the root directory.
+# flaskblog.main: The main folder in the root directory.
+# flaskblog.main.utils: The utils.py file in the main folder in the root directory.
+
+Import:
+# db: An instance of SQLAlchemy class (used for databases).
+# Post, Translation: Classes with defined columns for the database tables of posts and translations.
+# workers: The workers.py file (the TranslationWorkers class and its time module).
+# source_hash: A function for creating a hash of the post text.
+# mark_pending: A function for marking translations of a post as pending.
+# pending_translations: A function for finding posts whose translation is being prepared.
+'''
+
+
+# Headers of a Czech reader:
+CZECH = {'Accept-Language': 'cs'}
+
+
+def statuses(app):
+    '''
+    A function for the stored translations of all posts (post ID, status and title).
+    '''
+
+    with app.app_context():
+        return sorted((translation.post_id, translation.status, translation.title) for translation in Translation.query)
+
+
+def test_post_is_translated_in_the_background(make_app, add_posts):
+    '''
+    A job added by enqueue() is translated by a background thread into the other language (Czech).
+
+    Legend:
+    # TranslationWorkers(app): A pool of the test (the threads of the shared pool wait for the queue of their app).
+    # jobs.join(): Waiting until the threads finish all jobs.
+    '''
+
+    app = make_app(TRANSLATION_WORKERS=1)
+    add_posts(app, 1)
+    pool = workers.TranslationWorkers(app)
+
+    with app.app_context():
+        pool.enqueue(db.session.get(Post, 1))
+    pool.jobs.join()
+
+    assert len(pool.threads) == 1
+    assert statuses(app) == [(1, 'done', '[cs] Post 0')]
+
+
+def test_pending_and_failed_translations(make_app, add_posts):
+    '''
+    A queued translation is pending (the reader is asked to wait), a translation that did not fit into the full
+    queue is failed (the reader gets it during the request), and the queued job completes the pending one.
+
+    Legend:
+    # TRANSLATION_WORKERS=0: No thread takes the jobs, they stay in the queue.
+    # TRANSLATION_QUEUE_SIZE=1: The job of the second post does not fit into the queue.
+    # _translate(): The queued job made by the test instead of a thread.
+    '''
+
+    app = make_app(TRANSLATION_WORKERS=0, TRANSLATION_QUEUE_SIZE=1)
+    add_posts(app, 2)
+    pool = workers.TranslationWorkers(app)
+    with app.app_context():
+        pool.enqueue(db.session.get(Post, 1))
+        pool.enqueue(db.session.get(Post, 2))
+        assert pending_translations(Post.query.all(), 'cs') == {1}
+    assert statuses(app) == [(1, 'pending', ''), (2, 'failed', '')]
+
+    client = app.test_client()
+    waiting = client.get('/translate/1', headers=CZECH)
+    on_demand = client.get('/translate/2', headers=CZECH)
+
+    assert waiting.headers['Location'].endswith('/post/1')
+    assert on_demand.headers['Location'].endswith('/post/2?translated=1')
+    assert statuses(app) == [(1, 'pending', ''), (2, 'done', '[cs] Post 1')]
+
+    with app.app_context():
+        pool._translate(*pool.jobs.get_nowait())
+    assert statuses(app) == [(1, 'done', '[cs] Post 0'), (2, 'done', '[cs] Post 1')]
+
+
+def test_failed_attempts_are_repeated_with_growing_delay(make_app, add_posts, monkeypatch):
+    '''
+    A failed translation is tried TRANSLATION_RETRIES more times, each delay twice as long as the previous one,
+    and after the last attempt the translation is marked as failed.
+
+    Legend:
+    # TRANSLATOR_FAILURE_THRESHOLD: High enough for the circuit breaker to stay closed.
+    # time.sleep: The delays are recorded instead of waiting.
+    '''
+
+    app = make_app(
+        TRANSLATOR_FAKE_FAIL=True,
+        TRANSLATOR_FAILURE_THRESHOLD=10,
+        TRANSLATION_RETRIES=2,
+        TRANSLATION_RETRY_DELAY=0.5
+    )
+    add_posts(app, 1)
+    pool = workers.TranslationWorkers(app)
+    backend = app.extensions['translator'].backend
+    delays = []
+    monkeypatch.setattr(workers.time, 'sleep', delays.append)
+
+    with app.app_context():
+        post = db.session.get(Post, 1)
+        mark_pending(post, ['cs'])
+        pool._translate(post.id, 'cs', source_hash(post.title, post.content))
+
+    assert delays == [0.5, 1.0]
+    assert backend.calls == 3
+    assert statuses(app) == [(1, 'failed', '')]
+
+
+def test_translation_succeeds_after_a_failed_attempt(make_app, add_posts, monkeypatch):
+    '''
+    A translation failing only once is stored by the repeated attempt.
+    '''
+
+    app = make_app(TRANSLATOR_FAKE_FAIL=True, TRANSLATION_RETRIES=2, TRANSLATION_RETRY_DELAY=0.5)
+    add_posts(app, 1)
+    pool = workers.TranslationWorkers(app)
+    backend = app.extensions['translator'].backend
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        backend.fail = False
+
+    monkeypatch.setattr(workers.time, 'sleep', sleep)
+
+    with app.app_context():
+        post = db.session.get(Post, 1)
+        mark_pending(post, ['cs'])
+        pool._translate(post.id, 'cs', source_hash(post.title, post.content))
+
+    assert delays == [0.5]
+    assert statuses(app) == [(1, 'done', '[cs] Post 0')]
+
+
+def test_job_of_a_changed_post_is_skipped(make_app, add_posts):
+    '''
+    A job with the hash of an older text of the post is skipped (a newer job translates the current text).
+    '''
+
+    app = make_app()
+    add_posts(app, 1)
+    pool = workers.TranslationWorkers(app)
+    backend = app.extensions['translator'].backend
+
+    with app.app_context():
+        pool._translate(1, 'cs', source_hash('Older title', 'Older content.'))
+
+    assert backend.calls == 0
+    assert statuses(app) == []